@@ -0,0 +1,143 @@
+"""
+Benchmark workflow discovery on a large synthetic tree.
+
+Builds a throwaway project with many packages plus heavy directories that
+should never be walked (``.git``, ``node_modules``, ``__pycache__``), then
+reports wall time and the number of ``stat`` calls made by Python for the
+enumeration phase and for a full ``discover()``.
+
+Run with:
+    python benchmarks/bench_discovery.py [--packages 200] [--files 50] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sphinx_dflow_ext.discovery import (  # noqa: E402
+    DiscoveryCache,
+    DiscoveryResult,
+    WorkflowDiscovery,
+)
+
+WORKFLOW_MODULE = '''"""
+Synthetic workflow module.
+
+# WORKFLOWS: overview, full
+"""
+
+# DOCUMENT_WORKFLOW: overview, full
+def run():
+    # Step 1: Load
+    pass
+'''
+
+PLAIN_MODULE = '"""Plain module."""\n\nVALUE = 1\n' + '# filler\n' * 200
+
+
+def build_tree(root: Path, packages: int, files: int) -> None:
+    """Create ``packages`` packages of ``files`` modules plus heavy directories."""
+    for p in range(packages):
+        package = root / 'src' / f'group_{p % 10}' / f'pkg_{p:04d}'
+        package.mkdir(parents=True)
+        (package / '__init__.py').write_text('')
+        for f in range(files):
+            content = WORKFLOW_MODULE if f % 10 == 0 else PLAIN_MODULE
+            (package / f'mod_{f:03d}.py').write_text(content)
+        cache = package / '__pycache__'
+        cache.mkdir()
+        for f in range(files):
+            (cache / f'mod_{f:03d}.cpython-311.pyc').write_bytes(b'\0' * 64)
+    
+    for heavy in ('.git/objects', 'node_modules'):
+        for d in range(packages):
+            target = root / 'src' / heavy / f'd{d:04d}'
+            target.mkdir(parents=True)
+            for f in range(files // 2):
+                (target / f'f{f:03d}.py').write_text('x = 1\n')
+
+
+class StatCounter:
+    """Count os.stat/os.lstat calls made from Python while active."""
+    
+    def __init__(self):
+        self.count = 0
+        self._originals = {}
+    
+    def __enter__(self):
+        for name in ('stat', 'lstat'):
+            original = getattr(os, name)
+            self._originals[name] = original
+            
+            def counted(*args, _original=original, **kwargs):
+                self.count += 1
+                return _original(*args, **kwargs)
+            
+            setattr(os, name, counted)
+        return self
+    
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+
+def measure(label: str, func, repeat: int) -> None:
+    """Print best-of-``repeat`` wall time and stat calls for ``func``."""
+    best = float('inf')
+    stats = 0
+    for _ in range(repeat):
+        with StatCounter() as counter:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        stats = counter.count
+    print(f"{label:<28} {best * 1000:9.1f} ms {stats:10d} stat calls")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--packages', type=int, default=200)
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.packages, args.files)
+        
+        # Exclude nothing by pattern so pruning of heavy directories is visible
+        discovery = WorkflowDiscovery(
+            base_path=root, exclude_patterns=['test_*'], workers=args.workers
+        )
+        
+        def enumerate_files():
+            files = []
+            discovery._collect_files(root / 'src', DiscoveryResult(), True, files)
+            return files
+        
+        print(f"Tree: {sum(1 for _ in root.rglob('*'))} entries, "
+              f"{len(enumerate_files())} candidate files")
+        measure("enumerate candidates", enumerate_files, args.repeat)
+        measure("discover()", lambda: discovery.discover(['src']), args.repeat)
+        
+        cache_path = root / 'discovery_cache.json'
+        
+        def cached_discover():
+            WorkflowDiscovery(
+                base_path=root, exclude_patterns=['test_*'], workers=args.workers,
+                cache=DiscoveryCache(cache_path)
+            ).discover(['src'])
+        
+        cached_discover()  # Populate the cache
+        measure("discover() warm cache", cached_discover, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
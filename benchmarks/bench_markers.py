@@ -0,0 +1,62 @@
+"""
+Benchmark marker extraction on files with many DOCUMENT_WORKFLOW markers.
+
+Times ``WorkflowDiscovery._analyze_file`` on generated modules where every
+function carries a marker, for a range of marker counts.
+
+Run with:
+    python benchmarks/bench_markers.py [--markers 100 1000 5000] [--repeat 5]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sphinx_dflow_ext.discovery import WorkflowDiscovery  # noqa: E402
+
+FUNCTION_TEMPLATE = '''
+# DOCUMENT_WORKFLOW: tier_{i}, shared
+def function_{i}(data):
+    """Function {i}."""
+    # Step 1: Load
+    value = data + {i}
+    # Step 2: Return
+    return value
+'''
+
+
+def build_module(markers: int) -> str:
+    """Generate a module with one marked function per marker."""
+    header = '"""\nSynthetic module with many markers.\n\n# WORKFLOWS: overview, full\n"""\n'
+    return header + ''.join(FUNCTION_TEMPLATE.format(i=i) for i in range(markers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--markers', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    discovery = WorkflowDiscovery()
+    with tempfile.TemporaryDirectory() as tmp:
+        for markers in args.markers:
+            path = Path(tmp) / f'markers_{markers}.py'
+            path.write_text(build_module(markers))
+            
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                analysis = discovery._analyze_file(path)
+                best = min(best, time.perf_counter() - start)
+            
+            entry_points = len(analysis.workflow.entry_points)
+            print(f"{markers:6d} markers ({path.stat().st_size / 1024:7.0f} KiB) "
+                  f"{best * 1000:9.2f} ms  {entry_points} entry points")
+
+
+if __name__ == '__main__':
+    main()
@@ -38,9 +38,13 @@ from .discovery import (
     WorkflowDiscovery,
     DiscoveredWorkflow,
     DiscoveryResult,
+    DiscoveryMetrics,
+    DiscoveryCache,
     discover_workflows,
     build_workflow_registry,
 )
+from .path_matcher import PathMatcher, compile_patterns
+from .watcher import DiscoveryEvent, DiscoveryWatcher
 
 # Import TOC generator for external use
 from .toc_generator import (
@@ -66,8 +70,14 @@ __all__ = [
     'WorkflowDiscovery',
     'DiscoveredWorkflow', 
     'DiscoveryResult',
+    'DiscoveryMetrics',
+    'DiscoveryCache',
     'discover_workflows',
     'build_workflow_registry',
+    'PathMatcher',
+    'compile_patterns',
+    'DiscoveryEvent',
+    'DiscoveryWatcher',
     # TOC Generation
     'WorkflowTOCGenerator',
     'WorkflowIndexBuilder',
@@ -74,6 +74,28 @@ class WorkflowData:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class FunctionSummary:
+    """Function name and step count, without the step tree."""
+    
+    name: str
+    step_count: int = 0
+
+
+@dataclass
+class WorkflowSummary:
+    """Summary of a module's workflows for index pages."""
+    
+    module_name: str
+    module_path: str
+    functions: List[FunctionSummary] = field(default_factory=list)
+    
+    @property
+    def step_count(self) -> int:
+        """Total steps across all functions."""
+        return sum(f.step_count for f in self.functions)
+
+
 class DatabaseAdapter:
     """
     Adapter to read workflow data from the generate_workflow_docs database.
@@ -122,6 +144,12 @@ class DatabaseAdapter:
         
         self._engine = create_engine(f"sqlite:///{self.db_path}", echo=False)
     
+    def close(self):
+        """Dispose of the engine and its pooled connections; reconnects lazily."""
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+    
     def _get_session(self):
         """Get a database session."""
         from sqlmodel import Session
@@ -180,15 +208,7 @@ class DatabaseAdapter:
             sys.path.insert(0, str(self.project_root.parent))
             from document_workflow.db.tables import Module, Function, Step
         
-        # Normalize path
-        path = Path(module_path)
-        if path.is_absolute():
-            try:
-                rel_path = str(path.relative_to(self.project_root))
-            except ValueError:
-                rel_path = str(path)
-        else:
-            rel_path = str(path)
+        rel_path = self._relative_module_path(module_path)
         
         session = self._get_session()
         try:
@@ -207,30 +227,7 @@ class DatabaseAdapter:
                 logger.warning(f"Module not found in database: {rel_path}")
                 return None
             
-            # Load functions with steps
-            functions = []
-            for func in module.functions:
-                steps = self._build_step_hierarchy(func.steps)
-                functions.append(FunctionData(
-                    name=func.name,
-                    signature=func.signature,
-                    docstring=func.docstring,
-                    line_start=func.line_start,
-                    line_end=func.line_end or func.line_start,
-                    steps=steps,
-                    module_path=module.path
-                ))
-            
-            return WorkflowData(
-                name=module.module_name,
-                module_name=module.module_name,
-                module_path=module.path,
-                functions=functions,
-                metadata={
-                    "path": module.path,
-                    "last_scanned": str(module.last_scanned) if module.last_scanned else None
-                }
-            )
+            return self._module_to_workflow(module)
         finally:
             session.close()
     
@@ -289,35 +286,158 @@ class DatabaseAdapter:
                 logger.warning(f"Function not found in database: {target}")
                 return None
             
-            # Load the module for context
-            module = func.module
+            return self._function_to_workflow(func)
+        finally:
+            session.close()
+    
+    def get_workflows(self, targets: List[str]) -> Dict[str, Optional[WorkflowData]]:
+        """
+        Resolve many directive targets in one session.
+        
+        Targets follow the ``workflow-db`` directive rules: ``module:function``
+        is a function, ``*.py`` is a module, anything else is tried as a
+        function name and then as a module. Candidates are loaded with two
+        queries (functions by name, modules by path/name) with their steps
+        eager-loaded, then matched in Python.
+        
+        Args:
+            targets: Directive targets
+        
+        Returns:
+            Dictionary mapping each target -> WorkflowData, or None if not found
+        """
+        from sqlalchemy import or_
+        from sqlalchemy.orm import selectinload
+        from sqlmodel import select
+        
+        try:
+            from document_workflow.db.tables import Module, Function, Step
+        except ImportError:
+            import sys
+            sys.path.insert(0, str(self.project_root.parent))
+            from document_workflow.db.tables import Module, Function, Step
+        
+        targets = list(dict.fromkeys(targets))
+        func_names = {t.rsplit(":", 1)[-1] for t in targets if ":" in t or not t.endswith(".py")}
+        module_paths = {self._relative_module_path(t) for t in targets if ":" not in t}
+        module_stems = {Path(p).stem for p in module_paths}
+        
+        session = self._get_session()
+        try:
+            functions = []
+            if func_names:
+                functions = session.exec(
+                    select(Function)
+                    .where(Function.name.in_(func_names))
+                    .options(selectinload(Function.module), selectinload(Function.steps))
+                ).all()
+            
+            modules = []
+            if module_paths:
+                modules = session.exec(
+                    select(Module)
+                    .where(or_(Module.path.in_(module_paths), Module.module_name.in_(module_stems)))
+                    .options(selectinload(Module.functions).selectinload(Function.steps))
+                ).all()
             
-            # Build step hierarchy
-            steps = self._build_step_hierarchy(func.steps)
+            # First match wins, as with .first() in the single-target lookups
+            modules_by_path: Dict[str, Any] = {}
+            modules_by_name: Dict[str, Any] = {}
+            for module in modules:
+                modules_by_path.setdefault(module.path, module)
+                modules_by_name.setdefault(module.module_name, module)
             
-            function_data = FunctionData(
-                name=func.name,
-                signature=func.signature,
-                docstring=func.docstring,
-                line_start=func.line_start,
-                line_end=func.line_end or func.line_start,
-                steps=steps,
-                module_path=module.path if module else ""
-            )
+            results: Dict[str, Optional[WorkflowData]] = {}
+            for target in targets:
+                workflow = None
+                if ":" in target or not target.endswith(".py"):
+                    func = self._match_function(functions, target)
+                    if func:
+                        workflow = self._function_to_workflow(func)
+                if workflow is None and ":" not in target:
+                    rel_path = self._relative_module_path(target)
+                    module = (
+                        modules_by_path.get(rel_path)
+                        or modules_by_name.get(Path(rel_path).stem)
+                    )
+                    if module:
+                        workflow = self._module_to_workflow(module)
+                if workflow is None:
+                    logger.warning(f"Workflow target not found in database: {target}")
+                results[target] = workflow
             
-            return WorkflowData(
-                name=f"{module.module_name}.{func.name}" if module else func.name,
-                module_name=module.module_name if module else "",
-                module_path=module.path if module else "",
-                functions=[function_data],
-                metadata={
-                    "function": func.name,
-                    "path": module.path if module else None
-                }
-            )
+            return results
         finally:
             session.close()
     
+    def _match_function(self, functions: List[Any], target: str) -> Optional[Any]:
+        """Find the function matching a target among candidate Function rows."""
+        if ":" in target:
+            module_part, func_name = target.rsplit(":", 1)
+            module_search_fwd = module_part.replace("\\", "/")
+            module_search_back = module_part.replace("/", "\\")
+        else:
+            module_part, func_name = None, target
+        
+        for func in functions:
+            if func.name != func_name:
+                continue
+            if module_part is None:
+                return func
+            path = func.module.path if func.module else ""
+            if module_search_fwd in path or module_search_back in path:
+                return func
+        return None
+    
+    def _relative_module_path(self, module_path: str) -> str:
+        """Normalize a module path to be relative to the project root."""
+        path = Path(module_path)
+        if path.is_absolute():
+            try:
+                return str(path.relative_to(self.project_root))
+            except ValueError:
+                return str(path)
+        return str(path)
+    
+    def _function_data(self, func: Any, module_path: str) -> FunctionData:
+        """Convert a Function row (with its steps) to FunctionData."""
+        return FunctionData(
+            name=func.name,
+            signature=func.signature,
+            docstring=func.docstring,
+            line_start=func.line_start,
+            line_end=func.line_end or func.line_start,
+            steps=self._build_step_hierarchy(func.steps),
+            module_path=module_path
+        )
+    
+    def _module_to_workflow(self, module: Any) -> WorkflowData:
+        """Convert a Module row to WorkflowData with all functions and steps."""
+        return WorkflowData(
+            name=module.module_name,
+            module_name=module.module_name,
+            module_path=module.path,
+            functions=[self._function_data(func, module.path) for func in module.functions],
+            metadata={
+                "path": module.path,
+                "last_scanned": str(module.last_scanned) if module.last_scanned else None
+            }
+        )
+    
+    def _function_to_workflow(self, func: Any) -> WorkflowData:
+        """Convert a Function row to WorkflowData containing just that function."""
+        module = func.module
+        return WorkflowData(
+            name=f"{module.module_name}.{func.name}" if module else func.name,
+            module_name=module.module_name if module else "",
+            module_path=module.path if module else "",
+            functions=[self._function_data(func, module.path if module else "")],
+            metadata={
+                "function": func.name,
+                "path": module.path if module else None
+            }
+        )
+    
     def _build_step_hierarchy(self, steps: List[Any]) -> List[StepData]:
         """
         Build hierarchical step structure from flat database steps.
@@ -399,6 +519,47 @@ class DatabaseAdapter:
         
         return workflows
     
+    def get_workflow_summaries(self) -> List[WorkflowSummary]:
+        """
+        Get module/function names and step counts for all workflows.
+        
+        Unlike ``get_all_workflows`` this is a single aggregate query and
+        does not build step trees, so it stays cheap for large databases.
+        
+        Returns:
+            List of WorkflowSummary for modules with steps, sorted by module name
+        """
+        from sqlmodel import select, func
+        
+        try:
+            from document_workflow.db.tables import Module, Function, Step
+        except ImportError:
+            import sys
+            sys.path.insert(0, str(self.project_root.parent))
+            from document_workflow.db.tables import Module, Function, Step
+        
+        session = self._get_session()
+        try:
+            rows = session.exec(
+                select(Module.module_name, Module.path, Function.name, func.count())
+                .select_from(Module)
+                .join(Function)
+                .join(Step)
+                .group_by(Module.module_name, Module.path, Function.id, Function.name)
+                .order_by(Module.module_name, Module.path, Function.line_start)
+            ).all()
+        finally:
+            session.close()
+        
+        summaries: Dict[str, WorkflowSummary] = {}
+        for module_name, module_path, func_name, step_count in rows:
+            summary = summaries.get(module_path)
+            if summary is None:
+                summary = summaries[module_path] = WorkflowSummary(module_name, module_path)
+            summary.functions.append(FunctionSummary(func_name, step_count))
+        
+        return list(summaries.values())
+    
     def get_modules_with_steps(self) -> List[str]:
         """
         Get list of module paths that have at least one step.
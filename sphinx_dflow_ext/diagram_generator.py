@@ -0,0 +1,240 @@
+"""
+Mermaid diagram generator for large workflows.
+
+The flat flowcharts put every step and sub-step into one graph, which
+mermaid.js cannot lay out quickly once a function has hundreds of steps.
+The clustered mode keeps every diagram under a fixed node budget:
+
+- Sub-steps are grouped into ``subgraph`` clusters under their parent step
+- Steps whose sub-steps do not fit the budget collapse to a single node
+- Collapsed steps (and ranges of top-level steps) get a drill-down
+  sub-diagram in a dropdown, rendered only when the dropdown is opened
+
+Only the main diagram is laid out on page load, so client-side layout cost
+is bounded by ``max_nodes`` regardless of workflow size.
+"""
+
+import html
+import re
+from typing import Any, List, Tuple
+
+DIAGRAM_MODES = ('flat', 'clustered', 'auto')
+"""Supported diagram modes. ``auto`` clusters only when over the node budget."""
+
+DEFAULT_MAX_NODES = 50
+"""Default node budget for a single clustered diagram."""
+
+
+def _step_number(step: Any) -> str:
+    """Get the (hierarchical) step number as a string."""
+    return str(getattr(step, 'hierarchical_number', '') or getattr(step, 'number', ''))
+
+
+def _step_children(step: Any) -> List[Any]:
+    """Get sub-steps of a step (StepData.sub_steps or HierarchicalStep.children)."""
+    return list(getattr(step, 'children', []) or getattr(step, 'sub_steps', []) or [])
+
+
+def count_steps(steps: List[Any]) -> int:
+    """Count steps including all nested sub-steps."""
+    return sum(1 + count_steps(_step_children(step)) for step in steps)
+
+
+def use_clustered_diagram(steps: List[Any], mode: str, max_nodes: int) -> bool:
+    """Decide whether a diagram should use the clustered layout."""
+    if mode == 'clustered':
+        return True
+    if mode == 'auto':
+        return count_steps(steps) > max_nodes
+    return False
+
+
+class MermaidDiagramBuilder:
+    """
+    Build node-capped, clustered Mermaid diagrams with drill-down sub-diagrams.
+
+    Example:
+        builder = MermaidDiagramBuilder(max_nodes=40)
+        rst_lines = builder.build_rst(func.steps, diagram_id='run-analysis')
+    """
+
+    def __init__(self, max_nodes: int = DEFAULT_MAX_NODES, direction: str = 'TD'):
+        """
+        Initialize diagram builder.
+
+        Args:
+            max_nodes: Maximum number of step nodes in any single diagram
+            direction: Mermaid flowchart direction (TD, LR, ...)
+        """
+        self.max_nodes = max(2, max_nodes)
+        self.direction = direction
+
+    def build_rst(self, steps: List[Any], diagram_id: str) -> List[str]:
+        """
+        Build RST for the main diagram followed by its drill-down sub-diagrams.
+
+        Args:
+            steps: Top-level steps (StepData or HierarchicalStep objects)
+            diagram_id: Prefix for drill-down anchors (unique per function)
+
+        Returns:
+            List of RST lines
+        """
+        diagram_id = self.make_diagram_id(diagram_id)
+        drilldowns: List[Tuple[str, str, List[Any]]] = []
+
+        lines = [".. mermaid::", ""]
+        lines.extend(f"   {line}" for line in self._build_graph(steps, diagram_id, drilldowns))
+        lines.append("")
+
+        # Drill-downs discovered while building a sub-diagram are appended to
+        # the same list, so this walks every level breadth-first
+        index = 0
+        while index < len(drilldowns):
+            anchor, title, sub_steps = drilldowns[index]
+            graph = self._build_graph(sub_steps, anchor, drilldowns)
+            lines.extend(self._deferred_diagram_rst(anchor, title, graph))
+            index += 1
+
+        return lines
+
+    @staticmethod
+    def make_diagram_id(name: str) -> str:
+        """Convert a function/module name into an HTML-safe anchor prefix."""
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-').lower()
+        return f"wf-diagram-{slug}" if slug else "wf-diagram"
+
+    def _build_graph(
+        self,
+        steps: List[Any],
+        diagram_id: str,
+        drilldowns: List[Tuple[str, str, List[Any]]]
+    ) -> List[str]:
+        """
+        Build Mermaid source for one diagram within the node budget.
+
+        Args:
+            steps: Steps to show at the top level of this diagram
+            diagram_id: Anchor prefix for this diagram's drill-downs
+            drilldowns: List to append (anchor, title, steps) drill-downs to
+
+        Returns:
+            Mermaid source lines
+        """
+        lines = [f"flowchart {self.direction}"]
+
+        if len(steps) > self.max_nodes:
+            # Too many top-level steps: chain ranges of steps instead
+            return lines + self._build_range_graph(steps, diagram_id, drilldowns)
+
+        nodes_left = self.max_nodes - len(steps)
+        prev_id = None
+
+        for step in steps:
+            node_id = self._node_id(step)
+            children = _step_children(step)
+
+            if children and len(children) <= nodes_left:
+                # Cluster direct sub-steps with their parent
+                nodes_left -= len(children)
+                lines.append(f'   subgraph {node_id}_group ["{self._label(step)}"]')
+                lines.append(f'      {node_id}["{self._label(step)}"]')
+                for child in children:
+                    child_id = self._node_id(child)
+                    lines.append(f'      {child_id}["{self._collapsed_label(child)}"]')
+                    lines.append(f"      {node_id} --> {child_id}")
+                lines.append("   end")
+                for child in children:
+                    if _step_children(child):
+                        lines.append(self._add_drilldown(child, diagram_id, drilldowns))
+            else:
+                lines.append(f'   {node_id}["{self._collapsed_label(step)}"]')
+                if children:
+                    lines.append(self._add_drilldown(step, diagram_id, drilldowns))
+
+            if prev_id:
+                lines.append(f"   {prev_id} --> {node_id}")
+            prev_id = node_id
+
+        return lines
+
+    def _build_range_graph(
+        self,
+        steps: List[Any],
+        diagram_id: str,
+        drilldowns: List[Tuple[str, str, List[Any]]]
+    ) -> List[str]:
+        """Chain consecutive ranges of steps, each drilling down to its steps."""
+        lines = []
+        size = -(-len(steps) // self.max_nodes)  # ceil division
+        prev_id = None
+
+        for index, start in enumerate(range(0, len(steps), size), 1):
+            group = steps[start:start + size]
+            first, last = _step_number(group[0]), _step_number(group[-1])
+            node_id = f"R{index}"
+            anchor = f"{diagram_id}-r{index}"
+            title = f"Steps {first}–{last}" if first != last else f"Step {first}"
+
+            lines.append(f'   {node_id}["{self._escape(title)} ({count_steps(group)} steps)"]')
+            lines.append(f'   click {node_id} href "#{anchor}" "Open sub-diagram"')
+            drilldowns.append((anchor, title, group))
+
+            if prev_id:
+                lines.append(f"   {prev_id} --> {node_id}")
+            prev_id = node_id
+
+        return lines
+
+    def _add_drilldown(
+        self,
+        step: Any,
+        diagram_id: str,
+        drilldowns: List[Tuple[str, str, List[Any]]]
+    ) -> str:
+        """Register a drill-down sub-diagram for a step and return its click line."""
+        number = _step_number(step)
+        anchor = f"{diagram_id}-{number.replace('.', '-')}"
+        drilldowns.append((anchor, f"Step {number}: {getattr(step, 'name', '')}", _step_children(step)))
+        return f'   click {self._node_id(step)} href "#{anchor}" "Open sub-diagram"'
+
+    def _deferred_diagram_rst(self, anchor: str, title: str, graph: List[str]) -> List[str]:
+        """
+        Wrap a sub-diagram in a dropdown that workflow.js renders on first open.
+
+        The source is emitted as raw HTML with a non-``mermaid`` class so
+        mermaid.js does not lay it out on page load.
+        """
+        source = html.escape('\n'.join(graph))
+        lines = [
+            f".. dropdown:: Diagram: {title}",
+            "   :class-container: workflow-subdiagram",
+            "",
+            "   .. raw:: html",
+            "",
+            f'      <div id="{anchor}" class="workflow-subdiagram-anchor"></div>',
+            '      <pre class="workflow-mermaid-deferred">',
+        ]
+        lines.extend(f"      {line}" for line in source.split('\n'))
+        lines.append("      </pre>")
+        lines.append("")
+        return lines
+
+    def _node_id(self, step: Any) -> str:
+        """Mermaid node id for a step (S1, S2_1, ...)."""
+        return f"S{_step_number(step).replace('.', '_')}"
+
+    def _label(self, step: Any) -> str:
+        """Node label for a step."""
+        return self._escape(f"{_step_number(step)}: {getattr(step, 'name', '')}")
+
+    def _collapsed_label(self, step: Any) -> str:
+        """Node label that notes how many sub-steps are hidden behind it."""
+        hidden = count_steps(_step_children(step))
+        label = self._label(step)
+        return f"{label} (+{hidden} sub-steps)" if hidden else label
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        """Escape characters Mermaid treats specially inside quoted labels."""
+        return text.replace('"', '#quot;')
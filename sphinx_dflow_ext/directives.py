@@ -17,6 +17,7 @@ from docutils.statemachine import StringList
 from sphinx.util import logging as sphinx_logging
 
 from .rst_generator import WorkflowRSTGenerator
+from .source_generator import record_source_mapping
 
 logger = sphinx_logging.getLogger(__name__)
 
@@ -146,18 +147,9 @@ class WorkflowDirective(Directive):
             # Collect ALL source files referenced by steps (main + external modules)
             all_source_mappings = self._collect_all_source_mappings(hierarchical_steps, module_name, str(module_path))
             
-            # Store source mappings in environment for later source generation
-            if not hasattr(env, 'workflow_source_mappings'):
-                env.workflow_source_mappings = {}
-            
-            # Merge all source mappings
+            # Store (merge) source mappings in environment for later source generation
             for src_module, mapping_data in all_source_mappings.items():
-                if src_module in env.workflow_source_mappings:
-                    # Merge steps if module already exists
-                    existing = env.workflow_source_mappings[src_module]
-                    existing['steps'].update(mapping_data['steps'])
-                else:
-                    env.workflow_source_mappings[src_module] = mapping_data
+                record_source_mapping(env, src_module, mapping_data['source_path'], mapping_data['steps'])
             
             # DEBUG: Print collected source mappings
             print(f"[SOURCE DEBUG] Collected {len(all_source_mappings)} source modules:")
@@ -472,7 +464,7 @@ class WorkflowIndexDirective(Directive):
     
     Options:
         search-paths: Comma-separated directories to scan (relative to project root)
-        exclude-patterns: Comma-separated glob patterns to exclude
+        exclude-patterns: Comma-separated glob patterns to exclude (paths, ``**`` and ``!`` allowed)
         title: Custom title for the index page
         group-by-package: Group modules by package (default: true)
         show-descriptions: Show module docstrings (default: false)
@@ -494,7 +486,7 @@ class WorkflowIndexDirective(Directive):
     
     def run(self) -> List[nodes.Node]:
         """Execute the directive."""
-        from .discovery import WorkflowDiscovery, DiscoveryResult
+        from .discovery import DiscoveryResult, get_shared_discovery_result
         from .toc_generator import WorkflowTOCGenerator
         
         # Get search paths from option or config
@@ -533,14 +525,8 @@ class WorkflowIndexDirective(Directive):
         source_dir = Path(env.srcdir)
         base_path = source_dir.parent  # Go up from docs/ to project root
         
-        # Run discovery
-        discovery = WorkflowDiscovery(
-            base_path=base_path,
-            exclude_patterns=exclude_patterns,
-            verbose=getattr(env.config, 'workflow_verbose', False)
-        )
-        
-        result = discovery.discover(search_paths)
+        # Run discovery (shared with other index directives in this build)
+        result = get_shared_discovery_result(env, search_paths, exclude_patterns)
         
         if not result.workflows:
             # No workflows found
@@ -554,10 +540,8 @@ class WorkflowIndexDirective(Directive):
         
         # Store discovery result in environment for later use
         if not hasattr(env, 'workflow_discovery_result'):
-            env.workflow_discovery_result = result
-        else:
-            # Merge with existing
-            env.workflow_discovery_result.workflows.update(result.workflows)
+            env.workflow_discovery_result = DiscoveryResult()
+        env.workflow_discovery_result.workflows.update(result.workflows)
         
         # Generate RST content
         toc_config = {
@@ -618,7 +602,8 @@ class WorkflowIndexDirective(Directive):
             
             for workflow in modules:
                 # Module entry
-                module_header = f"📄 **{workflow.module_name}**"
+                icon = "📓" if workflow.is_notebook else "📄"
+                module_header = f"{icon} **{workflow.module_name}**"
                 if workflow.declared_tiers:
                     module_header += f" ({len(workflow.declared_tiers)} tiers)"
                 
@@ -629,8 +614,19 @@ class WorkflowIndexDirective(Directive):
                     rst_lines.append(f"   *{workflow.docstring}*")
                     rst_lines.append("")
                 
+                # Get relative path from source dir to module
+                try:
+                    rel_path = workflow.module_path.relative_to(base_path)
+                except ValueError:
+                    rel_path = workflow.module_path
+                
+                if workflow.is_notebook:
+                    # Notebooks render all cells at once; there are no per-tier views
+                    rst_lines.append(f"   .. workflow-notebook:: {rel_path.as_posix()}")
+                    rst_lines.append("")
+                
                 # Tier links with workflow directives
-                if workflow.declared_tiers:
+                elif workflow.declared_tiers:
                     rst_lines.append("   **Tiers:**")
                     rst_lines.append("")
                     
@@ -641,13 +637,6 @@ class WorkflowIndexDirective(Directive):
                         rst_lines.append("")
                         rst_lines.append(f"   **{tier}** tier:")
                         rst_lines.append("")
-                        
-                        # Get relative path from source dir to module
-                        try:
-                            rel_path = workflow.module_path.relative_to(base_path)
-                        except ValueError:
-                            rel_path = workflow.module_path
-                        
                         rst_lines.append(f"   .. workflow:: {rel_path.as_posix()}")
                         rst_lines.append(f"      :tier: {tier}")
                         rst_lines.append("")
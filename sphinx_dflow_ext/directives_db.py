@@ -9,20 +9,454 @@ Provides:
 - .. workflow-index-db:: - Auto-generated index from database
 """
 
+import hashlib
+import html
+import json
 import logging
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+import os
+import re
+from pathlib import Path, PurePosixPath
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
 from docutils import nodes
+from docutils.core import publish_parts
 from docutils.parsers.rst import Directive, directives
 from docutils.statemachine import StringList
+from sphinx import addnodes
 from sphinx.util import logging as sphinx_logging
+from sphinx.util.docutils import new_document
 
-from .db_adapter import DatabaseAdapter, WorkflowData, StepData
+from .db_adapter import DatabaseAdapter, WorkflowData, WorkflowSummary, StepData
+from .diagram_generator import (
+    DIAGRAM_MODES,
+    DEFAULT_MAX_NODES,
+    MermaidDiagramBuilder,
+    use_clustered_diagram,
+)
 from .rst_generator import WorkflowRSTGenerator
+from .source_generator import record_source_mapping, step_anchor
 
 logger = sphinx_logging.getLogger(__name__)
 
+# Tiers rendered by a single pass; ``:tier: all`` emits one tab per tier
+TIERS = ('overview', 'detailed', 'full')
+
+# Sidecar JSON payloads for lazy step details, relative to _static/
+LAZY_DETAILS_DIR = 'workflow-details'
+
+# ``.. workflow-db:: target`` (RST) or ```{workflow-db} target (MyST) lines
+_WORKFLOW_DB_TARGET_RE = re.compile(
+    r'^[ \t]*(?:\.\.[ \t]+workflow-db::|[`:]{3,}\{workflow-db\})[ \t]*(\S[^\r\n]*?)[ \t]*$',
+    re.MULTILINE
+)
+
+# How workflow-index-db splits large indexes into subpages
+SHARD_MODES = ('package', 'pages')
+
+# First line of generated index shard pages; only such files are ever removed
+SHARD_PAGE_MARKER = '.. Generated by sphinx_dflow_ext from the workflow database; do not edit.'
+
+# Per-build caches (database adapters, fetched workflows, rendered tiers,
+# index summaries, summaries fetched for shard pages), keyed by id(env).
+# They are kept off the environment: parallel readers pickle the env, and
+# adapters hold database engines.
+_build_caches: Dict[int, Dict[str, Dict]] = {}
+
+
+def _build_cache(env, name: str) -> Dict:
+    """Get one of the per-build caches of an environment."""
+    return _build_caches.setdefault(id(env), {}).setdefault(name, {})
+
+
+def _resolve_db_location(env) -> Tuple[Path, Optional[Path]]:
+    """
+    Resolve project root and database path from the Sphinx environment.
+    
+    Returns:
+        Tuple of (project root, explicit database path or None)
+    """
+    source_dir = Path(env.srcdir).parent  # Go up from docs/ to project root
+    
+    # Check for custom database path in config
+    db_path = None
+    if hasattr(env.config, 'workflow_db_path') and env.config.workflow_db_path:
+        db_path = Path(env.srcdir) / env.config.workflow_db_path
+        if db_path.exists():
+            source_dir = db_path.parent.parent  # Project root is 2 levels up from .workflow/workflow.db
+    
+    return source_dir, db_path
+
+
+def _get_adapter(env, source_dir: Path, db_path: Optional[Path]) -> DatabaseAdapter:
+    """
+    Get the DatabaseAdapter for a database, creating it once per process.
+    
+    Keyed by process id: forked parallel readers inherit the store but
+    open their own engine instead of sharing pooled connections.
+    """
+    adapters = _build_cache(env, 'adapters')
+    key = (os.getpid(), str(db_path or source_dir))
+    if key not in adapters:
+        adapters[key] = DatabaseAdapter(source_dir, db_path=db_path)
+    return adapters[key]
+
+
+def _fetch_workflow(adapter: DatabaseAdapter, target: str) -> Optional[WorkflowData]:
+    """Resolve a directive target to WorkflowData using the adapter."""
+    if ":" in target:
+        # Function target: module:function
+        return adapter.get_function_workflow(target)
+    if target.endswith(".py"):
+        # Module path
+        return adapter.get_module_workflow(target)
+    # Try as function name first, then module name
+    workflow = adapter.get_function_workflow(target)
+    if not workflow:
+        workflow = adapter.get_module_workflow(target)
+    return workflow
+
+
+def get_cached_workflow(
+    env,
+    target: str,
+    source_dir: Path,
+    db_path: Optional[Path] = None
+) -> Optional[WorkflowData]:
+    """
+    Get workflow data for a target, fetching it at most once per build.
+    
+    Misses are cached too, so a missing target is not re-queried by every
+    directive that references it.
+    
+    Args:
+        env: Sphinx build environment
+        target: Directive target (module path, module:function or name)
+        source_dir: Project root
+        db_path: Optional explicit database path
+    
+    Returns:
+        WorkflowData, or None if the target is not in the database
+    """
+    workflows = _build_cache(env, 'workflows')
+    key = (str(db_path or source_dir), target)
+    if key not in workflows:
+        adapter = _get_adapter(env, source_dir, db_path)
+        workflows[key] = _fetch_workflow(adapter, target)
+    return workflows[key]
+
+
+def _close_adapters(caches: Dict[str, Dict]) -> None:
+    """Dispose the database engines of a build's cached adapters."""
+    for adapter in caches.get('adapters', {}).values():
+        adapter.close()
+
+
+def reset_workflow_db_cache(app, env, docnames) -> None:
+    """
+    Start every read phase with empty workflow caches.
+    
+    Connected to 'env-before-read-docs' so database changes between builds
+    are picked up. Adapters of the previous build are closed first, so
+    rebuilds in one process (e.g. sphinx-autobuild) do not leak engines.
+    Summaries fetched for the index shard pages at builder-inited of this
+    build are kept, so workflow-index-db does not query them again.
+    """
+    caches = _build_caches.get(id(env), {})
+    _close_adapters(caches)
+    _build_caches[id(env)] = {'summaries': dict(caches.get('shard_summaries', {}))}
+
+
+def scan_workflow_db_targets(text: str) -> List[str]:
+    """Find ``workflow-db`` directive targets in a document's source text."""
+    if 'workflow-db' not in text:
+        return []
+    return _WORKFLOW_DB_TARGET_RE.findall(text)
+
+
+def prefetch_workflow_db_targets(app, env, docnames) -> None:
+    """
+    Warm the workflow cache with every target referenced by the documents to read.
+    
+    Connected to 'env-before-read-docs' (after ``reset_workflow_db_cache``).
+    The sources are scanned for ``workflow-db`` lines and all targets are
+    resolved in one adapter call, so directives are served from the cache.
+    Parallel readers are forked after this event and inherit the cache;
+    the engine is disposed first, so no pooled connection is inherited.
+    Targets the scan misses (e.g. in included files) are fetched on demand.
+    """
+    targets = []
+    for docname in docnames:
+        try:
+            text = Path(env.doc2path(docname)).read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        targets.extend(scan_workflow_db_targets(text))
+    
+    if not targets:
+        return
+    
+    source_dir, db_path = _resolve_db_location(env)
+    db_key = str(db_path or source_dir)
+    cache = _build_cache(env, 'workflows')
+    targets = [t for t in dict.fromkeys(targets) if (db_key, t) not in cache]
+    if not targets:
+        return
+    
+    adapter = _get_adapter(env, source_dir, db_path)
+    try:
+        workflows = adapter.get_workflows(targets)
+    except FileNotFoundError:
+        # Reported by the directives themselves
+        return
+    except Exception as e:
+        logger.warning(f"Could not prefetch workflow targets, fetching on demand: {e}")
+        return
+    finally:
+        adapter.close()
+    
+    for target, workflow in workflows.items():
+        cache[(db_key, target)] = workflow
+    logger.info(f"Prefetched {len(workflows)} workflow target(s) from database")
+
+
+def drop_workflow_db_cache(app, env) -> List[str]:
+    """
+    Drop workflow caches once reading is done.
+    
+    Connected to 'env-updated' so cached workflows and database engines
+    do not outlive the read phase.
+    """
+    _close_adapters(_build_caches.pop(id(env), {}))
+    return []
+
+
+def get_cached_summaries(
+    env,
+    source_dir: Path,
+    db_path: Optional[Path] = None
+) -> List[WorkflowSummary]:
+    """Get workflow summaries for the index, querying the database once per build."""
+    summaries = _build_cache(env, 'summaries')
+    key = str(db_path or source_dir)
+    if key not in summaries:
+        adapter = _get_adapter(env, source_dir, db_path)
+        summaries[key] = adapter.get_workflow_summaries()
+    return summaries[key]
+
+
+def _package_name(summary: WorkflowSummary) -> str:
+    """Get the dotted package (directory) of a module, e.g. ``src.cli``."""
+    parent = PurePosixPath(summary.module_path.replace('\\', '/')).parent
+    return '.'.join(parent.parts) if parent.parts else '(root)'
+
+
+def shard_workflow_summaries(
+    summaries: List[WorkflowSummary],
+    shard_by: str,
+    page_size: int = 200
+) -> Dict[str, List[WorkflowSummary]]:
+    """
+    Split workflow summaries into index shards.
+    
+    Args:
+        summaries: Summaries of all modules with workflows
+        shard_by: ``package`` (one shard per directory) or ``pages``
+                  (fixed number of modules per shard)
+        page_size: Modules per shard for ``pages``
+    
+    Returns:
+        Ordered dictionary mapping shard key -> summaries in that shard
+    """
+    ordered = sorted(summaries, key=lambda s: (s.module_name, s.module_path))
+    
+    if shard_by == 'package':
+        shards: Dict[str, List[WorkflowSummary]] = {}
+        for summary in ordered:
+            shards.setdefault(_package_name(summary), []).append(summary)
+        return dict(sorted(shards.items()))
+    
+    page_size = max(1, page_size)
+    return {
+        f"page-{index}": ordered[start:start + page_size]
+        for index, start in enumerate(range(0, len(ordered), page_size), 1)
+    }
+
+
+def _shard_docname(shard_dir: str, key: str) -> str:
+    """Get the docname of the generated page for an index shard."""
+    slug = re.sub(r'[^A-Za-z0-9_.]+', '-', key).strip('-') or 'root'
+    return f"{shard_dir.strip('/')}/{slug}"
+
+
+def _shard_label(key: str, summaries: List[WorkflowSummary]) -> str:
+    """Get a human readable label for an index shard (package or module range)."""
+    if key.startswith('page-') and summaries:
+        first, last = summaries[0].module_name, summaries[-1].module_name
+        return f"{first} – {last}" if first != last else first
+    return key
+
+
+def _shard_digest(summaries: List[WorkflowSummary]) -> str:
+    """Digest a shard's modules, functions and step counts."""
+    members = sorted(
+        (s.module_name, s.module_path, [(f.name, f.step_count) for f in s.functions])
+        for s in summaries
+    )
+    return hashlib.sha1(json.dumps(members).encode('utf-8')).hexdigest()
+
+
+def generate_index_shard_pages(app) -> None:
+    """
+    Write one source page per workflow-index-db shard.
+    
+    Connected to 'builder-inited' so the pages exist before Sphinx looks
+    for source files. Pages are only rewritten when their content changes,
+    and a digest of the shard's members is part of the content, so a shard
+    is re-read exactly when its modules, functions or step counts change
+    (including renames that keep the counts). Stale generated pages are
+    removed.
+    """
+    shard_by = app.config.workflow_index_shard_by
+    if not shard_by:
+        return
+    if shard_by not in SHARD_MODES:
+        logger.warning(
+            f"workflow_index_shard_by must be one of {SHARD_MODES}, got {shard_by!r}"
+        )
+        return
+    
+    source_dir, db_path = _resolve_db_location(app.env)
+    try:
+        summaries = get_cached_summaries(app.env, source_dir, db_path)
+    except FileNotFoundError as e:
+        logger.warning(str(e))
+        return
+    finally:
+        _close_adapters(_build_caches.get(id(app.env), {}))
+    # Handed over to this build's read phase (see reset_workflow_db_cache)
+    _build_cache(app.env, 'shard_summaries')[str(db_path or source_dir)] = summaries
+    
+    shards = shard_workflow_summaries(summaries, shard_by, app.config.workflow_index_page_size)
+    shard_dir = app.config.workflow_index_shard_dir
+    output_dir = Path(app.srcdir) / shard_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    expected = set()
+    written = 0
+    for key, shard in shards.items():
+        title = f"Workflows: {_shard_label(key, shard)}"
+        content = '\n'.join([
+            SHARD_PAGE_MARKER,
+            f".. modules: {len(shard)}, functions: {sum(len(s.functions) for s in shard)}, "
+            f"steps: {sum(s.step_count for s in shard)}",
+            f".. members: {_shard_digest(shard)}",
+            "",
+            title,
+            "=" * len(title),
+            "",
+            ".. workflow-index-db::",
+            f"   :shard: {key}",
+            "",
+        ])
+        output_path = Path(app.srcdir) / f"{_shard_docname(shard_dir, key)}.rst"
+        expected.add(output_path)
+        if output_path.exists() and output_path.read_text(encoding='utf-8') == content:
+            continue
+        output_path.write_text(content, encoding='utf-8')
+        written += 1
+    
+    for stale in output_dir.glob('*.rst'):
+        if stale in expected:
+            continue
+        with open(stale, encoding='utf-8') as f:
+            if f.readline().rstrip('\n') == SHARD_PAGE_MARKER:
+                stale.unlink()
+    
+    logger.info(f"Workflow index: {len(shards)} shard page(s), {written} updated")
+
+
+def _lazy_payload_name(render_key: tuple, tier: str) -> str:
+    """Get the sidecar file name (relative to _static/) for a render and tier."""
+    target = render_key[1]
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', target).strip('-').lower()[:60] or 'workflow'
+    digest = hashlib.sha1(repr(render_key).encode('utf-8')).hexdigest()[:10]
+    return f"{LAZY_DETAILS_DIR}/{slug}-{tier}-{digest}.json"
+
+
+def _writer_settings(builder) -> Any:
+    """Get (and cache per build) docutils settings for Sphinx's HTML writer."""
+    from sphinx.writers.html import HTMLWriter
+    
+    cache = _build_cache(builder.env, 'writer_settings')
+    if 'html' not in cache:
+        try:
+            from docutils.frontend import get_default_settings
+        except ImportError:  # docutils < 0.19
+            from docutils.frontend import OptionParser
+            settings = OptionParser(components=(HTMLWriter,)).get_default_values()
+        else:
+            settings = get_default_settings(HTMLWriter)
+        for key, value in builder.env.settings.items():
+            setattr(settings, key, value)
+        settings.compact_lists = bool(builder.config.html_compact_lists)
+        cache['html'] = settings
+    return cache['html']
+
+
+def purge_lazy_payloads(app, env, docname) -> None:
+    """Forget the lazy step payloads of a removed or re-read document ('env-purge-doc')."""
+    if hasattr(env, 'workflow_lazy_payloads'):
+        env.workflow_lazy_payloads.pop(docname, None)
+
+
+def merge_lazy_payloads(app, env, docnames, other) -> None:
+    """Merge lazy step payloads collected by parallel readers ('env-merge-info')."""
+    if not hasattr(other, 'workflow_lazy_payloads'):
+        return
+    if not hasattr(env, 'workflow_lazy_payloads'):
+        env.workflow_lazy_payloads = {}
+    for docname in docnames:
+        if docname in other.workflow_lazy_payloads:
+            env.workflow_lazy_payloads[docname] = other.workflow_lazy_payloads[docname]
+
+
+def write_lazy_payloads(app, exception) -> None:
+    """
+    Write lazy step detail payloads as JSON sidecars under _static/.
+    
+    Connected to 'build-finished'. Payloads are stored per document, so
+    those of removed or edited documents are gone by now. Files are only
+    rewritten when their content changed, and sidecars no document
+    references any more are removed.
+    """
+    if exception:
+        return
+    
+    payloads: Dict[str, Dict[str, Any]] = {}
+    for doc_payloads in getattr(app.env, 'workflow_lazy_payloads', {}).values():
+        payloads.update(doc_payloads)
+    
+    static_dir = Path(app.outdir) / '_static'
+    details_dir = static_dir / LAZY_DETAILS_DIR
+    if details_dir.is_dir():
+        for orphan in details_dir.glob('*.json'):
+            if f"{LAZY_DETAILS_DIR}/{orphan.name}" not in payloads:
+                orphan.unlink()
+    if not payloads:
+        return
+    
+    written = 0
+    for name, payload in payloads.items():
+        output_path = static_dir / name
+        content = json.dumps(payload, separators=(',', ':'), sort_keys=True)
+        if output_path.exists() and output_path.read_text(encoding='utf-8') == content:
+            continue
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(content, encoding='utf-8')
+        written += 1
+    
+    logger.info(f"Lazy step details: wrote {written}/{len(payloads)} payload file(s)")
+
 
 class WorkflowDBDirective(Directive):
     """
@@ -45,11 +479,20 @@ class WorkflowDBDirective(Directive):
         - "cmd_scan" - Function name (searches all modules)
     
     Options:
-        tier: Display tier (overview, detailed, full) - default: detailed
+        tier: Display tier (overview, detailed, full, all) - default: detailed.
+              ``all`` renders every tier as tabs from a single render pass.
         show-diagram: Show Mermaid flowchart - default: true
         collapse-substeps: Collapse sub-steps by default - default: true
         no-collapse-substeps: Show sub-steps expanded (no dropdown)
         show-source-links: Link steps to source code - default: true
+        diagram-mode: flat, clustered or auto - default: workflow_config
+                      ``diagram_mode`` (auto). Clustered diagrams cap the
+                      node count and drill down into per-step sub-diagrams.
+        diagram-max-nodes: Node budget for clustered diagrams - default: 50
+        lazy-details: Ship only function headers and top-level step titles;
+                      step bodies and sub-step trees load from a JSON
+                      sidecar under _static/ when their dropdown is opened.
+                      Default: workflow_config ``lazy_step_details`` (false)
     """
     
     required_arguments = 1  # Target (module path or function)
@@ -62,6 +505,9 @@ class WorkflowDBDirective(Directive):
         'collapse-substeps': directives.flag,
         'no-collapse-substeps': directives.flag,
         'show-source-links': directives.flag,
+        'diagram-mode': lambda arg: directives.choice(arg, DIAGRAM_MODES),
+        'diagram-max-nodes': directives.positive_int,
+        'lazy-details': directives.flag,
     }
     has_content = False
     
@@ -71,14 +517,7 @@ class WorkflowDBDirective(Directive):
         
         # Get Sphinx environment
         env = self.state.document.settings.env
-        source_dir = Path(env.srcdir).parent  # Go up from docs/ to project root
-        
-        # Check for custom database path in config
-        db_path = None
-        if hasattr(env.config, 'workflow_db_path') and env.config.workflow_db_path:
-            db_path = Path(env.srcdir) / env.config.workflow_db_path
-            if db_path.exists():
-                source_dir = db_path.parent.parent  # Project root is 2 levels up from .workflow/workflow.db
+        source_dir, db_path = _resolve_db_location(env)
         
         # Get options
         tier = self.options.get('tier', 'detailed')
@@ -86,22 +525,21 @@ class WorkflowDBDirective(Directive):
         collapse_substeps = 'no-collapse-substeps' not in self.options  # Default True (use dropdown)
         show_source_links = 'show-source-links' not in self.options  # Default True
         
+        workflow_config = getattr(env.config, 'workflow_config', None) or {}
+        diagram_mode = self.options.get(
+            'diagram-mode', workflow_config.get('diagram_mode', 'auto')
+        )
+        diagram_max_nodes = self.options.get(
+            'diagram-max-nodes', workflow_config.get('diagram_max_nodes', DEFAULT_MAX_NODES)
+        )
+        lazy_details = (
+            'lazy-details' in self.options
+            or bool(workflow_config.get('lazy_step_details', False))
+        )
+        
         try:
-            # Initialize database adapter
-            adapter = DatabaseAdapter(source_dir, db_path=db_path)
-            
-            # Determine if target is a module or function
-            if ":" in target:
-                # Function target: module:function
-                workflow = adapter.get_function_workflow(target)
-            elif target.endswith(".py"):
-                # Module path
-                workflow = adapter.get_module_workflow(target)
-            else:
-                # Try as function name first, then module name
-                workflow = adapter.get_function_workflow(target)
-                if not workflow:
-                    workflow = adapter.get_module_workflow(target)
+            # Fetched once per build and shared by every directive on the target
+            workflow = get_cached_workflow(env, target, source_dir, db_path)
             
             if not workflow:
                 logger.error(f"Workflow not found in database: {target}")
@@ -117,10 +555,34 @@ class WorkflowDBDirective(Directive):
             if show_source_links:
                 self._store_source_mappings(env, workflow, source_dir)
             
-            # Generate RST content
-            rst_lines = self._generate_rst(
-                workflow, tier, show_diagram, collapse_substeps, show_source_links
+            # Render every tier in one pass and reuse it for later directives
+            render_key = (
+                str(db_path or source_dir), target,
+                show_diagram, collapse_substeps, show_source_links,
+                diagram_mode, diagram_max_nodes, lazy_details
             )
+            if tier == 'all':
+                lazy_sources = lazy_payloads = None
+                if lazy_details:
+                    lazy_sources = {t: _lazy_payload_name(render_key, t) for t in TIERS}
+                    lazy_payloads = {}
+                rst_lines = self._generate_tabbed_rst(
+                    workflow, show_diagram, collapse_substeps, show_source_links,
+                    diagram_mode=diagram_mode, diagram_max_nodes=diagram_max_nodes,
+                    lazy_sources=lazy_sources, lazy_payloads=lazy_payloads
+                )
+                if lazy_details:
+                    self._store_lazy_payloads(
+                        env, self._lazy_payload_entries(target, lazy_sources, lazy_payloads)
+                    )
+            else:
+                rendered = self._get_rendered_tiers(
+                    env, render_key, workflow, tier,
+                    show_diagram, collapse_substeps, show_source_links,
+                    diagram_mode=diagram_mode, diagram_max_nodes=diagram_max_nodes,
+                    lazy_details=lazy_details
+                )
+                rst_lines = rendered[tier]
             
             # Parse RST into nodes
             node = nodes.container()
@@ -160,9 +622,6 @@ class WorkflowDBDirective(Directive):
         This enables the source_generator.py to create the 2-column workflow
         browser pages at build-finished time.
         """
-        if not hasattr(env, 'workflow_source_mappings'):
-            env.workflow_source_mappings = {}
-        
         # Build module name from workflow
         module_name = workflow.module_name
         source_path = str(source_dir / workflow.module_path) if workflow.module_path else ''
@@ -174,14 +633,7 @@ class WorkflowDBDirective(Directive):
                 self._collect_step_data(step, func.name, module_name, step_data)
         
         # Store or merge with existing
-        if module_name in env.workflow_source_mappings:
-            existing = env.workflow_source_mappings[module_name]
-            existing['steps'].update(step_data)
-        else:
-            env.workflow_source_mappings[module_name] = {
-                'source_path': source_path,
-                'steps': step_data
-            }
+        record_source_mapping(env, module_name, source_path, step_data)
     
     def _collect_step_data(
         self, 
@@ -190,8 +642,8 @@ class WorkflowDBDirective(Directive):
         module_name: str, 
         step_data: dict
     ):
-        """Recursively collect step data for source mapping."""
-        step_id = f"step-{step.number.replace('.', '-')}"
+        """Recursively collect step data for source mapping, keyed per function."""
+        step_id = f"{func_name}:step-{step.number.replace('.', '-')}"
         step_data[step_id] = {
             'line': step.line,
             'name': step.name,
@@ -203,6 +655,77 @@ class WorkflowDBDirective(Directive):
         for sub in step.sub_steps:
             self._collect_step_data(sub, func_name, module_name, step_data)
     
+    def _lazy_payload_entries(
+        self,
+        target: str,
+        lazy_sources: Dict[str, str],
+        lazy_payloads: Dict[str, Dict[str, str]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Build the sidecar name -> payload mapping of a render."""
+        return {
+            name: {
+                'target': target,
+                'tier': tier,
+                'steps': lazy_payloads.get(tier, {}),
+            }
+            for tier, name in lazy_sources.items()
+        }
+    
+    def _store_lazy_payloads(self, env, entries: Dict[str, Dict[str, Any]]):
+        """
+        Store step detail payloads of the current document for build-finished.
+        
+        Stored per docname, so they are purged with the document.
+        """
+        if not hasattr(env, 'workflow_lazy_payloads'):
+            env.workflow_lazy_payloads = {}
+        env.workflow_lazy_payloads.setdefault(env.docname, {}).update(entries)
+    
+    def _get_rendered_tiers(
+        self,
+        env,
+        render_key: tuple,
+        workflow: WorkflowData,
+        tier: str,
+        show_diagram: bool,
+        collapse_substeps: bool,
+        show_source_links: bool,
+        diagram_mode: str = 'flat',
+        diagram_max_nodes: int = DEFAULT_MAX_NODES,
+        lazy_details: bool = False
+    ) -> Dict[str, List[str]]:
+        """
+        Get RST for every tier of a workflow, rendering it at most once per build.
+        
+        Returns:
+            Dictionary mapping tier -> RST lines (always contains ``tier``)
+        """
+        render_cache = _build_cache(env, 'renders')
+        lazy_cache = _build_cache(env, 'lazy_payloads')
+        rendered = render_cache.get(render_key, {})
+        if tier not in rendered:
+            tiers = TIERS if tier in TIERS else (tier,)
+            lazy_sources = lazy_payloads = None
+            if lazy_details:
+                lazy_sources = {t: _lazy_payload_name(render_key, t) for t in tiers}
+                lazy_payloads = {}
+            rendered = {**rendered, **self._render_tiers(
+                workflow, tiers, show_diagram, collapse_substeps, show_source_links,
+                diagram_mode=diagram_mode, diagram_max_nodes=diagram_max_nodes,
+                lazy_sources=lazy_sources, lazy_payloads=lazy_payloads
+            )}
+            render_cache[render_key] = rendered
+            if lazy_details:
+                lazy_cache[render_key] = {
+                    **lazy_cache.get(render_key, {}),
+                    **self._lazy_payload_entries(render_key[1], lazy_sources, lazy_payloads),
+                }
+        
+        # Every document using the render references its sidecars
+        if lazy_details:
+            self._store_lazy_payloads(env, lazy_cache.get(render_key, {}))
+        return rendered
+    
     def _generate_rst(
         self,
         workflow: WorkflowData,
@@ -224,42 +747,308 @@ class WorkflowDBDirective(Directive):
         Returns:
             List of RST lines
         """
+        return self._render_tiers(
+            workflow, (tier,), show_diagram, collapse_substeps, show_source_links
+        )[tier]
+    
+    def _generate_tabbed_rst(
+        self,
+        workflow: WorkflowData,
+        show_diagram: bool,
+        collapse_substeps: bool,
+        show_source_links: bool = True,
+        diagram_mode: str = 'flat',
+        diagram_max_nodes: int = DEFAULT_MAX_NODES,
+        lazy_sources: Optional[Dict[str, str]] = None,
+        lazy_payloads: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> List[str]:
+        """
+        Generate a tab-set with one tab per tier from a single render pass.
+        
+        Diagrams are the same in every tier, so they are emitted once above
+        the tab-set; their drill-down ids would otherwise repeat per tab.
+        Step anchors are only emitted in the first tab so labels stay unique.
+        """
+        rendered = self._render_tiers(
+            workflow, TIERS, False, collapse_substeps, show_source_links,
+            anchor_tiers=TIERS[:1],
+            lazy_sources=lazy_sources, lazy_payloads=lazy_payloads
+        )
+        
         lines = []
+        if show_diagram:
+            for func in workflow.functions:
+                if not func.steps:
+                    continue
+                lines.append(f"**{func.name}**")
+                lines.append("")
+                lines.extend(self._generate_diagram(
+                    func.steps, diagram_mode, diagram_max_nodes,
+                    diagram_id=f"{workflow.module_name}-{func.name}"
+                ))
+                lines.append("")
+        
+        lines += [
+            ".. tab-set::",
+            "   :class: workflow-tier-tabs",
+            "",
+        ]
+        for tier in TIERS:
+            lines.append(f"   .. tab-item:: {tier.capitalize()}")
+            lines.append(f"      :sync: {tier}")
+            lines.append("")
+            for line in rendered[tier]:
+                lines.append(f"      {line}" if line else "")
+            lines.append("")
+        
+        return lines
+    
+    def _render_tiers(
+        self,
+        workflow: WorkflowData,
+        tiers: Sequence[str],
+        show_diagram: bool,
+        collapse_substeps: bool,
+        show_source_links: bool = True,
+        anchor_tiers: Optional[Sequence[str]] = None,
+        diagram_mode: str = 'flat',
+        diagram_max_nodes: int = DEFAULT_MAX_NODES,
+        lazy_sources: Optional[Dict[str, str]] = None,
+        lazy_payloads: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Generate RST content for several tiers in one walk of the step tree.
+        
+        Tiers only differ in which fields they show, so shared lines (titles,
+        diagrams, warnings) are built once and appended to every tier.
+        
+        Args:
+            workflow: WorkflowData from database
+            tiers: Tiers to render
+            show_diagram: Whether to show Mermaid diagram
+            collapse_substeps: Whether to collapse sub-steps
+            show_source_links: Whether to add [source] links
+            anchor_tiers: Tiers that get step anchors (default: all of them)
+            diagram_mode: Diagram mode (flat, clustered, auto)
+            diagram_max_nodes: Node budget for clustered diagrams
+            lazy_sources: Tier -> sidecar name; when given, only a skeleton is
+                          emitted and step bodies go into ``lazy_payloads``
+            lazy_payloads: Filled with tier -> {"function/step": html}
+        
+        Returns:
+            Dictionary mapping tier -> list of RST lines
+        """
+        out: Dict[str, List[str]] = {tier: [] for tier in tiers}
+        detailed_tiers = [t for t in tiers if t in ('detailed', 'full')]
         module_name = workflow.module_name
         
+        def emit(line: str, only: Sequence[str] = tiers):
+            for t in only:
+                out[t].append(line)
+        
         # For each function with steps
         for func in workflow.functions:
             if not func.steps:
                 continue
             
             # Function header
-            lines.append(f"**{func.name}**")
-            lines.append("")
+            emit(f"**{func.name}**")
+            emit("")
             
-            if tier in ('detailed', 'full') and func.docstring:
+            if detailed_tiers and func.docstring:
                 # Add first line of docstring
                 first_line = func.docstring.split('\n')[0].strip()
                 if first_line:
-                    lines.append(f"*{first_line}*")
-                    lines.append("")
+                    emit(f"*{first_line}*", detailed_tiers)
+                    emit("", detailed_tiers)
             
             # Mermaid diagram
             if show_diagram:
-                lines.extend(self._generate_diagram(func.steps))
-                lines.append("")
+                diagram = self._generate_diagram(
+                    func.steps, diagram_mode, diagram_max_nodes,
+                    diagram_id=f"{module_name}-{func.name}"
+                )
+                for line in diagram:
+                    emit(line)
+                emit("")
             
             # Steps
-            lines.extend(self._generate_steps_rst(
-                func.steps, tier, collapse_substeps, 
+            steps_rst = self._generate_steps_rst_tiers(
+                func.steps, tiers, collapse_substeps,
                 show_source_links=show_source_links,
-                module_name=module_name
-            ))
-            lines.append("")
+                module_name=module_name,
+                anchor_tiers=anchor_tiers,
+                lazy_sources=lazy_sources,
+                lazy_payloads=lazy_payloads,
+                func_name=func.name
+            )
+            for t in tiers:
+                out[t].extend(steps_rst[t])
+            emit("")
+        
+        return out
+    
+    def _emit_lazy_details(
+        self,
+        step: StepData,
+        tiers: Sequence[str],
+        out: Dict[str, List[str]],
+        lazy_sources: Dict[str, str],
+        lazy_payloads: Dict[str, Dict[str, str]],
+        key: str,
+        module_name: str,
+        show_source_links: bool,
+        func_name: str = ""
+    ):
+        """Emit a lazy-loading dropdown per tier and record the step body payload."""
+        bodies = self._render_step_body_html(
+            step, tiers, module_name, show_source_links, func_name=func_name
+        )
         
+        title = "Details"
+        if step.sub_steps:
+            title += f" and sub-steps ({len(step.sub_steps)})"
+        
+        for t in tiers:
+            if not bodies[t]:
+                continue
+            lazy_payloads.setdefault(t, {})[key] = bodies[t]
+            out[t].extend([
+                f"   .. dropdown:: {title}",
+                "      :class-container: workflow-lazy-dropdown",
+                "",
+                "      .. raw:: html",
+                "",
+                f'         <div class="workflow-lazy-details" '
+                f'data-src="{html.escape(lazy_sources[t])}" data-key="{html.escape(key)}">'
+                f'<em>Loading…</em></div>',
+                "",
+            ])
+    
+    @staticmethod
+    def _step_body_rst(step: StepData, tier: str) -> List[str]:
+        """
+        Get the RST of a step's body fields for one tier, unindented.
+        
+        Purpose shows in the detailed and full tiers, inputs/outputs (as a
+        field list) in full only, and critical warnings in every tier.
+        Shared by the page output and the lazy detail payloads.
+        """
+        lines = []
+        if tier in ('detailed', 'full') and step.purpose:
+            lines.extend([f"**Purpose:** {step.purpose}", ""])
+        if tier == 'full' and (step.inputs or step.outputs):
+            if step.inputs:
+                lines.append(f":Inputs: {step.inputs}")
+            if step.outputs:
+                lines.append(f":Outputs: {step.outputs}")
+            lines.append("")
+        if step.critical:
+            lines.extend([".. warning::", "", f"   {step.critical}", ""])
         return lines
     
-    def _generate_diagram(self, steps: List[StepData]) -> List[str]:
-        """Generate Mermaid flowchart for steps."""
+    def _rst_fragment_html(self, rst: str) -> str:
+        """
+        Render an RST fragment to HTML the way the page body renders it.
+        
+        During a build the fragment is parsed in the directive's state (so
+        roles work as on the page) and written with the builder's HTML
+        translator. Cross-references cannot be resolved while reading, so
+        they keep their text. Without a state or an HTML builder, the
+        docutils HTML writer is used.
+        """
+        state = getattr(self, 'state', None)
+        env = state.document.settings.env if state else None
+        builder = getattr(getattr(env, 'app', None), 'builder', None)
+        if getattr(builder, 'format', None) != 'html':
+            return publish_parts(
+                rst, writer_name='html5', settings_overrides={'report_level': 5}
+            )['fragment']
+        
+        container = nodes.container()
+        state.nested_parse(StringList(rst.splitlines()), self.content_offset, container)
+        for xref in list(container.traverse(addnodes.pending_xref)):
+            xref.replace_self(xref.children)
+        
+        # Reader settings lack the writer's options; the builder only makes
+        # its own when writing starts
+        settings = _writer_settings(builder)
+        document = new_document('', settings)
+        translator = builder.create_translator(document, builder)
+        for child in container.children:
+            child.walkabout(translator)
+        return ''.join(translator.body)
+    
+    def _render_step_body_html(
+        self,
+        step: StepData,
+        tiers: Sequence[str],
+        module_name: str,
+        show_source_links: bool,
+        depth: int = 0,
+        func_name: str = ""
+    ) -> Dict[str, str]:
+        """
+        Render a step's body and sub-step tree as HTML for each tier.
+        
+        Mirrors the RST produced by ``_generate_steps_rst_tiers``. Source links
+        use ``data-root-href`` so workflow.js can resolve them against the
+        page's root, which keeps payloads independent of page depth.
+        
+        Returns:
+            Dictionary mapping tier -> HTML string (empty if nothing to show)
+        """
+        parts: Dict[str, List[str]] = {tier: [] for tier in tiers}
+        
+        def emit(fragment: str, only: Sequence[str] = tiers):
+            for t in only:
+                parts[t].append(fragment)
+        
+        # Body fields go through the same RST and HTML writer as the page
+        rendered: Dict[Tuple[str, ...], str] = {}
+        for t in tiers:
+            rst = tuple(self._step_body_rst(step, t))
+            if rst and rst not in rendered:
+                rendered[rst] = self._rst_fragment_html('\n'.join(rst))
+            if rst:
+                parts[t].append(rendered[rst])
+        
+        for sub in step.sub_steps:
+            sub_depth = depth + 1
+            title = html.escape(f"Step {sub.number}: {sub.name}")
+            if show_source_links and module_name and sub.line:
+                href = f"_modules/{module_name.replace('.', '/')}.html#{step_anchor(sub.number, func_name)}"
+                title += (
+                    f' <a class="reference external source-link viewcode-link" '
+                    f'data-root-href="{html.escape(href)}">[source]</a>'
+                )
+            sub_bodies = self._render_step_body_html(
+                sub, tiers, module_name, show_source_links, sub_depth, func_name
+            )
+            for t in tiers:
+                parts[t].append(
+                    f'<div class="workflow-step workflow-step-depth-{sub_depth} docutils container">'
+                    f'<p class="rubric workflow-step-title">{title}</p>{sub_bodies[t]}</div>'
+                )
+        
+        return {t: ''.join(parts[t]) for t in tiers}
+    
+    def _generate_diagram(
+        self,
+        steps: List[StepData],
+        mode: str = 'flat',
+        max_nodes: int = DEFAULT_MAX_NODES,
+        diagram_id: str = ''
+    ) -> List[str]:
+        """
+        Generate Mermaid flowchart for steps.
+        
+        Large workflows (or ``mode='clustered'``) get a node-capped diagram
+        with sub-steps clustered into subgraphs and drill-down sub-diagrams.
+        """
+        if use_clustered_diagram(steps, mode, max_nodes):
+            return MermaidDiagramBuilder(max_nodes).build_rst(steps, diagram_id)
+        
         lines = [
             ".. mermaid::",
             "",
@@ -299,8 +1088,33 @@ class WorkflowDBDirective(Directive):
         module_name: str = ""
     ) -> List[str]:
         """Generate RST for a list of steps with proper styling."""
-        lines = []
+        return self._generate_steps_rst_tiers(
+            steps, (tier,), collapse_substeps, indent,
+            show_source_links=show_source_links, module_name=module_name
+        )[tier]
+    
+    def _generate_steps_rst_tiers(
+        self,
+        steps: List[StepData],
+        tiers: Sequence[str],
+        collapse_substeps: bool,
+        indent: int = 0,
+        show_source_links: bool = True,
+        module_name: str = "",
+        anchor_tiers: Optional[Sequence[str]] = None,
+        lazy_sources: Optional[Dict[str, str]] = None,
+        lazy_payloads: Optional[Dict[str, Dict[str, str]]] = None,
+        func_name: str = ""
+    ) -> Dict[str, List[str]]:
+        """Generate RST for a list of steps for several tiers at once."""
+        out: Dict[str, List[str]] = {tier: [] for tier in tiers}
         base_indent = "   " * indent
+        if anchor_tiers is None:
+            anchor_tiers = tiers
+        
+        def emit(line: str, only: Sequence[str] = tiers):
+            for t in only:
+                out[t].append(line)
         
         for step in steps:
             step_number = step.number
@@ -308,70 +1122,60 @@ class WorkflowDBDirective(Directive):
             
             # Add anchor for top-level steps
             if indent == 0:
-                lines.append(f".. _step-{step_number}:")
-                lines.append("")
+                emit(f".. _step-{step_number}:", anchor_tiers)
+                emit("", anchor_tiers)
             
             # Use container for box styling
-            lines.append(f"{base_indent}.. container:: workflow-step workflow-step-depth-{indent}")
-            lines.append(f"{base_indent}")
+            emit(f"{base_indent}.. container:: workflow-step workflow-step-depth-{indent}")
+            emit(f"{base_indent}")
             
             # Build step title with optional source link
             if show_source_links and module_name and step.line:
-                step_anchor = f"step-{step_number.replace('.', '-')}"
-                source_link = f":source-link:`{module_name}#{step_anchor}`"
-                lines.append(f"{base_indent}   .. rubric:: {step_title} {source_link}")
+                source_link = f":source-link:`{module_name}#{step_anchor(step_number, func_name)}`"
+                emit(f"{base_indent}   .. rubric:: {step_title} {source_link}")
             else:
-                lines.append(f"{base_indent}   .. rubric:: {step_title}")
-            lines.append(f"{base_indent}      :class: workflow-step-title")
-            lines.append(f"{base_indent}")
+                emit(f"{base_indent}   .. rubric:: {step_title}")
+            emit(f"{base_indent}      :class: workflow-step-title")
+            emit(f"{base_indent}")
             
-            # Purpose
-            if tier in ('detailed', 'full') and step.purpose:
-                lines.append(f"{base_indent}   **Purpose:** {step.purpose}")
-                lines.append(f"{base_indent}")
-            
-            # Inputs/Outputs as field list (full tier only)
-            if tier == 'full':
-                if step.inputs:
-                    lines.append(f"{base_indent}   :Inputs: {step.inputs}")
-                if step.outputs:
-                    lines.append(f"{base_indent}   :Outputs: {step.outputs}")
-                if step.inputs or step.outputs:
-                    lines.append(f"{base_indent}")
+            # Lazy mode: step body and sub-steps load from the sidecar payload
+            if lazy_sources is not None and indent == 0:
+                self._emit_lazy_details(
+                    step, tiers, out, lazy_sources, lazy_payloads,
+                    f"{func_name}/{step_number}", module_name, show_source_links, func_name
+                )
+                emit("")
+                continue
             
-            # Critical warnings
-            if step.critical:
-                lines.append(f"{base_indent}   .. warning::")
-                lines.append(f"{base_indent}")
-                lines.append(f"{base_indent}      {step.critical}")
-                lines.append(f"{base_indent}")
+            # Purpose, inputs/outputs and critical warnings
+            for t in tiers:
+                out[t].extend(
+                    f"{base_indent}   {line}" if line else base_indent
+                    for line in self._step_body_rst(step, t)
+                )
             
             # Sub-steps with dropdown
             if step.sub_steps:
+                substep_rst = self._generate_steps_rst_tiers(
+                    step.sub_steps, tiers, collapse_substeps, indent + 1,
+                    show_source_links=show_source_links, module_name=module_name,
+                    func_name=func_name
+                )
                 if collapse_substeps:
                     # Collapsible section using sphinx-design dropdown
-                    lines.append(f"{base_indent}   .. dropdown:: Sub-steps ({len(step.sub_steps)})")
-                    lines.append(f"{base_indent}      :animate: fade-in")
-                    lines.append(f"{base_indent}")
-                    
-                    substep_lines = self._generate_steps_rst(
-                        step.sub_steps, tier, collapse_substeps, indent + 1,
-                        show_source_links=show_source_links, module_name=module_name
-                    )
-                    for line in substep_lines:
-                        lines.append(f"{base_indent}      {line}")
+                    emit(f"{base_indent}   .. dropdown:: Sub-steps ({len(step.sub_steps)})")
+                    emit(f"{base_indent}      :animate: fade-in")
+                    emit(f"{base_indent}")
+                    prefix = f"{base_indent}      "
                 else:
                     # Always expanded
-                    substep_lines = self._generate_steps_rst(
-                        step.sub_steps, tier, collapse_substeps, indent + 1,
-                        show_source_links=show_source_links, module_name=module_name
-                    )
-                    for line in substep_lines:
-                        lines.append(f"{base_indent}   {line}")
+                    prefix = f"{base_indent}   "
+                for t in tiers:
+                    out[t].extend(f"{prefix}{line}" for line in substep_rst[t])
             
-            lines.append("")
+            emit("")
         
-        return lines
+        return out
 
 
 class WorkflowIndexDBDirective(Directive):
@@ -386,6 +1190,11 @@ class WorkflowIndexDBDirective(Directive):
     Options:
         group-by: How to group workflows (module, package, none) - default: module
         show-step-counts: Show number of steps per function - default: true
+        shard: Render a single index shard (used by generated shard pages)
+    
+    When ``workflow_index_shard_by`` is set, the directive renders a summary
+    table with counts per shard and a toctree to the generated shard pages
+    instead of listing every function on one page.
     """
     
     required_arguments = 0
@@ -394,6 +1203,7 @@ class WorkflowIndexDBDirective(Directive):
         'group-by': directives.unchanged,
         'show-step-counts': directives.flag,
         'hide-step-counts': directives.flag,
+        'shard': directives.unchanged_required,
     }
     has_content = False
     
@@ -401,17 +1211,18 @@ class WorkflowIndexDBDirective(Directive):
         """Execute the directive."""
         # Get Sphinx environment
         env = self.state.document.settings.env
-        source_dir = Path(env.srcdir).parent
+        source_dir, db_path = _resolve_db_location(env)
         
         # Get options
         group_by = self.options.get('group-by', 'module')
         show_step_counts = 'hide-step-counts' not in self.options
+        shard = self.options.get('shard')
+        shard_by = getattr(env.config, 'workflow_index_shard_by', None)
         
         try:
-            adapter = DatabaseAdapter(source_dir)
-            workflows = adapter.get_all_workflows()
+            summaries = get_cached_summaries(env, source_dir, db_path)
             
-            if not workflows:
+            if not summaries:
                 lines = [
                     ".. note::",
                     "",
@@ -419,8 +1230,18 @@ class WorkflowIndexDBDirective(Directive):
                     "   Run ``workflow-steps scan`` to populate the database.",
                     ""
                 ]
+            elif shard or shard_by in SHARD_MODES:
+                shards = shard_workflow_summaries(
+                    summaries, shard_by or 'package', env.config.workflow_index_page_size
+                )
+                if shard:
+                    lines = self._generate_index(shards.get(shard, []), group_by, show_step_counts)
+                else:
+                    lines = self._generate_shard_summary(
+                        shards, shard_by, env.config.workflow_index_shard_dir
+                    )
             else:
-                lines = self._generate_index(workflows, group_by, show_step_counts)
+                lines = self._generate_index(summaries, group_by, show_step_counts)
             
             # Parse RST into nodes
             node = nodes.container()
@@ -453,7 +1274,7 @@ class WorkflowIndexDBDirective(Directive):
     
     def _generate_index(
         self,
-        workflows: List[WorkflowData],
+        workflows: List[WorkflowSummary],
         group_by: str,
         show_step_counts: bool
     ) -> List[str]:
@@ -466,28 +1287,63 @@ class WorkflowIndexDBDirective(Directive):
                 lines.append("")
                 
                 for func in workflow.functions:
-                    if func.steps:
-                        step_count = self._count_all_steps(func.steps)
-                        if show_step_counts:
-                            lines.append(f"- ``{func.name}`` - {step_count} steps")
-                        else:
-                            lines.append(f"- ``{func.name}``")
+                    if show_step_counts:
+                        lines.append(f"- ``{func.name}`` - {func.step_count} steps")
+                    else:
+                        lines.append(f"- ``{func.name}``")
                 
                 lines.append("")
         else:
             # Flat list
-            for workflow in sorted(workflows, key=lambda w: w.name):
+            for workflow in sorted(workflows, key=lambda w: w.module_name):
                 for func in workflow.functions:
-                    if func.steps:
-                        step_count = self._count_all_steps(func.steps)
-                        if show_step_counts:
-                            lines.append(f"- ``{workflow.module_name}.{func.name}`` - {step_count} steps")
-                        else:
-                            lines.append(f"- ``{workflow.module_name}.{func.name}``")
+                    if show_step_counts:
+                        lines.append(f"- ``{workflow.module_name}.{func.name}`` - {func.step_count} steps")
+                    else:
+                        lines.append(f"- ``{workflow.module_name}.{func.name}``")
             lines.append("")
         
         return lines
     
+    def _generate_shard_summary(
+        self,
+        shards: Dict[str, List[WorkflowSummary]],
+        shard_by: str,
+        shard_dir: str
+    ) -> List[str]:
+        """Generate a summary table with counts per shard and a toctree to shard pages."""
+        heading = "Package" if shard_by == 'package' else "Modules"
+        lines = [
+            ".. list-table::",
+            "   :header-rows: 1",
+            "   :class: workflow-index-summary",
+            "",
+            f"   * - {heading}",
+            "     - Modules",
+            "     - Functions",
+            "     - Steps",
+        ]
+        
+        totals = [0, 0, 0]
+        for key, shard in shards.items():
+            counts = [
+                len(shard),
+                sum(len(s.functions) for s in shard),
+                sum(s.step_count for s in shard),
+            ]
+            totals = [t + c for t, c in zip(totals, counts)]
+            label = _shard_label(key, shard)
+            lines.append(f"   * - :doc:`{label} </{_shard_docname(shard_dir, key)}>`")
+            lines.extend(f"     - {count}" for count in counts)
+        
+        lines.append("   * - **Total**")
+        lines.extend(f"     - **{count}**" for count in totals)
+        lines.extend(["", ".. toctree::", "   :hidden:", ""])
+        lines.extend(f"   /{_shard_docname(shard_dir, key)}" for key in shards)
+        lines.append("")
+        
+        return lines
+    
     def _count_all_steps(self, steps: List[StepData]) -> int:
         """Count total steps including sub-steps."""
         count = len(steps)
@@ -8,14 +8,29 @@ Key Markers Detected:
 - # WORKFLOWS: tier1, tier2, tier3  (in module docstring)
 - # DOCUMENT_WORKFLOW: tier1, tier2  (in function docstring)
 - # WORKFLOW_EXCLUDE: tier1  (above function)
+
+Jupyter notebooks (.ipynb) are scanned the same way, over the text of
+their cell sources; outputs are skipped without being loaded.
 """
 
-import fnmatch
+import hashlib
+import heapq
+import json
 import logging
+import mmap
+import os
 import re
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Union
+
+from .path_matcher import compile_patterns
+
+if TYPE_CHECKING:
+    from .watcher import DiscoveryWatcher
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +71,120 @@ class DiscoveredWorkflow:
     def has_tiers(self) -> bool:
         """Check if module has multi-tier workflow."""
         return len(self.declared_tiers) > 0
+    
+    @property
+    def is_notebook(self) -> bool:
+        """Check if the workflow is a Jupyter notebook (.ipynb)."""
+        return self.module_path.suffix == '.ipynb'
+
+
+@dataclass
+class DiscoveryMetrics:
+    """Profiling counters for a discovery run (see WorkflowDiscovery collect_metrics)."""
+    
+    directories_visited: int = 0
+    """Directories listed (walked or taken from the git listing)."""
+    
+    files_considered: int = 0
+    """Candidate files after include/exclude filtering."""
+    
+    files_read: int = 0
+    """Files actually read (cache misses)."""
+    
+    bytes_read: int = 0
+    """Bytes read from disk (file size for memory-mapped notebooks)."""
+    
+    decode_fallbacks: int = 0
+    """Files that were not valid UTF-8 and were decoded as latin-1."""
+    
+    regex_seconds: float = 0.0
+    """Time spent in marker prefilters and regex scans, summed over files."""
+    
+    cache_hits: int = 0
+    """Files served from the persistent DiscoveryCache."""
+    
+    cache_misses: int = 0
+    """Files looked up in the cache but not found (or stale)."""
+    
+    enumerate_seconds: float = 0.0
+    """Wall time spent enumerating candidate files."""
+    
+    analyze_seconds: float = 0.0
+    """Wall time spent analyzing files (including cache lookups)."""
+    
+    slowest_files: List[Tuple[float, str]] = field(default_factory=list)
+    """(seconds, path) of the slowest analyzed files, slowest first."""
+    
+    top_n: int = 10
+    """Number of slowest files to keep."""
+    
+    @property
+    def total_seconds(self) -> float:
+        """Wall time of enumeration plus analysis."""
+        return self.enumerate_seconds + self.analyze_seconds
+    
+    @property
+    def files_per_second(self) -> float:
+        """Candidate files processed per second of wall time."""
+        return self.files_considered / self.total_seconds if self.total_seconds else 0.0
+    
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        """Fraction of cache lookups that hit, or None if no cache was used."""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+    
+    def record_file(self, seconds: float, path: str) -> None:
+        """Track a file's analysis time among the slowest files."""
+        # Min-heap of the top_n slowest; sorted when reported
+        if len(self.slowest_files) < self.top_n:
+            heapq.heappush(self.slowest_files, (seconds, path))
+        elif seconds > self.slowest_files[0][0]:
+            heapq.heapreplace(self.slowest_files, (seconds, path))
+    
+    def merge(self, other: 'DiscoveryMetrics') -> None:
+        """Add another run's counters to this one."""
+        for name in (
+            'directories_visited', 'files_considered', 'files_read', 'bytes_read',
+            'decode_fallbacks', 'regex_seconds', 'cache_hits', 'cache_misses',
+            'enumerate_seconds', 'analyze_seconds',
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for seconds, path in other.slowest_files:
+            self.record_file(seconds, path)
+    
+    def format_report(self) -> str:
+        """Format the metrics as a human-readable multi-line report."""
+        hit_rate = self.cache_hit_rate
+        cache = (
+            f"{self.cache_hits} hits / {self.cache_misses} misses ({hit_rate:.1%} hit rate)"
+            if hit_rate is not None else "not used"
+        )
+        lines = [
+            "Workflow discovery metrics",
+            f"  Directories visited: {self.directories_visited}",
+            f"  Files considered:    {self.files_considered} ({self.files_per_second:,.0f} files/s)",
+            f"  Files read:          {self.files_read} ({self.bytes_read / 1e6:,.2f} MB)",
+            f"  Decode fallbacks:    {self.decode_fallbacks}",
+            f"  Cache:               {cache}",
+            f"  Time:                {self.total_seconds:.3f}s "
+            f"(enumerate {self.enumerate_seconds:.3f}s, analyze {self.analyze_seconds:.3f}s, "
+            f"regex {self.regex_seconds:.3f}s)",
+        ]
+        if self.slowest_files:
+            lines.append("  Slowest files:")
+            for seconds, path in sorted(self.slowest_files, reverse=True):
+                lines.append(f"    {seconds * 1000:8.2f} ms  {path}")
+        return '\n'.join(lines)
+
+
+def _is_within(path: Union[str, Path], directory: Path) -> bool:
+    """Check whether a path is directory or lies under it (Path.is_relative_to, for Python 3.8)."""
+    try:
+        Path(path).relative_to(directory)
+    except ValueError:
+        return False
+    return True
 
 
 @dataclass
@@ -68,9 +197,15 @@ class DiscoveryResult:
     errors: List[str] = field(default_factory=list)
     """List of errors encountered during discovery."""
     
+    error_paths: List[Optional[str]] = field(default_factory=list)
+    """Path each error is about, in the order of errors (None if unknown)."""
+    
     skipped: List[Tuple[str, str]] = field(default_factory=list)
     """List of (path, reason) for skipped files."""
     
+    metrics: Optional[DiscoveryMetrics] = None
+    """Profiling counters, when discovery ran with collect_metrics=True."""
+    
     @property
     def modules_by_package(self) -> Dict[str, List[DiscoveredWorkflow]]:
         """Group discovered workflows by package name."""
@@ -87,6 +222,35 @@ class DiscoveryResult:
         
         return result
     
+    def add_error(self, message: str, path: Optional[Union[str, Path]] = None) -> None:
+        """Record an error and the file or directory it is about."""
+        # Errors appended to ``errors`` directly have no recorded path
+        self.error_paths.extend([None] * (len(self.errors) - len(self.error_paths)))
+        self.errors.append(message)
+        self.error_paths.append(str(path) if path is not None else None)
+    
+    def error_items(self) -> List[Tuple[str, Optional[str]]]:
+        """Get (message, path) for each error; path is None if not recorded."""
+        paths = self.error_paths + [None] * (len(self.errors) - len(self.error_paths))
+        return list(zip(self.errors, paths))
+    
+    def subtree(self, directory: Path) -> 'DiscoveryResult':
+        """
+        Get the part of the result under a directory.
+        
+        Workflows, skipped files and errors are kept when their path lies
+        within directory (compared as paths, not as strings); errors
+        without a recorded path are dropped. Metrics are not carried over.
+        """
+        result = DiscoveryResult(
+            workflows={p: wf for p, wf in self.workflows.items() if _is_within(p, directory)},
+            skipped=[(p, reason) for p, reason in self.skipped if _is_within(p, directory)],
+        )
+        for message, path in self.error_items():
+            if path is not None and _is_within(path, directory):
+                result.add_error(message, path)
+        return result
+    
     def get_all_tiers(self) -> Set[str]:
         """Get set of all unique tier names across all workflows."""
         tiers = set()
@@ -95,6 +259,160 @@ class DiscoveryResult:
         return tiers
 
 
+@dataclass
+class _FileAnalysis:
+    """Outcome of analyzing one file; produced in worker threads/processes."""
+    
+    path: Path
+    workflow: Optional[DiscoveredWorkflow] = None
+    error: Optional[str] = None
+    skip_reason: Optional[str] = None
+    
+    # Profiling, aggregated into DiscoveryMetrics by the caller
+    bytes_read: int = 0
+    decode_fallback: bool = False
+    regex_seconds: float = 0.0
+    seconds: float = 0.0
+
+
+EXECUTOR_TYPES = ('thread', 'process')
+"""Pool types supported for parallel file analysis."""
+
+DEFAULT_SKIP_DIRS = frozenset({
+    '.git', '.hg', '.svn', '.tox', '.nox', '.venv', 'venv', '.eggs',
+    '.mypy_cache', '.pytest_cache', '__pycache__', 'node_modules', 'site-packages',
+})
+"""Directory names never descended into (VCS metadata, caches, environments)."""
+
+FILE_SOURCES = ('auto', 'walk')
+"""Candidate file sources: ``auto`` lists files from git when possible, else walks."""
+
+_STAGED_ENTRY = re.compile(r'^(\d{6}) [0-9a-f]+ \d\t(.*)$', re.DOTALL)
+"""An index entry from ``git ls-files --stage``: mode and path."""
+
+_GITLINK_MODE = '160000'
+"""Index mode of a submodule (gitlink) entry."""
+
+
+class DiscoveryCache:
+    """
+    On-disk cache of per-file discovery results.
+    
+    Entries are keyed by absolute path and validated against the file's
+    size and ``mtime_ns``; with ``verify_hash`` a SHA-1 of the content is
+    checked as well, which also lets a touched but unchanged file (e.g.
+    after a checkout) be revalidated without re-parsing. Package and module
+    names are not cached since they depend on the surrounding directories.
+    
+    Example:
+        cache = DiscoveryCache(Path('.workflow/discovery_cache.json'))
+        discovery = WorkflowDiscovery(cache=cache)
+        result = discovery.discover(['src/'])  # Saves the cache when done
+    """
+    
+    VERSION = 2
+    """Bump when the analysis or the stored format changes (2: single-pass marker scan)."""
+    
+    def __init__(self, path: Path, verify_hash: bool = False):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: JSON file to load from and save to.
+            verify_hash: Also compare a content hash before reusing an entry.
+        """
+        self.path = Path(path)
+        self.verify_hash = verify_hash
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+    
+    @property
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Cached entries by path, loaded from disk on first use."""
+        if self._entries is None:
+            self._entries = self._load()
+        return self._entries
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the cache file, discarding it if missing, corrupt or outdated."""
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return {}
+        return data.get('entries', {})
+    
+    @staticmethod
+    def _file_hash(file_path: Path) -> str:
+        """SHA-1 of a file's content."""
+        return hashlib.sha1(file_path.read_bytes()).hexdigest()
+    
+    def get(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached analysis for a file if it is still valid.
+        
+        Returns:
+            The cached entry, or None if missing or stale.
+        """
+        entry = self.entries.get(str(file_path))
+        if entry is None:
+            return None
+        
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
+        unchanged = entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+        if not self.verify_hash:
+            return entry if unchanged else None
+        
+        if 'hash' not in entry or entry['size'] != stat.st_size:
+            return None
+        try:
+            if self._file_hash(file_path) != entry['hash']:
+                return None
+        except OSError:
+            return None
+        if not unchanged:
+            # Same content, new mtime: refresh so the next check is cheap
+            entry['mtime_ns'] = stat.st_mtime_ns
+            self._dirty = True
+        return entry
+    
+    def put(self, file_path: Path, entry: Dict[str, Any]) -> None:
+        """Store the analysis for a file, stamped with its current size and mtime."""
+        try:
+            stat = os.stat(file_path)
+            entry = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            if self.verify_hash:
+                entry['hash'] = self._file_hash(file_path)
+        except OSError:
+            return
+        self.entries[str(file_path)] = entry
+        self._dirty = True
+    
+    def save(self) -> None:
+        """Write the cache if it changed, dropping entries for deleted files."""
+        if not self._dirty:
+            return
+        
+        entries = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+        content = json.dumps({'version': self.VERSION, 'entries': entries}, separators=(',', ':'))
+        
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see a partial cache
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(content, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write discovery cache {self.path}: {e}")
+            return
+        self._dirty = False
+
+
 class WorkflowDiscovery:
     """
     Auto-discovery system for workflow modules.
@@ -123,6 +441,29 @@ class WorkflowDiscovery:
         re.MULTILINE
     )
     
+    # DOCUMENT_WORKFLOW marker or the start of a function definition, for
+    # associating markers with the next function in a single pass
+    MARKER_OR_DEF_PATTERN = re.compile(
+        r'^\s*#\s*DOCUMENT_WORKFLOW:\s*(?P<tiers>.+)$|def\s+(?P<function>\w+)\s*\(',
+        re.MULTILINE
+    )
+    
+    NON_WHITESPACE_PATTERN = re.compile(r'\S')
+    
+    # Byte-level prefilters; a file matching neither cannot contain markers
+    DOCUMENT_WORKFLOW_BYTES = b'DOCUMENT_WORKFLOW'
+    WORKFLOWS_BYTES_PATTERN = re.compile(rb'WORKFLOWS:', re.IGNORECASE)
+    
+    # WORKFLOWS declarations must appear within the first HEAD_CHARS characters
+    HEAD_CHARS = 2000
+    
+    # Bytes decoded for files that only need the module header
+    HEAD_BYTES = 8192
+    
+    # JSON structural characters, for scanning notebook cell sources
+    # without parsing (or loading) cell outputs
+    NOTEBOOK_TOKEN_PATTERN = re.compile(rb'[\[\]{}",]')
+    
     # Pattern to extract docstring first line
     DOCSTRING_PATTERN = re.compile(
         r'^(?:"""|\'\'\')(.*?)(?:"""|\'\'\')|("""|\'\'\')(.+?)$',
@@ -134,7 +475,13 @@ class WorkflowDiscovery:
         base_path: Optional[Path] = None,
         exclude_patterns: Optional[List[str]] = None,
         include_patterns: Optional[List[str]] = None,
-        verbose: bool = False
+        verbose: bool = False,
+        workers: int = 1,
+        executor: str = 'thread',
+        skip_dirs: Optional[Set[str]] = None,
+        cache: Optional[DiscoveryCache] = None,
+        file_source: str = 'auto',
+        collect_metrics: Union[bool, int] = False
     ):
         """
         Initialize discovery system.
@@ -143,15 +490,56 @@ class WorkflowDiscovery:
             base_path: Base directory for resolving relative paths.
                        Defaults to current working directory.
             exclude_patterns: Glob patterns for files/dirs to exclude.
-                              Defaults to ['test_*', '_*', '.*']
+                              Defaults to ['test_*', '_*', '.*'].
+                              Patterns with '/' match the path relative
+                              to base_path; '**' and '!' are supported
+                              (see path_matcher).
             include_patterns: Glob patterns for files to include.
-                              Defaults to ['*.py']
+                              Defaults to ['*.py', '*.ipynb']
             verbose: Enable verbose logging.
+            workers: Number of workers used to analyze files. 1 (default)
+                     analyzes serially, 0 uses one worker per CPU.
+            executor: Pool type for workers > 1: 'thread' or 'process'.
+            skip_dirs: Directory names never descended into.
+                       Defaults to DEFAULT_SKIP_DIRS.
+            cache: Optional DiscoveryCache; unchanged files are not re-read.
+            file_source: 'auto' lists files with ``git ls-files`` inside git
+                         checkouts (honouring .gitignore) and walks the
+                         filesystem elsewhere; 'walk' always walks.
+            collect_metrics: Attach DiscoveryMetrics to each DiscoveryResult.
+                             An int > 1 sets how many slowest files to keep.
         """
+        if executor not in EXECUTOR_TYPES:
+            raise ValueError(f"executor must be one of {EXECUTOR_TYPES}, got {executor!r}")
+        if file_source not in FILE_SOURCES:
+            raise ValueError(f"file_source must be one of {FILE_SOURCES}, got {file_source!r}")
+        
         self.base_path = base_path or Path.cwd()
         self.exclude_patterns = exclude_patterns or ['test_*', '_*', '.*', '*_test.py', 'conftest.py']
-        self.include_patterns = include_patterns or ['*.py']
+        self.include_patterns = include_patterns or ['*.py', '*.ipynb']
+        self._exclude = compile_patterns(self.exclude_patterns)
+        self._include = compile_patterns(self.include_patterns)
         self.verbose = verbose
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.executor = executor
+        self.skip_dirs = frozenset(DEFAULT_SKIP_DIRS if skip_dirs is None else skip_dirs)
+        self.cache = cache
+        self.file_source = file_source
+        self.collect_metrics = collect_metrics
+        
+        # Directory -> dotted package name (None if not a package), per discovery run
+        self._package_names: Dict[str, Optional[str]] = {}
+        
+        # Metrics of the current discovery run, if collected
+        self._metrics: Optional[DiscoveryMetrics] = None
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle without the cache, memo and metrics, which worker processes never use."""
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state['_package_names'] = {}
+        state['_metrics'] = None
+        return state
     
     def discover(
         self,
@@ -169,22 +557,127 @@ class WorkflowDiscovery:
             DiscoveryResult with discovered workflows and any errors.
         """
         result = DiscoveryResult()
+        self._package_names = {}
+        self._metrics = result.metrics = self._new_metrics()
+        
+        # Enumerate candidate files first, then analyze them (possibly in parallel)
+        start = time.perf_counter()
+        files = self._collect_search_paths(search_paths, result, recursive)
+        if result.metrics:
+            result.metrics.enumerate_seconds = time.perf_counter() - start
+            result.metrics.files_considered = len(files)
+        
+        start = time.perf_counter()
+        self._process_files(files, result)
+        if result.metrics:
+            result.metrics.analyze_seconds = time.perf_counter() - start
+        return result
+    
+    def watch(
+        self,
+        search_paths: List[str],
+        recursive: bool = True,
+        backend: str = 'auto',
+        interval: float = 1.0
+    ) -> 'DiscoveryWatcher':
+        """
+        Discover workflows, then keep the result up to date as files change.
+        
+        Args:
+            search_paths: List of directories to scan (relative to base_path).
+            recursive: Whether to search subdirectories.
+            backend: 'inotify', 'poll', or 'auto' (inotify where available).
+            interval: Seconds between rescans for the polling backend.
+        
+        Returns:
+            DiscoveryWatcher holding the live ``result``; call ``poll()``
+            (or iterate it) to apply changes and get DiscoveryEvents.
         
+        Example:
+            with WorkflowDiscovery().watch(['protocols/']) as watcher:
+                for events in watcher:
+                    for event in events:
+                        print(event.kind, event.path)
+        """
+        from .watcher import DiscoveryWatcher
+        
+        return DiscoveryWatcher(self, search_paths, recursive, backend, interval)
+    
+    def _collect_search_paths(
+        self,
+        search_paths: List[str],
+        result: DiscoveryResult,
+        recursive: bool
+    ) -> List[Path]:
+        """Collect candidate files for all search paths, recording missing paths."""
+        files: List[Path] = []
         for search_path in search_paths:
-            path = self._resolve_path(search_path)
+            path = self.resolve_path(search_path)
             
             if not path.exists():
-                result.errors.append(f"Search path not found: {search_path}")
+                result.add_error(f"Search path not found: {search_path}", path)
                 continue
             
             if path.is_file():
                 # Single file
-                self._process_file(path, result)
+                files.append(path)
             else:
                 # Directory
-                self._scan_directory(path, result, recursive)
+                self._collect_files(path, result, recursive, files)
         
-        return result
+        return files
+    
+    def _is_candidate(self, file_path: Path, root: Path, recursive: bool = True) -> bool:
+        """
+        Check whether a file under a search directory would be collected.
+        
+        Applies the same skip-dir, exclude and include rules as the walk,
+        for checking individual changed files.
+        """
+        try:
+            parts = file_path.relative_to(root).parts
+        except ValueError:
+            return False
+        if not parts or (len(parts) > 1 and not recursive):
+            return False
+        
+        rel_root = self._relative_path(root)
+        prefix = f"{rel_root}/" if rel_root else ''
+        if self._exclude.match(rel_root, is_dir=True):
+            return False
+        for depth, part in enumerate(parts[:-1], 1):
+            if part in self.skip_dirs or self._exclude.match(prefix + '/'.join(parts[:depth]), is_dir=True):
+                return False
+        
+        rel_path = prefix + '/'.join(parts)
+        return self._include.match(rel_path) and not self._exclude.match(rel_path)
+    
+    def walk_covers(self, root: Path, directory: Path) -> bool:
+        """
+        Check whether a recursive walk of root collects every file a walk of
+        directory would, so directory's result can be filtered from root's.
+        
+        False when directory lies outside root, is not a directory, or sits
+        behind a skip_dirs or excluded directory that the walk of root prunes.
+        """
+        if directory == root:
+            return True
+        try:
+            parts = directory.relative_to(root).parts
+            root.relative_to(self.base_path)
+        except ValueError:
+            return False
+        if not directory.is_dir():
+            return False
+        
+        rel_root = self._relative_path(root)
+        prefix = f"{rel_root}/" if rel_root else ''
+        if self._exclude.match(rel_root, is_dir=True):
+            return False
+        for depth, part in enumerate(parts, 1):
+            if part in self.skip_dirs or self._exclude.match(prefix + '/'.join(parts[:depth]), is_dir=True):
+                return False
+        return True
     
     def discover_in_directory(
         self,
@@ -205,7 +698,15 @@ class WorkflowDiscovery:
         self._scan_directory(directory, result, recursive)
         return result
     
-    def _resolve_path(self, path: str) -> Path:
+    def _new_metrics(self) -> Optional[DiscoveryMetrics]:
+        """Create metrics for a discovery run, or None if not collected."""
+        if not self.collect_metrics:
+            return None
+        if self.collect_metrics is True:
+            return DiscoveryMetrics()
+        return DiscoveryMetrics(top_n=int(self.collect_metrics))
+    
+    def resolve_path(self, path: str) -> Path:
         """Resolve path relative to base_path."""
         p = Path(path)
         if p.is_absolute():
@@ -214,23 +715,24 @@ class WorkflowDiscovery:
     
     def _should_exclude(self, path: Path) -> bool:
         """Check if path should be excluded based on patterns."""
-        name = path.name
-        
-        for pattern in self.exclude_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
-        
-        return False
+        return self._exclude.match(self._relative_path(path), is_dir=path.is_dir())
     
     def _should_include(self, path: Path) -> bool:
         """Check if file should be included based on patterns."""
-        name = path.name
-        
-        for pattern in self.include_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
+        return self._include.match(self._relative_path(path))
+    
+    def _relative_path(self, path: Path) -> str:
+        """
+        Get the '/'-separated path that patterns are matched against.
         
-        return False
+        Paths under base_path are relative to it; other absolute paths are
+        relative to their parent directory, so name patterns still apply.
+        """
+        try:
+            rel = path.relative_to(self.base_path).as_posix()
+        except ValueError:
+            rel = path.name if path.is_absolute() else path.as_posix()
+        return '' if rel == '.' else rel
     
     def _scan_directory(
         self,
@@ -239,22 +741,320 @@ class WorkflowDiscovery:
         recursive: bool
     ) -> None:
         """Scan a directory for workflow modules."""
-        if self._should_exclude(directory):
+        files: List[Path] = []
+        self._package_names = {}
+        self._metrics = result.metrics = self._new_metrics()
+        self._collect_files(directory, result, recursive, files)
+        if result.metrics:
+            result.metrics.files_considered = len(files)
+        self._process_files(files, result)
+    
+    def _collect_files(
+        self,
+        directory: Path,
+        result: DiscoveryResult,
+        recursive: bool,
+        files: List[Path]
+    ) -> None:
+        """
+        Collect candidate files under a directory, recording exclusions.
+        
+        Walks iteratively with ``os.scandir`` so entry types come from the
+        directory listing instead of a stat per entry, and deep trees cannot
+        hit the recursion limit. Excluded and ``skip_dirs`` directories are
+        pruned before descent. Entries are visited in name order so results
+        do not depend on filesystem listing order.
+        """
+        rel_directory = self._relative_path(directory)
+        if self._exclude.match(rel_directory, is_dir=True):
             result.skipped.append((str(directory), "Excluded by pattern"))
             return
         
-        try:
-            for entry in directory.iterdir():
-                if entry.is_dir():
-                    if recursive and not self._should_exclude(entry):
-                        self._scan_directory(entry, result, recursive)
-                elif entry.is_file() and self._should_include(entry):
-                    if not self._should_exclude(entry):
-                        self._process_file(entry, result)
+        prefix = f"{rel_directory}/" if rel_directory else ''
+        if self.file_source == 'auto':
+            listed = self._git_list_files(directory)
+            if listed is not None:
+                self._collect_listed_files(directory, prefix, listed, result, recursive, files)
+                return
+        
+        exclude, include = self._exclude.match, self._include.match
+        stack = [(str(directory), prefix)]
+        while stack:
+            current, prefix = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except PermissionError:
+                result.add_error(f"Permission denied: {current}", current)
+                continue
+            if self._metrics:
+                self._metrics.directories_visited += 1
+            
+            subdirs = []
+            has_init = False
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                
+                if is_dir:
+                    if recursive and name not in self.skip_dirs and not exclude(prefix + name, True):
+                        subdirs.append((entry.path, f"{prefix}{name}/"))
+                    continue
+                
+                if name == '__init__.py':
+                    has_init = True
+                rel_path = prefix + name
+                if include(rel_path) and entry.is_file():
+                    if not exclude(rel_path):
+                        files.append(Path(entry.path))
                     else:
-                        result.skipped.append((str(entry), "Excluded by pattern"))
-        except PermissionError as e:
-            result.errors.append(f"Permission denied: {directory}")
+                        result.skipped.append((entry.path, "Excluded by pattern"))
+            
+            # Package names of this directory (and so its subdirectories) need no stat
+            self._dotted_package(current, has_init)
+            
+            # Reversed so subdirectories are walked in name order
+            stack.extend(reversed(subdirs))
+    
+    def _git_list_files(self, directory: Path) -> Optional[List[str]]:
+        """
+        List files under a directory from the git index.
+        
+        Includes untracked files that are not ignored, and leaves out
+        tracked files deleted from the working tree. Submodules are listed
+        from their own index, so their files are included as in the walk
+        (``--recurse-submodules`` cannot be combined with ``--others``).
+        
+        Returns:
+            Paths relative to ``directory`` ('/'-separated), or None if the
+            directory is not in a git checkout, git is unavailable, or no
+            files are listed (e.g. the directory itself is ignored).
+        """
+        def ls_files(*args: str) -> Optional[List[str]]:
+            try:
+                completed = subprocess.run(
+                    ['git', '-C', str(directory), 'ls-files', '-z', *args, '--', '.'],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    check=True
+                )
+            except (OSError, subprocess.CalledProcessError):
+                return None
+            return [p for p in os.fsdecode(completed.stdout).split('\0') if p]
+        
+        # --stage prefixes index entries with "<mode> <object> <stage>\t"
+        staged = ls_files('--stage', '--cached', '--others', '--exclude-standard')
+        if not staged:
+            return None
+        
+        listed = []
+        for entry in staged:
+            match = _STAGED_ENTRY.match(entry)
+            if not match:
+                listed.append(entry)
+            elif match.group(1) != _GITLINK_MODE:
+                listed.append(match.group(2))
+            else:
+                submodule = match.group(2)
+                listed.extend(
+                    f"{submodule}/{p}" for p in self._git_list_files(directory / submodule) or ()
+                )
+        
+        deleted = ls_files('--deleted')
+        if deleted:
+            deleted_set = set(deleted)
+            listed = [p for p in listed if p not in deleted_set]
+        return listed
+    
+    def _git_ignored(self, directory: Path, paths: List[str]) -> Set[str]:
+        """
+        Get the paths that git ignores, for checking files seen after listing.
+        
+        Returns an empty set outside git checkouts, when git is unavailable,
+        or when ``file_source`` is 'walk'.
+        """
+        if self.file_source != 'auto' or not paths:
+            return set()
+        
+        try:
+            completed = subprocess.run(
+                ['git', '-C', str(directory), 'check-ignore', '-z', '--stdin'],
+                input=os.fsencode('\0'.join(paths)),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            return set()
+        
+        # Exit status 1 means nothing is ignored, 128 means not a checkout
+        if completed.returncode != 0:
+            return set()
+        return {p for p in os.fsdecode(completed.stdout).split('\0') if p}
+    
+    def _collect_listed_files(
+        self,
+        directory: Path,
+        prefix: str,
+        listed: List[str],
+        result: DiscoveryResult,
+        recursive: bool,
+        files: List[Path]
+    ) -> None:
+        """
+        Collect candidate files from a file listing (e.g. the git index).
+        
+        Applies the same rules as the directory walk: excluded and
+        ``skip_dirs`` directories are pruned, and files come out in the
+        same order (files before subdirectories, each in name order).
+        ``prefix`` is the pattern-matching path of ``directory``.
+        """
+        root = str(directory)
+        init_dirs: Set[str] = set()
+        candidates = []
+        pruned: Dict[str, bool] = {}
+        
+        def is_pruned(dir_path: str) -> bool:
+            # Memoized per listed directory, checking each parent once
+            if dir_path not in pruned:
+                parent, _, part = dir_path.rpartition('/')
+                pruned[dir_path] = (
+                    (bool(parent) and is_pruned(parent))
+                    or part in self.skip_dirs
+                    or self._exclude.match(prefix + dir_path, is_dir=True)
+                )
+            return pruned[dir_path]
+        
+        for listed_path in set(listed):
+            dir_path, _, name = listed_path.rpartition('/')
+            if dir_path and (not recursive or is_pruned(dir_path)):
+                continue
+            
+            dir_parts = dir_path.split('/') if dir_path else []
+            parent = os.path.join(root, *dir_parts)
+            if name == '__init__.py':
+                init_dirs.add(parent)
+            if self._include.match(prefix + listed_path):
+                sort_key = tuple((1, part) for part in dir_parts) + ((0, name),)
+                candidates.append((sort_key, parent, name, listed_path))
+        
+        # Memoize package names top-down from the listing, so no __init__.py stats are needed
+        listed_dirs = {root}
+        for sort_key, _, _, _ in candidates:
+            for depth in range(1, len(sort_key)):
+                listed_dirs.add(os.path.join(root, *(part for _, part in sort_key[:depth])))
+        for listed_dir in sorted(listed_dirs, key=len):
+            self._dotted_package(listed_dir, listed_dir in init_dirs)
+        if self._metrics:
+            self._metrics.directories_visited += len(listed_dirs)
+        
+        for _, parent, name, listed_path in sorted(candidates):
+            path = os.path.join(parent, name)
+            if not self._exclude.match(prefix + listed_path):
+                files.append(Path(path))
+            else:
+                result.skipped.append((path, "Excluded by pattern"))
+    
+    def _process_files(self, files: List[Path], result: DiscoveryResult) -> None:
+        """
+        Analyze candidate files and record the outcomes in enumeration order.
+        
+        Files with a valid cache entry are not read. With workers > 1 the
+        remaining files are analyzed in a thread or process pool;
+        ``Executor.map`` yields results in submission order, so the result
+        is identical to a serial run regardless of completion order.
+        """
+        metrics = self._metrics
+        analyses: List[Optional[_FileAnalysis]] = [None] * len(files)
+        pending: List[int] = []
+        for index, file_path in enumerate(files):
+            entry = self.cache.get(file_path) if self.cache else None
+            if entry is not None:
+                analyses[index] = self._analysis_from_cache(file_path, entry)
+            else:
+                pending.append(index)
+        
+        if metrics and self.cache:
+            metrics.cache_hits += len(files) - len(pending)
+            metrics.cache_misses += len(pending)
+        
+        for index, analysis in zip(pending, self._analyze_files([files[i] for i in pending])):
+            analyses[index] = analysis
+            if self.cache and not analysis.error:
+                self.cache.put(analysis.path, self._analysis_to_cache(analysis))
+            if metrics:
+                metrics.files_read += 1
+                metrics.bytes_read += analysis.bytes_read
+                metrics.decode_fallbacks += analysis.decode_fallback
+                metrics.regex_seconds += analysis.regex_seconds
+                metrics.record_file(analysis.seconds, str(analysis.path))
+        
+        for analysis in analyses:
+            self._record_analysis(analysis, result)
+        
+        if self.cache:
+            self.cache.save()
+    
+    def _analyze_files(self, files: List[Path]):
+        """Analyze files serially or in a pool, yielding results in input order."""
+        if self.workers <= 1 or len(files) < 2:
+            yield from map(self._analyze_file, files)
+            return
+        
+        workers = min(self.workers, len(files))
+        if self.executor == 'process':
+            pool = ProcessPoolExecutor(max_workers=workers)
+            chunksize = max(1, len(files) // (workers * 4))
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            chunksize = 1
+        
+        with pool:
+            yield from pool.map(self._analyze_file, files, chunksize=chunksize)
+    
+    def _analysis_to_cache(self, analysis: _FileAnalysis) -> Dict[str, Any]:
+        """Convert an analysis to a JSON-serializable cache entry."""
+        if analysis.workflow is None:
+            return {'skip_reason': analysis.skip_reason}
+        
+        workflow = analysis.workflow
+        return {
+            'declared_tiers': workflow.declared_tiers,
+            'entry_points': workflow.entry_points,
+            'docstring': workflow.docstring,
+            'line_count': workflow.line_count,
+        }
+    
+    def _analysis_from_cache(self, file_path: Path, entry: Dict[str, Any]) -> _FileAnalysis:
+        """Rebuild an analysis from a cache entry, re-deriving names from the path."""
+        if 'declared_tiers' not in entry:
+            return _FileAnalysis(file_path, skip_reason=entry.get('skip_reason'))
+        
+        return _FileAnalysis(file_path, workflow=DiscoveredWorkflow(
+            module_path=file_path,
+            module_name=file_path.stem,
+            package_name=None,  # Filled in by _record_analysis
+            declared_tiers=list(entry['declared_tiers']),
+            entry_points=dict(entry['entry_points']),
+            docstring=entry['docstring'],
+            line_count=entry['line_count']
+        ))
+    
+    def _record_analysis(self, analysis: _FileAnalysis, result: DiscoveryResult) -> None:
+        """Add the outcome of analyzing one file to the result."""
+        if analysis.error:
+            result.add_error(analysis.error, analysis.path)
+        elif analysis.skip_reason:
+            result.skipped.append((str(analysis.path), analysis.skip_reason))
+        elif analysis.workflow:
+            workflow = analysis.workflow
+            workflow.package_name = self._detect_package_name(analysis.path)
+            result.workflows[str(analysis.path)] = workflow
+            
+            if self.verbose:
+                logger.info(f"Discovered: {workflow.display_name} with tiers: {workflow.declared_tiers}")
     
     def _process_file(
         self,
@@ -268,112 +1068,290 @@ class WorkflowDiscovery:
             file_path: Path to Python file.
             result: DiscoveryResult to populate.
         """
+        self._record_analysis(self._analyze_file(file_path), result)
+    
+    def _analyze_file(self, file_path: Path) -> _FileAnalysis:
+        """
+        Analyze a single Python file or notebook without touching shared state.
+        
+        Safe to run in worker threads or processes.
+        
+        Args:
+            file_path: Path to Python file or .ipynb notebook.
+        
+        Returns:
+            _FileAnalysis with the workflow, or the error/skip reason,
+            and per-file profiling counters.
+        """
+        start = time.perf_counter()
+        analysis = self._analyze_file_content(file_path)
+        analysis.seconds = time.perf_counter() - start
+        return analysis
+    
+    def _analyze_file_content(self, file_path: Path) -> _FileAnalysis:
+        """Read and scan one file; see _analyze_file."""
         try:
-            source = file_path.read_text(encoding='utf-8')
-        except UnicodeDecodeError:
-            try:
-                source = file_path.read_text(encoding='latin-1')
-            except Exception as e:
-                result.errors.append(f"Could not read {file_path}: {e}")
-                return
+            if file_path.suffix == '.ipynb':
+                data, bytes_read = self._read_notebook_sources(file_path)
+            else:
+                data = file_path.read_bytes()
+                bytes_read = len(data)
+        except ValueError as e:
+            return _FileAnalysis(file_path, error=f"Could not parse notebook {file_path}: {e}")
         except Exception as e:
-            result.errors.append(f"Could not read {file_path}: {e}")
-            return
+            return _FileAnalysis(file_path, error=f"Could not read {file_path}: {e}")
+        
+        # Fast reject on raw bytes: most files have no markers and are never decoded.
+        # Markers are ASCII, so they look the same in UTF-8 and latin-1 bytes.
+        regex_start = time.perf_counter()
+        has_function_markers = self.DOCUMENT_WORKFLOW_BYTES in data
+        if not has_function_markers and not self.WORKFLOWS_BYTES_PATTERN.search(
+            data, 0, self.HEAD_CHARS * 4  # UTF-8 uses at most 4 bytes per character
+        ):
+            return _FileAnalysis(
+                file_path, skip_reason="No workflow markers", bytes_read=bytes_read,
+                regex_seconds=time.perf_counter() - regex_start
+            )
+        regex_seconds = time.perf_counter() - regex_start
+        
+        source, decode_fallback = self._decode_source(data, head_only=not has_function_markers)
+        
+        # One pass over the source for DOCUMENT_WORKFLOW markers and their functions
+        regex_start = time.perf_counter()
+        marker_tiers, entry_points = None, {}
+        if has_function_markers:
+            marker_tiers, entry_points = self._scan_function_markers(source)
         
         # Check for WORKFLOWS declaration
-        workflows_match = self.WORKFLOWS_PATTERN.search(source[:2000])  # Search in first 2000 chars
+        workflows_match = self.WORKFLOWS_PATTERN.search(source[:self.HEAD_CHARS])
+        regex_seconds += time.perf_counter() - regex_start
+        stats = {
+            'bytes_read': bytes_read,
+            'decode_fallback': decode_fallback,
+            'regex_seconds': regex_seconds,
+        }
         
         if not workflows_match:
             # Also check for DOCUMENT_WORKFLOW markers (single-tier mode)
-            doc_workflow_match = self.DOCUMENT_WORKFLOW_PATTERN.search(source)
-            if not doc_workflow_match:
-                result.skipped.append((str(file_path), "No workflow markers"))
-                return
+            if marker_tiers is None:
+                return _FileAnalysis(file_path, skip_reason="No workflow markers", **stats)
             # Single-tier mode: treat as having one tier named 'default' or extract from marker
-            declared_tiers = self._extract_single_tier_names(source)
+            declared_tiers = marker_tiers
         else:
             # Multi-tier mode: extract tier names from WORKFLOWS declaration
             tiers_text = workflows_match.group(1).strip()
             declared_tiers = [t.strip() for t in tiers_text.split(',') if t.strip()]
         
         if not declared_tiers:
-            result.skipped.append((str(file_path), "No valid tier names"))
-            return
+            return _FileAnalysis(file_path, skip_reason="No valid tier names", **stats)
         
         # Extract additional info
-        entry_points = self._extract_entry_points(source)
         docstring = self._extract_docstring_summary(source)
-        line_count = source.count('\n') + 1
+        line_count = data.count(b'\n') + 1
         
-        # Determine module and package names
+        # Determine module name; the package name is filled in by
+        # _record_analysis from the per-directory memo
         module_name = file_path.stem
-        package_name = self._detect_package_name(file_path)
         
         # Create workflow record
         workflow = DiscoveredWorkflow(
             module_path=file_path,
             module_name=module_name,
-            package_name=package_name,
+            package_name=None,
             declared_tiers=declared_tiers,
             entry_points=entry_points,
             docstring=docstring,
             line_count=line_count
         )
         
-        result.workflows[str(file_path)] = workflow
+        return _FileAnalysis(file_path, workflow=workflow, **stats)
+    
+    def _read_notebook_sources(self, file_path: Path) -> Tuple[bytes, int]:
+        """
+        Read the cell sources of a notebook as UTF-8 text, one cell per line block.
+        
+        The file is memory-mapped and scanned token by token, so large
+        ``outputs`` (embedded images) are skipped without being copied
+        into Python objects.
+        
+        Returns:
+            Tuple of (cell sources, notebook file size in bytes)
+        
+        Raises:
+            ValueError: If the notebook JSON is malformed.
+        """
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return b'', 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                sources = self._scan_notebook_sources(data)
         
-        if self.verbose:
-            logger.info(f"Discovered: {workflow.display_name} with tiers: {declared_tiers}")
+        return '\n'.join(sources).encode('utf-8'), size
     
-    def _extract_single_tier_names(self, source: str) -> List[str]:
-        """Extract tier names from DOCUMENT_WORKFLOW markers (single-tier mode)."""
-        tiers = set()
+    def _scan_notebook_sources(self, data) -> List[str]:
+        """
+        Extract ``cells[*].source`` strings from nbformat 4 JSON.
+        
+        Walks JSON structural characters only, tracking the current key of
+        each object. String contents are skipped with ``find`` (memchr
+        speed, even for multi-megabyte base64 outputs) and decoded only
+        for cell sources.
+        
+        Args:
+            data: Notebook bytes (or a memory map).
+        
+        Returns:
+            The source text of each cell, in order.
+        """
+        token_search = self.NOTEBOOK_TOKEN_PATTERN.search
         
-        for match in self.DOCUMENT_WORKFLOW_PATTERN.finditer(source):
-            names_text = match.group(1).strip()
-            for name in names_text.split(','):
-                name = name.strip()
-                if name:
-                    tiers.add(name)
+        # Frames are [is_object, current key, expecting a key]
+        stack: List[List[Any]] = []
+        sources: List[str] = []
+        cell_parts: List[str] = []
+        pos = 0
         
-        return sorted(list(tiers)) if tiers else ['default']
+        while True:
+            match = token_search(data, pos)
+            if match is None:
+                break
+            start = match.start()
+            char = data[start:start + 1]
+            pos = start + 1
+            
+            if char == b'"':
+                end = pos
+                while True:
+                    quote = data.find(b'"', end)
+                    if quote == -1:
+                        raise ValueError("unterminated string")
+                    escape = data.find(b'\\', end, quote)
+                    if escape == -1:
+                        end = quote
+                        break
+                    end = escape + 2  # Skip the escaped character
+                
+                frame = stack[-1] if stack else None
+                if frame is not None and frame[0] and frame[2]:
+                    frame[1] = data[pos:end]
+                    frame[2] = False
+                elif (
+                    3 <= len(stack) <= 4
+                    and stack[0][1] == b'cells'
+                    and stack[2][1] == b'source'
+                    and (len(stack) == 3 or not stack[3][0])
+                ):
+                    cell_parts.append(json.loads(data[pos - 1:end + 1]))
+                pos = end + 1
+            elif char == b'{':
+                stack.append([True, None, True])
+            elif char == b'[':
+                stack.append([False, None, False])
+            elif char == b',':
+                if stack and stack[-1][0]:
+                    stack[-1][2] = True
+            else:
+                if not stack:
+                    raise ValueError(f"unexpected {char.decode()!r} at offset {start}")
+                stack.pop()
+                if char == b'}' and len(stack) == 2 and stack[0][1] == b'cells':
+                    # End of a cell object
+                    sources.append(''.join(cell_parts))
+                    cell_parts = []
+        
+        if stack:
+            raise ValueError("unexpected end of notebook")
+        return sources
     
-    def _extract_entry_points(self, source: str) -> Dict[str, str]:
+    def _decode_source(self, data: bytes, head_only: bool = False) -> Tuple[str, bool]:
         """
-        Extract mapping of tier name -> entry function name.
+        Decode file content as UTF-8, falling back to latin-1.
         
-        Parses # DOCUMENT_WORKFLOW: markers and associates them
-        with the next function definition.
+        With ``head_only`` and pure-ASCII content (bytes map 1:1 to
+        characters) only the first HEAD_BYTES are decoded, as long as that
+        covers the first two lines used for the docstring summary.
+        
+        Returns:
+            Tuple of (text, whether the latin-1 fallback was used)
+        """
+        if head_only and len(data) > self.HEAD_BYTES and data.isascii():
+            head = data[:self.HEAD_BYTES].decode('ascii')
+            if head.lstrip().count('\n') >= 2:
+                return head, False
+        
+        try:
+            return data.decode('utf-8'), False
+        except UnicodeDecodeError:
+            return data.decode('latin-1'), True
+    
+    def _scan_function_markers(
+        self,
+        source: str
+    ) -> Tuple[Optional[List[str]], Dict[str, str]]:
         """
+        Collect DOCUMENT_WORKFLOW tier names and entry points in one forward pass.
+        
+        Markers and ``def`` lines are matched by a single alternation, so
+        each marker is associated with the next function definition without
+        re-searching (or copying) the rest of the file per marker.
+        
+        Returns:
+            Tuple of (sorted tier names, or ['default'] if markers name no
+            tiers, or None if there are no markers; tier -> entry function)
+        """
+        tiers: Set[str] = set()
         entry_points: Dict[str, str] = {}
+        pending: List[str] = []
+        found_marker = False
         
-        # Pattern to find function after marker
-        function_pattern = re.compile(r'def\s+(\w+)\s*\(')
+        for match in self.MARKER_OR_DEF_PATTERN.finditer(source):
+            function_name = match.group('function')
+            if function_name is None:
+                found_marker = True
+                tier_names = [t.strip() for t in match.group('tiers').strip().split(',') if t.strip()]
+                tiers.update(tier_names)
+                pending.extend(tier_names)
+            elif pending:
+                # First marker for a tier wins
+                for tier in pending:
+                    entry_points.setdefault(tier, function_name)
+                pending = []
         
-        for match in self.DOCUMENT_WORKFLOW_PATTERN.finditer(source):
-            tiers_text = match.group(1).strip()
-            tier_names = [t.strip() for t in tiers_text.split(',') if t.strip()]
-            
-            # Find next function definition
-            remaining = source[match.end():]
-            func_match = function_pattern.search(remaining)
-            
-            if func_match:
-                function_name = func_match.group(1)
-                for tier in tier_names:
-                    if tier not in entry_points:
-                        entry_points[tier] = function_name
+        if not found_marker:
+            return None, entry_points
+        return (sorted(tiers) if tiers else ['default']), entry_points
+    
+    def _extract_single_tier_names(self, source: str) -> List[str]:
+        """Extract tier names from DOCUMENT_WORKFLOW markers (single-tier mode)."""
+        tiers, _ = self._scan_function_markers(source)
+        return tiers or ['default']
+    
+    def _extract_entry_points(self, source: str) -> Dict[str, str]:
+        """
+        Extract mapping of tier name -> entry function name.
         
-        return entry_points
+        Parses # DOCUMENT_WORKFLOW: markers and associates them
+        with the next function definition.
+        """
+        return self._scan_function_markers(source)[1]
     
     def _extract_docstring_summary(self, source: str) -> Optional[str]:
         """Extract first line of module docstring."""
-        # Check for docstring at start of file
-        lines = source.lstrip().split('\n')
-        if not lines:
+        # Only the first two lines after leading whitespace are needed
+        start = self.NON_WHITESPACE_PATTERN.search(source)
+        if not start:
             return None
         
-        first_line = lines[0].strip()
+        first_end = source.find('\n', start.start())
+        if first_end == -1:
+            first_line, second_line = source[start.start():], None
+        else:
+            first_line = source[start.start():first_end]
+            second_end = source.find('\n', first_end + 1)
+            second_line = source[first_end + 1:second_end if second_end != -1 else None]
+        
+        first_line = first_line.strip()
         
         # Check for triple quote start
         for quote in ['"""', "'''"]:
@@ -388,8 +1366,8 @@ class WorkflowDiscovery:
                     return content_start
                 
                 # Content on next line
-                if len(lines) > 1:
-                    return lines[1].strip()
+                if second_line is not None:
+                    return second_line.strip()
         
         return None
     
@@ -397,21 +1375,14 @@ class WorkflowDiscovery:
         """
         Detect package name from file location.
         
-        Looks for __init__.py in parent directories to determine package.
+        Returns the full dotted package (``a.b.c`` for nested packages) when
+        the file's directory has an ``__init__.py``, otherwise the directory
+        name as context (except for src/lib/scripts).
         """
         parent = file_path.parent
         
-        # Check if parent is a package (has __init__.py)
-        init_file = parent / '__init__.py'
-        
-        if init_file.exists():
-            package_name = parent.name
-            
-            # Check for nested packages
-            grandparent = parent.parent
-            if (grandparent / '__init__.py').exists():
-                return f"{grandparent.name}.{package_name}"
-            
+        package_name = self._dotted_package(str(parent))
+        if package_name:
             return package_name
         
         # Not in a package - use parent directory name as context
@@ -420,13 +1391,40 @@ class WorkflowDiscovery:
             return parent_name
         
         return None
+    
+    def _dotted_package(self, directory: str, has_init: Optional[bool] = None) -> Optional[str]:
+        """
+        Get the dotted package name of a directory, or None if it is not a package.
+        
+        Results are memoized per directory. The walk passes ``has_init`` from
+        the directory listing, so directories it visited need no extra stat;
+        other directories are checked for ``__init__.py`` once.
+        """
+        if directory in self._package_names:
+            return self._package_names[directory]
+        
+        if has_init is None:
+            has_init = os.path.isfile(os.path.join(directory, '__init__.py'))
+        
+        package_name = None
+        if has_init:
+            name = os.path.basename(directory)
+            parent = os.path.dirname(directory)
+            parent_package = self._dotted_package(parent) if parent != directory else None
+            package_name = f"{parent_package}.{name}" if parent_package else name
+        
+        self._package_names[directory] = package_name
+        return package_name
 
 
 def discover_workflows(
     search_paths: List[str],
     base_path: Optional[Path] = None,
     exclude_patterns: Optional[List[str]] = None,
-    verbose: bool = False
+    verbose: bool = False,
+    workers: int = 1,
+    executor: str = 'thread',
+    file_source: str = 'auto'
 ) -> DiscoveryResult:
     """
     Convenience function to discover workflows.
@@ -436,6 +1434,9 @@ def discover_workflows(
         base_path: Base directory for relative paths.
         exclude_patterns: Patterns for files to exclude.
         verbose: Enable verbose logging.
+        workers: Number of workers for file analysis (1 = serial, 0 = per CPU).
+        executor: Pool type for workers > 1: 'thread' or 'process'.
+        file_source: 'auto' to list files from git when possible, or 'walk'.
     
     Returns:
         DiscoveryResult with discovered workflows.
@@ -449,12 +1450,131 @@ def discover_workflows(
     discovery = WorkflowDiscovery(
         base_path=base_path,
         exclude_patterns=exclude_patterns,
-        verbose=verbose
+        verbose=verbose,
+        workers=workers,
+        executor=executor,
+        file_source=file_source
     )
     return discovery.discover(search_paths)
 
 
-# Sphinx integration helper
+# Sphinx integration helpers
+
+# Per-build discovery state (memoized scans and the DiscoveryCache), keyed
+# by id(env). Kept off the environment, which is pickled for parallel
+# readers and saved between builds.
+_shared_discovery: Dict[int, Dict[str, Any]] = {}
+
+
+def get_discovery_cache(config, doctreedir) -> Optional[DiscoveryCache]:
+    """
+    Get the discovery cache for a Sphinx build, stored in the doctree directory.
+    
+    Returns None when ``workflow_discovery_cache`` is disabled.
+    """
+    if not getattr(config, 'workflow_discovery_cache', True):
+        return None
+    return DiscoveryCache(
+        Path(doctreedir) / 'workflow_discovery_cache.json',
+        verify_hash=getattr(config, 'workflow_discovery_verify_hash', False)
+    )
+
+
+def get_shared_discovery_result(
+    env,
+    search_paths: List[str],
+    exclude_patterns: Optional[List[str]] = None
+) -> DiscoveryResult:
+    """
+    Discover workflows once per build and share the result.
+    
+    Scans are memoized per build and discovery configuration
+    (project root, exclude/include patterns, skip_dirs and file source), so
+    workflow-index directives and build_workflow_registry over the same or
+    overlapping paths walk each tree only once per build: a path under an
+    already-scanned root is served by filtering that root's result, and
+    scanning a root drops the memoized scans it covers. The memo is dropped
+    at env-updated (see drop_discovery_results); across builds, the
+    persistent DiscoveryCache keeps rescans cheap and picks up changed files.
+    
+    Args:
+        env: Sphinx build environment.
+        search_paths: Directories (or files) to scan, relative to the
+                      project root.
+        exclude_patterns: Exclude patterns (None uses the defaults).
+    
+    Returns:
+        A new DiscoveryResult combining the per-path results in order.
+    """
+    config = env.config
+    discovery = WorkflowDiscovery(
+        base_path=Path(env.srcdir).parent,  # Go up from docs/ to project root
+        exclude_patterns=exclude_patterns,
+        verbose=getattr(config, 'workflow_verbose', False),
+        workers=getattr(config, 'workflow_discovery_workers', 1),
+        executor=getattr(config, 'workflow_discovery_executor', 'thread'),
+        file_source=getattr(config, 'workflow_discovery_source', 'auto'),
+        collect_metrics=getattr(config, 'workflow_verbose', False)
+    )
+    config_key = (
+        str(discovery.base_path),
+        tuple(discovery.exclude_patterns),
+        tuple(discovery.include_patterns),
+        tuple(sorted(discovery.skip_dirs)),
+        discovery.file_source,
+    )
+    
+    shared = _shared_discovery.setdefault(id(env), {'results': {}})
+    scans: Dict[Path, DiscoveryResult] = shared['results'].setdefault(config_key, {})
+    
+    def covering_root(path: Path) -> Optional[Path]:
+        if path in scans:
+            return path
+        return next((root for root in scans if discovery.walk_covers(root, path)), None)
+    
+    requested: Dict[Path, str] = {}
+    for search_path in search_paths:
+        requested.setdefault(discovery.resolve_path(search_path), search_path)
+    
+    # Scan outermost roots first, so nested requests are filtered from them
+    missing = sorted(
+        (path for path in requested if covering_root(path) is None),
+        key=lambda path: len(path.parts)
+    )
+    if missing:
+        if 'file_cache' not in shared:
+            shared['file_cache'] = get_discovery_cache(config, env.doctreedir)
+        discovery.cache = shared['file_cache']
+        
+        for path in missing:
+            if covering_root(path) is not None:
+                continue
+            for root in [root for root in scans if discovery.walk_covers(path, root)]:
+                del scans[root]
+            scans[path] = discovery.discover([requested[path]])
+    
+    combined = DiscoveryResult()
+    for path in requested:
+        root = covering_root(path)
+        result = scans[root] if root == path else scans[root].subtree(path)
+        for module_path, workflow in result.workflows.items():
+            combined.workflows.setdefault(module_path, workflow)
+        for message, error_path in result.error_items():
+            combined.add_error(message, error_path)
+        combined.skipped.extend(result.skipped)
+        if result.metrics:
+            if combined.metrics is None:
+                combined.metrics = DiscoveryMetrics()
+            combined.metrics.merge(result.metrics)
+    
+    return combined
+
+
+def drop_discovery_results(app, env) -> None:
+    """Drop the build's memoized discovery results once reading is done (env-updated)."""
+    _shared_discovery.pop(id(env), None)
+
+
 def build_workflow_registry(
     app,
     search_paths: Optional[List[str]] = None
@@ -462,7 +1582,8 @@ def build_workflow_registry(
     """
     Build workflow registry for Sphinx integration.
     
-    Reads search paths from Sphinx config if not provided.
+    Reads search paths from Sphinx config if not provided. Shares
+    discovery results with workflow-index directives in the same build.
     
     Args:
         app: Sphinx application object.
@@ -479,20 +1600,10 @@ def build_workflow_registry(
         logger.warning("No workflow_search_paths configured")
         return DiscoveryResult()
     
-    # Resolve base path from Sphinx source directory
-    source_dir = Path(app.srcdir)
-    base_path = source_dir.parent  # Go up from docs/ to project root
-    
     # Get exclude patterns from config
     exclude_patterns = getattr(app.config, 'workflow_exclude_patterns', None)
     
-    discovery = WorkflowDiscovery(
-        base_path=base_path,
-        exclude_patterns=exclude_patterns,
-        verbose=getattr(app.config, 'workflow_verbose', False)
-    )
-    
-    result = discovery.discover(search_paths)
+    result = get_shared_discovery_result(app.env, search_paths, exclude_patterns)
     
     # Log results
     if result.workflows:
@@ -500,5 +1611,7 @@ def build_workflow_registry(
     if result.errors:
         for error in result.errors:
             logger.warning(f"Discovery error: {error}")
+    if result.metrics and getattr(app.config, 'workflow_verbose', False):
+        logger.info(result.metrics.format_report())
     
     return result
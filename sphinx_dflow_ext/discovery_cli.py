@@ -0,0 +1,134 @@
+"""
+Command-line interface for workflow discovery.
+
+Runs the same discovery as the Sphinx build, outside of Sphinx, to list
+workflow modules and profile large trees.
+
+Usage:
+    python -m sphinx_dflow_ext.discovery_cli <path> [path...] [options]
+
+Examples:
+    python -m sphinx_dflow_ext.discovery_cli src
+    python -m sphinx_dflow_ext.discovery_cli src --metrics --top 20
+    python -m sphinx_dflow_ext.discovery_cli src --workers 8 --executor process --metrics
+    python -m sphinx_dflow_ext.discovery_cli src --exclude 'tests/' --exclude 'build/'
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .discovery import DiscoveryCache, WorkflowDiscovery
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Discover workflow modules and report discovery metrics",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        help='Directories or files to scan, relative to --base'
+    )
+
+    parser.add_argument(
+        '--base',
+        type=Path,
+        default=Path.cwd(),
+        help='Project root that paths and patterns are relative to (default: current directory)'
+    )
+
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        help='Exclude pattern (repeatable; replaces the default patterns)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of parallel workers for file analysis'
+    )
+
+    parser.add_argument(
+        '--executor',
+        choices=('thread', 'process'),
+        default='thread',
+        help='Executor used when --workers > 1'
+    )
+
+    parser.add_argument(
+        '--source',
+        choices=('auto', 'walk'),
+        default='auto',
+        help="Candidate listing: 'auto' uses the git index when available"
+    )
+
+    parser.add_argument(
+        '--cache',
+        type=Path,
+        help='Discovery cache file (reports cache hits/misses on reruns)'
+    )
+
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        help='Print discovery metrics after the results'
+    )
+
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=10,
+        help='Number of slowest files to list with --metrics'
+    )
+
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Also list skipped files'
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run discovery and print the results; returns the exit status."""
+    args = parse_arguments(argv)
+
+    discovery = WorkflowDiscovery(
+        base_path=args.base,
+        exclude_patterns=args.exclude,
+        workers=args.workers,
+        executor=args.executor,
+        file_source=args.source,
+        cache=DiscoveryCache(args.cache) if args.cache else None,
+        collect_metrics=args.top if args.metrics else False
+    )
+    result = discovery.discover(args.paths)
+
+    for path, workflow in sorted(result.workflows.items()):
+        tiers = ', '.join(workflow.declared_tiers)
+        print(f"{workflow.module_name}  [{tiers}]  {path}")
+    print(f"\n{len(result.workflows)} workflow modules, {len(result.errors)} errors")
+
+    for error in result.errors:
+        print(f"Error: {error}", file=sys.stderr)
+    if args.verbose:
+        for path, reason in result.skipped:
+            print(f"Skipped: {path} ({reason})")
+    if result.metrics:
+        print()
+        print(result.metrics.format_report())
+
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
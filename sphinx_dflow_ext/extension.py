@@ -16,10 +16,27 @@ from sphinx.util import logging as sphinx_logging
 
 from .rst_generator import WorkflowRSTGenerator
 from .directives import WorkflowDirective, WorkflowNotebookDirective, WorkflowIndexDirective
-from .directives_db import WorkflowDBDirective, WorkflowIndexDBDirective
+from .directives_db import (
+    WorkflowDBDirective,
+    WorkflowIndexDBDirective,
+    reset_workflow_db_cache,
+    drop_workflow_db_cache,
+    generate_index_shard_pages,
+    merge_lazy_payloads,
+    purge_lazy_payloads,
+    prefetch_workflow_db_targets,
+    write_lazy_payloads,
+)
+from .discovery import drop_discovery_results
+from .path_matcher import compile_patterns
 from .roles import workflow_step_role
 from .source_link_role import source_link_role, source_line_role, step_source_role
-from .source_generator import generate_all_source_pages
+from .source_generator import (
+    generate_all_source_pages,
+    merge_source_mappings,
+    purge_source_mappings,
+    record_source_mapping,
+)
 
 logger = sphinx_logging.getLogger(__name__)
 
@@ -69,6 +86,9 @@ def get_workflow_config(app: Sphinx) -> Dict[str, Any]:
     """
     default_config = {
         'show_diagrams': True,
+        'diagram_mode': 'auto',
+        'diagram_max_nodes': 50,
+        'lazy_step_details': False,
         'default_tier': 'overview',
         'collapse_substeps': True,
         'show_function_calls': True,
@@ -96,19 +116,13 @@ def should_process_module(module_name: str, config: Dict[str, Any]) -> bool:
     Returns:
         True if module should be processed
     """
-    import fnmatch
-    
-    # Check exclude patterns
-    for pattern in config['exclude_patterns']:
-        if fnmatch.fnmatch(module_name, pattern):
-            return False
+    # Check exclude patterns (compiled once per pattern list)
+    if compile_patterns(config['exclude_patterns']).match(module_name):
+        return False
     
     # Check include patterns (if specified)
     if config['include_only']:
-        for pattern in config['include_only']:
-            if fnmatch.fnmatch(module_name, pattern):
-                return True
-        return False
+        return compile_patterns(config['include_only']).match(module_name)
     
     return True
 
@@ -226,14 +240,7 @@ def process_workflow_docstring(
         }
         
         # Store source mapping in environment for later source generation
-        env = app.env
-        if not hasattr(env, 'workflow_source_mappings'):
-            env.workflow_source_mappings = {}
-        
-        env.workflow_source_mappings[name] = {
-            'source_path': str(module_file),
-            'steps': step_data
-        }
+        record_source_mapping(app.env, name, str(module_file), step_data, replace=True)
         
         # Generate RST documentation
         generator = WorkflowRSTGenerator(config)
@@ -321,16 +328,42 @@ def setup(app: Sphinx) -> Dict[str, Any]:
     app.add_config_value('workflow_config', {}, 'html')
     app.add_config_value('workflow_db_path', None, 'html')  # Path to workflow database
     
+    # workflow-index-db sharding: None, 'package' or 'pages'
+    app.add_config_value('workflow_index_shard_by', None, 'env')
+    app.add_config_value('workflow_index_page_size', 200, 'env')
+    app.add_config_value('workflow_index_shard_dir', 'workflow-index', 'env')
+    
     # Auto-discovery configuration
     app.add_config_value('workflow_search_paths', [], 'html')
     app.add_config_value('workflow_exclude_patterns', ['test_*', '_*', '.*', '*_test.py'], 'html')
     app.add_config_value('workflow_verbose', False, 'html')
+    app.add_config_value('workflow_discovery_workers', 1, 'html')  # 0 = one per CPU
+    app.add_config_value('workflow_discovery_executor', 'thread', 'html')  # or 'process'
+    app.add_config_value('workflow_discovery_cache', True, 'html')  # Cache in doctree dir
+    app.add_config_value('workflow_discovery_verify_hash', False, 'html')
+    app.add_config_value('workflow_discovery_source', 'auto', 'html')  # or 'walk'
+    
+    # Source pages (_modules/*.html), generated at build-finished
+    app.add_config_value('workflow_source_workers', 1, 'html')  # Processes, 0 = one per CPU
+    app.add_config_value('workflow_highlight_cache', True, 'html')  # Cache in doctree dir
+    app.add_config_value('workflow_highlight_cache_size', 256, 'html')  # MB, LRU-evicted
+    app.add_config_value('workflow_source_virtual_lines', 5000, 'html')  # Lazy rendering above, 0 = never
     
     # Register event handlers
     app.connect('autodoc-process-docstring', process_workflow_docstring)
     app.connect('config-inited', add_static_files)
+    app.connect('builder-inited', generate_index_shard_pages)
+    app.connect('env-before-read-docs', reset_workflow_db_cache)
+    app.connect('env-before-read-docs', prefetch_workflow_db_targets)
+    app.connect('env-updated', drop_workflow_db_cache)
+    app.connect('env-updated', drop_discovery_results)
+    app.connect('env-merge-info', merge_lazy_payloads)
+    app.connect('env-purge-doc', purge_lazy_payloads)
+    app.connect('env-merge-info', merge_source_mappings)
+    app.connect('env-purge-doc', purge_source_mappings)
     app.connect('build-finished', copy_static_files)
     app.connect('build-finished', generate_all_source_pages)
+    app.connect('build-finished', write_lazy_payloads)
     
     # Register custom directives (source-based, legacy)
     app.add_directive('workflow', WorkflowDirective)
@@ -354,6 +387,7 @@ def setup(app: Sphinx) -> Dict[str, Any]:
     
     return {
         'version': '0.2.0',
+        'env_version': 1,  # Bump when data stored on the environment changes shape
         'parallel_read_safe': True,
         'parallel_write_safe': True,
     }
@@ -0,0 +1,187 @@
+"""
+Compiled glob matching for include/exclude patterns.
+
+All patterns of a list are translated into one combined regular
+expression, so matching an entry is a single ``re`` call instead of a
+``fnmatch`` call per pattern. Patterns follow ``.gitignore`` conventions:
+
+- ``*``, ``?`` and ``[...]`` match within one path segment
+- ``**`` matches across segments (``**/build``, ``src/**``, ``a/**/b``)
+- A pattern without ``/`` matches the last segment at any depth, so plain
+  name patterns like ``test_*`` behave exactly like ``fnmatch`` on names
+- A pattern containing ``/`` matches the full relative path
+- A trailing ``/`` restricts a pattern to directories
+- A leading ``!`` negates a pattern; the last matching pattern wins
+
+Dotted module names contain no ``/``, so they are matched as a single
+segment with the same semantics as ``fnmatch``.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate one glob pattern (without ``!`` or trailing ``/``) to a regex."""
+    parts = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char == '*':
+            if i < n and pattern[i] == '*':
+                i += 1
+                if i < n and pattern[i] == '/':
+                    # '**/' matches zero or more leading directories
+                    i += 1
+                    parts.append('(?:.*/)?')
+                else:
+                    parts.append('.*')
+            else:
+                parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append('\\[')
+            else:
+                chars = pattern[i:j]
+                negated = chars[0] == '!'
+                if negated:
+                    chars = chars[1:]
+                # Escape characters that are special inside regex sets
+                chars = re.sub(r'([\\\[\]^&~|])', r'\\\1', chars)
+                parts.append(f"[{'^' if negated else ''}{chars}]")
+                i = j + 1
+        else:
+            parts.append(re.escape(char))
+
+    return ''.join(parts)
+
+
+class PathMatcher:
+    """
+    Match relative paths against a list of glob patterns in one regex call.
+
+    Example:
+        matcher = PathMatcher(['test_*', 'build/', 'src/legacy/**', '!src/legacy/keep.py'])
+        matcher.match('pkg/test_io.py')            # True
+        matcher.match('src/legacy/keep.py')        # False (negated)
+        matcher.match('out/build', is_dir=True)    # True
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Compile patterns.
+
+        Args:
+            patterns: Glob patterns, in priority order (later patterns win).
+        """
+        self.patterns: List[str] = [p.strip() for p in patterns if p and p.strip()]
+
+        file_rules: List[Tuple[str, bool, bool]] = []
+        dir_rules: List[Tuple[str, bool, bool]] = []
+        for pattern in self.patterns:
+            negated = pattern.startswith('!')
+            if negated:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            if not pattern:
+                continue
+
+            # Patterns without '/' match the last segment at any depth
+            anchored = '/' in pattern
+            rule = (_translate_glob(pattern.lstrip('/')), anchored, negated)
+            dir_rules.append(rule)
+            if not dir_only:
+                file_rules.append(rule)
+
+        self._file_regex, self._file_negated = self._combine(file_rules)
+        self._dir_regex, self._dir_negated = self._combine(dir_rules)
+
+    @staticmethod
+    def _combine(rules: List[Tuple[str, bool, bool]]) -> Tuple[Optional[Pattern], Tuple[bool, ...]]:
+        """
+        Combine rules into one alternation, last rule first.
+
+        Alternatives are tried in order, so the group that matches is the
+        last matching pattern; its negation flag decides the result. Runs
+        of unanchored rules share one ``(?:.*/)?`` prefix, so the segment
+        split is found once rather than once per pattern.
+        """
+        if not rules:
+            return None, ()
+
+        rules = rules[::-1]
+        branches: List[str] = []
+        run: List[str] = []
+        for regex, anchored, _ in rules:
+            if anchored:
+                if run:
+                    branches.append('(?:.*/)?(?:' + '|'.join(run) + ')')
+                    run = []
+                branches.append(f'({regex})')
+            else:
+                run.append(f'({regex})')
+        if run:
+            branches.append('(?:.*/)?(?:' + '|'.join(run) + ')')
+
+        combined = re.compile('(?:' + '|'.join(branches) + r')\Z', re.DOTALL)
+        return combined, (False,) + tuple(negated for _, _, negated in rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def __repr__(self) -> str:
+        return f"PathMatcher({self.patterns!r})"
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """
+        Check whether a '/'-separated relative path (or a name) matches.
+
+        Args:
+            path: Relative path, file name or dotted module name.
+            is_dir: Whether the path is a directory (enables patterns
+                    ending in ``/``).
+
+        Returns:
+            True if the last matching pattern is not negated.
+        """
+        if not path:
+            return False
+
+        regex = self._dir_regex if is_dir else self._file_regex
+        if regex is None:
+            return False
+
+        found = regex.match(path)
+        if found is None:
+            return False
+
+        negated = self._dir_negated if is_dir else self._file_negated
+        return not negated[found.lastindex]
+
+
+@lru_cache(maxsize=64)
+def _compile_patterns(patterns: Tuple[str, ...]) -> PathMatcher:
+    return PathMatcher(patterns)
+
+
+def compile_patterns(patterns: Optional[Iterable[str]]) -> PathMatcher:
+    """
+    Get a (cached) PathMatcher for a pattern list.
+
+    Matchers are cached by pattern tuple, so callers that receive the same
+    configured patterns on every call (e.g. per docstring) compile them once.
+    """
+    return _compile_patterns(tuple(patterns or ()))
@@ -8,6 +8,8 @@ reStructuredText format with custom directives and formatting.
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from .diagram_generator import DEFAULT_MAX_NODES, MermaidDiagramBuilder, use_clustered_diagram
+
 
 class WorkflowRSTGenerator:
     """Generate RST documentation from workflow structure."""
@@ -24,6 +26,8 @@ class WorkflowRSTGenerator:
         self.collapse_substeps = config.get('collapse_substeps', True)
         self.show_function_calls = config.get('show_function_calls', True)
         self.max_substep_depth = config.get('max_substep_depth', 3)
+        self.diagram_mode = config.get('diagram_mode', 'auto')
+        self.diagram_max_nodes = config.get('diagram_max_nodes', DEFAULT_MAX_NODES)
         self._current_module_name = ''  # Module name for source linking
     
     def generate_module_rst(
@@ -177,6 +181,13 @@ class WorkflowRSTGenerator:
         
         lines.append(".. rubric:: Workflow Diagram")
         lines.append("")
+        
+        # Large workflows get a node-capped diagram with drill-down sub-diagrams
+        if use_clustered_diagram(steps, self.diagram_mode, self.diagram_max_nodes):
+            builder = MermaidDiagramBuilder(self.diagram_max_nodes)
+            lines.extend(builder.build_rst(steps, self._current_module_name))
+            return lines
+        
         lines.append(".. mermaid::")
         lines.append("")
         lines.append("   graph TD")
@@ -9,20 +9,40 @@ The generated source pages feature:
 - Syntax highlighting via Pygments
 - Step anchors for direct linking
 - Line highlighting when navigating to steps
+- Viewport-only rendering of very large modules
+
+Pages are independent of each other, so they can be generated in a
+process pool (see ``workflow_source_workers``). A manifest in the output
+directory records what each page was generated from, so unchanged pages
+are skipped on the next build.
 """
 
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any
+from typing import Callable, Dict, Iterator, List, Optional, Set, Any, TextIO, Tuple
+import hashlib
+import json
 import logging
 import html
+import os
+import re
+import zlib
+
+try:
+    from sphinx.util.display import status_iterator
+except ImportError:  # Sphinx < 7.2
+    from sphinx.util import status_iterator
 
 try:
     from pygments import highlight
     from pygments.lexers import PythonLexer
     from pygments.formatters import HtmlFormatter
+    from pygments import __version__ as PYGMENTS_VERSION
     PYGMENTS_AVAILABLE = True
 except ImportError:
     PYGMENTS_AVAILABLE = False
+    PYGMENTS_VERSION = None
 
 logger = logging.getLogger(__name__)
 
@@ -70,20 +90,150 @@ def collect_all_source_files(hierarchical_steps: List[Any]) -> Dict[str, Set[str
     return source_files
 
 
+def step_anchor(number: str, function: str = '') -> str:
+    """
+    Page anchor of a step on its module's source page.
+    
+    E.g. 'step-1-2' for step 1.2, or 'step-run-1-2' for step 1.2 of
+    function ``run``. Functions of a module may share step numbers, so
+    links that know the function use the qualified anchor.
+    """
+    anchor = f"step-{number.replace('.', '-')}"
+    if function:
+        anchor = f"step-{re.sub(r'[^A-Za-z0-9_]+', '-', function)}-{anchor[5:]}"
+    return anchor
+
+
+def _step_anchor_spans(step_ids: List[str]) -> str:
+    """Render the anchor elements placed before a step's source line."""
+    return ''.join(f'<span id="{step_id}" class="step-anchor"></span>' for step_id in step_ids)
+
+
+def _count_source_lines(source: str) -> int:
+    """Count the lines Pygments formats for source (newlines normalized, one ensured at the end)."""
+    source = source.replace('\r\n', '\n').replace('\r', '\n')
+    return source.count('\n') + (not source.endswith('\n'))
+
+
+if PYGMENTS_AVAILABLE:
+    class StepAnchorHtmlFormatter(HtmlFormatter):
+        """
+        HtmlFormatter that places step anchors while formatting.
+        
+        Each step anchor is inserted into its code line as the line is
+        formatted, right before the ``line-N`` anchor Pygments adds, so it
+        lands on the step's source line rather than on a wrapper line.
+        Pieces are written to the output file as they are produced: with
+        ``line_count`` given, the line-number column is emitted up front
+        instead of buffering the whole code column first.
+        
+        Options besides HtmlFormatter's:
+            step_anchors: Line number to the step IDs anchored there
+            line_count: Number of source lines, for the line-number column
+            code_lines: Formatted lines from an earlier run (formatted_lines);
+                        they are used as-is and the token stream is not read
+            record: Keep the formatted lines in formatted_lines, for caching
+        """
+        
+        def __init__(self, **options):
+            self.step_anchors = options.pop('step_anchors', None) or {}
+            self.code_lines = options.pop('code_lines', None)
+            self.line_count = options.pop('line_count', None)
+            if self.code_lines is not None:
+                self.line_count = len(self.code_lines)
+            self.formatted_lines = [] if options.pop('record', False) else None
+            super().__init__(**options)
+        
+        def _format_lines(self, tokensource):
+            if self.code_lines is not None:
+                for line in self.code_lines:
+                    yield 1, line + '\n'
+                return
+            for t, line in super()._format_lines(tokensource):
+                if self.formatted_lines is not None:
+                    self.formatted_lines.append(line[:-1] if line.endswith('\n') else line)
+                yield t, line
+        
+        def iter_code_lines(self, tokensource):
+            """Yield the HTML of each code line, without wrappers or anchors."""
+            for _, line in self._format_lines(tokensource):
+                yield line[:-1] if line.endswith('\n') else line
+        
+        def wrap(self, source):
+            return super().wrap(self._wrap_step_anchors(source))
+        
+        def _wrap_step_anchors(self, inner):
+            line_no = self.linenostart - 1
+            for t, line in inner:
+                if t:
+                    line_no += 1
+                    step_ids = self.step_anchors.get(line_no)
+                    if step_ids:
+                        line = _step_anchor_spans(step_ids) + line
+                yield t, line
+        
+        def _wrap_tablelinenos(self, inner):
+            if self.line_count is None:
+                yield from super()._wrap_tablelinenos(inner)
+                return
+            # Render the table around empty lines, then stream the code into its cell
+            table = list(super()._wrap_tablelinenos((1, '') for _ in range(self.line_count)))
+            empty_cell = next(i for i, (_, piece) in enumerate(table) if piece == '')
+            yield from table[:empty_cell]
+            yield from inner
+            yield from table[empty_cell + 1:]
+
+
 class SourceHTMLGenerator:
     """Generate browsable HTML source files with step anchors."""
     
-    def __init__(self, output_dir: Path, config: Optional[Dict] = None):
+    TEMPLATE_VERSION = 6
+    """Bump whenever the page markup changes, so cached pages are regenerated."""
+    
+    STATIC_DIR = Path(__file__).parent / 'static'
+    """Package directory holding the page stylesheet and script."""
+    
+    LEXER_OPTIONS = {
+        'stripnl': False,  # Keep leading blank lines, so line N is source line N
+    }
+    """PythonLexer options for source pages."""
+    
+    HIGHLIGHT_OPTIONS = {
+        'linenos': True,
+        'linenostart': 1,
+        'cssclass': 'source',
+        'anchorlinenos': True,
+        'lineanchors': 'line',
+    }
+    """HtmlFormatter options for source pages."""
+    
+    VIRTUAL_CHUNK_LINES = 1000
+    """Lines per JSON chunk of a virtualized page."""
+    
+    def __init__(
+        self,
+        output_dir: Path,
+        config: Optional[Dict] = None,
+        highlight_cache: Optional['HighlightCache'] = None
+    ):
         """
         Initialize source HTML generator.
         
         Args:
             output_dir: Build output directory (e.g., _build/html)
-            config: Optional configuration dict
+            config: Optional configuration dict; 'virtual_lines' sets the
+                    line count above which pages are virtualized (0 = never)
+            highlight_cache: Persistent cache of Pygments output (optional)
         """
         self.output_dir = Path(output_dir)
         self.modules_dir = self.output_dir / '_modules'
         self.config = config or {}
+        self.highlight_cache = highlight_cache
+        
+        # Shared page assets: key -> content-hashed file name, and name -> content
+        self._assets: Optional[Dict[str, str]] = None
+        self._asset_data: Dict[str, bytes] = {}
+        self._assets_written = False
         
     def generate_source_html(
         self, 
@@ -91,7 +241,8 @@ class SourceHTMLGenerator:
         module_name: str,
         step_line_map: Optional[Dict[str, int]] = None,
         step_data: Optional[Dict[str, Dict]] = None,
-        module_paths: Optional[Dict[str, str]] = None
+        module_paths: Optional[Dict[str, str]] = None,
+        navigation: Optional['StepNavigation'] = None
     ) -> Optional[Path]:
         """
         Generate HTML source file with syntax highlighting and step anchors.
@@ -104,6 +255,7 @@ class SourceHTMLGenerator:
             step_data: Full step data for navigation (optional)
                       e.g., {step_id: {'line': int, 'name': str, 'number': str, 'module': str}}
             module_paths: Mapping of module names to their HTML file paths for cross-linking
+            navigation: Prebuilt navigation for step_data, shared across pages
         
         Returns:
             Path to generated HTML file, or None if generation failed
@@ -121,25 +273,27 @@ class SourceHTMLGenerator:
         self._module_paths = module_paths
         
         try:
+            if not self._assets_written:
+                self.write_static_assets()
+            
             # Read source
             with open(module_path, 'r', encoding='utf-8') as f:
                 source = f.read()
             
-            # Generate HTML with syntax highlighting
-            html_content = self._generate_highlighted_html(
-                source, 
-                module_name, 
-                step_line_map,
-                step_data
-            )
-            
             # Determine output path
             output_path = self._get_output_path(module_name)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write HTML file
+            # Stream the highlighted page into the HTML file
             with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+                self._write_highlighted_html(
+                    f,
+                    source, 
+                    module_name, 
+                    step_line_map,
+                    step_data,
+                    navigation
+                )
             
             logger.info(f"Generated source HTML: {output_path}")
             return output_path
@@ -148,104 +302,220 @@ class SourceHTMLGenerator:
             logger.error(f"Error generating source HTML for {module_name}: {e}")
             return None
     
+    def render_key(self) -> str:
+        """
+        Describe everything besides the inputs that affects page output.
+        
+        Covers the template version, the Pygments version and style, the
+        shared asset names and the virtualization threshold, so changing
+        any of them invalidates the source page manifest.
+        """
+        style = HtmlFormatter().style.__name__ if PYGMENTS_AVAILABLE else None
+        assets = ','.join(sorted(self.static_assets().values()))
+        return (
+            f"template={self.TEMPLATE_VERSION};pygments={PYGMENTS_VERSION};style={style};assets={assets};"
+            f"virtual={self.config.get('virtual_lines', 0)}"
+        )
+    
+    def static_assets(self) -> Dict[str, str]:
+        """
+        Get the content-hashed ``_static`` file names of the shared page assets.
+        
+        The page stylesheet and script and the Pygments style definitions
+        are the same for every page, so pages link to them instead of
+        inlining them. They are computed once per generator; the hash in
+        each name lets browsers cache them across pages and builds.
+        
+        Returns:
+            Mapping of 'page_css', 'page_js' and (with Pygments)
+            'pygments_css' to file names in ``_static``
+        """
+        if self._assets is None:
+            contents = {
+                'page_css': ('source_page', '.css', (self.STATIC_DIR / 'source_page.css').read_bytes()),
+                'page_js': ('source_page', '.js', (self.STATIC_DIR / 'source_page.js').read_bytes()),
+            }
+            if PYGMENTS_AVAILABLE:
+                style_defs = HtmlFormatter().get_style_defs('.source') + '\n'
+                contents['pygments_css'] = ('source_pygments', '.css', style_defs.encode('utf-8'))
+            
+            self._assets = {}
+            for key, (stem, suffix, data) in contents.items():
+                self.add_static_asset(key, stem, suffix, data)
+        return self._assets
+    
+    def add_static_asset(self, key: str, stem: str, suffix: str, data: bytes) -> str:
+        """
+        Add a generated shared asset, such as the step navigation index.
+        
+        It gets a content-hashed name like the page stylesheet and script,
+        is written (and its stale versions removed) by write_static_assets,
+        and its name is part of the render key.
+        
+        Returns:
+            The asset's file name in ``_static``
+        """
+        if self._assets is None:
+            self.static_assets()
+        previous = self._assets.get(key)
+        if previous is not None:
+            self._asset_data.pop(previous, None)
+        name = f"{stem}.{hashlib.sha1(data).hexdigest()[:10]}{suffix}"
+        self._assets[key] = name
+        self._asset_data[name] = data
+        self._assets_written = False
+        return name
+    
+    def write_static_assets(self) -> Dict[str, str]:
+        """
+        Write the shared page assets to ``_static`` if they are missing.
+        
+        Names are content-hashed, so an existing file is already current.
+        Files of earlier versions of the assets (same name, other hash)
+        are removed; the render key includes the asset names, so no page
+        generated from it links to them.
+        
+        Returns:
+            The asset names, as static_assets()
+        """
+        assets = self.static_assets()
+        static_dir = self.output_dir / '_static'
+        static_dir.mkdir(parents=True, exist_ok=True)
+        for name, data in self._asset_data.items():
+            asset_path = static_dir / name
+            if not asset_path.exists():
+                asset_path.write_bytes(data)
+            
+            stem, _, suffix = name.split('.')
+            stale = re.compile(rf'{re.escape(stem)}\.[0-9a-f]{{10}}\.{re.escape(suffix)}')
+            for old_path in static_dir.glob(f'{stem}.*.{suffix}'):
+                if old_path.name != name and stale.fullmatch(old_path.name):
+                    try:
+                        old_path.unlink()
+                    except OSError as e:
+                        logger.warning(f"Could not remove stale asset {old_path}: {e}")
+        self._assets_written = True
+        return assets
+    
     def _get_output_path(self, module_name: str) -> Path:
         """Get output path for module source HTML."""
         # Convert module name to path: elastic_net_modules.data_loading -> elastic_net_modules/data_loading.html
         parts = module_name.split('.')
         return self.modules_dir / '/'.join(parts[:-1]) / f"{parts[-1]}.html" if len(parts) > 1 else self.modules_dir / f"{parts[0]}.html"
     
-    def _generate_highlighted_html(
+    def _write_highlighted_html(
         self, 
+        outfile: TextIO,
         source: str, 
         module_name: str,
         step_line_map: Dict[str, int],
-        step_data: Optional[Dict[str, Dict]] = None
-    ) -> str:
+        step_data: Optional[Dict[str, Dict]] = None,
+        navigation: Optional['StepNavigation'] = None
+    ) -> None:
         """
-        Generate HTML with syntax highlighting and step anchors.
+        Write the HTML page with syntax highlighting and step anchors.
         
         Args:
+            outfile: Text file to write the complete HTML document to
             source: Python source code
             module_name: Module name for title
             step_line_map: Step ID to line number mapping
             step_data: Full step data for navigation
-        
-        Returns:
-            Complete HTML document
+            navigation: Prebuilt navigation for step_data
         """
         step_data = step_data or {}
         
         # Create reverse mapping: line_number -> step_id
-        line_to_step = {line: step_id for step_id, line in step_line_map.items()}
+        line_to_step: Dict[int, List[str]] = {}
+        for step_id, line in step_line_map.items():
+            line_to_step.setdefault(line, []).append(step_id)
+        
+        # Very large modules are rendered lazily around the viewport
+        virtual_lines = self.config.get('virtual_lines', 0)
+        virtual = bool(virtual_lines) and _count_source_lines(source) > virtual_lines
         
+        head, tail = self._build_html_document(module_name, step_line_map, step_data, navigation)
+        outfile.write(head)
         if PYGMENTS_AVAILABLE:
             # Use Pygments for syntax highlighting
-            html_lines = self._highlight_with_pygments(source, line_to_step)
+            self._highlight_with_pygments(source, line_to_step, outfile, virtual)
         else:
             # Fallback: basic HTML escaping
-            html_lines = self._basic_highlight(source, line_to_step)
-        
-        # Build complete HTML document
-        return self._build_html_document(module_name, html_lines, step_line_map, step_data)
+            self._basic_highlight(source, line_to_step, outfile, virtual)
+        outfile.write(tail)
     
     def _highlight_with_pygments(
         self, 
         source: str, 
-        line_to_step: Dict[int, str]
-    ) -> List[str]:
+        line_to_step: Dict[int, List[str]],
+        outfile: TextIO,
+        virtual: bool = False
+    ) -> None:
         """
-        Generate syntax-highlighted HTML lines using Pygments.
+        Write syntax-highlighted HTML using Pygments.
+        
+        Step anchors are placed by StepAnchorHtmlFormatter while the
+        source is formatted, and the formatter writes straight to outfile.
         
         Args:
             source: Python source code
-            line_to_step: Line number to step ID mapping
-        
-        Returns:
-            List of HTML lines
+            line_to_step: Line number to step IDs mapping
+            outfile: Text file to write the highlighted HTML to
+            virtual: Write the lines as chunks for the virtualized view
         """
-        lexer = PythonLexer()
-        formatter = HtmlFormatter(
-            linenos=True,
-            linenostart=1,
-            cssclass='source',
-            anchorlinenos=True,
-            lineanchors='line'
+        lexer = PythonLexer(**self.LEXER_OPTIONS)
+        
+        # Unchanged sources are served from the cache without lexing
+        cache_key = None
+        code_lines = None
+        if self.highlight_cache is not None:
+            cache_key = self.highlight_cache.key(
+                source, lexer.name, {**self.LEXER_OPTIONS, **self.HIGHLIGHT_OPTIONS}
+            )
+            code_lines = self.highlight_cache.get(cache_key)
+        
+        formatter = StepAnchorHtmlFormatter(
+            step_anchors=line_to_step,
+            code_lines=code_lines,
+            line_count=_count_source_lines(source),
+            record=cache_key is not None and code_lines is None,
+            **self.HIGHLIGHT_OPTIONS
         )
+        tokens = iter(()) if code_lines is not None else None  # Nothing to lex
+        if virtual:
+            if tokens is None:
+                tokens = lexer.get_tokens(source)
+            self._write_virtual_source(
+                outfile, formatter.iter_code_lines(tokens), formatter.line_count, line_to_step
+            )
+        elif tokens is None:
+            highlight(source, lexer, formatter, outfile)
+        else:
+            formatter.format(tokens, outfile)
         
-        # Generate highlighted HTML
-        highlighted = highlight(source, lexer, formatter)
-        
-        # Inject step anchors into the HTML
-        html_lines = highlighted.split('\n')
-        result_lines = []
-        
-        for i, line in enumerate(html_lines, 1):
-            if i in line_to_step:
-                step_id = line_to_step[i]
-                # Add step anchor span before the line
-                anchor = f'<span id="{step_id}" class="step-anchor"></span>'
-                line = anchor + line
-            result_lines.append(line)
-        
-        return result_lines
+        if formatter.formatted_lines is not None:
+            self.highlight_cache.put(cache_key, formatter.formatted_lines)
     
     def _basic_highlight(
         self, 
         source: str, 
-        line_to_step: Dict[int, str]
-    ) -> List[str]:
+        line_to_step: Dict[int, List[str]],
+        outfile: TextIO,
+        virtual: bool = False
+    ) -> None:
         """
-        Generate basic HTML without Pygments (fallback).
+        Write basic HTML without Pygments (fallback).
         
         Args:
             source: Python source code  
-            line_to_step: Line number to step ID mapping
-        
-        Returns:
-            List of HTML lines
+            line_to_step: Line number to step IDs mapping
+            outfile: Text file to write the HTML lines to
+            virtual: Write the lines as chunks for the virtualized view
         """
         lines = source.split('\n')
-        html_lines = []
+        if virtual:
+            self._write_virtual_source(outfile, map(html.escape, lines), len(lines), line_to_step)
+            return
         
         for i, line in enumerate(lines, 1):
             escaped = html.escape(line)
@@ -255,24 +525,75 @@ class SourceHTMLGenerator:
             anchor = ''
             css_class = 'line'
             if i in line_to_step:
-                step_id = line_to_step[i]
-                anchor = f'<span id="{step_id}" class="step-anchor"></span>'
+                anchor = _step_anchor_spans(line_to_step[i])
                 css_class += ' step-line'
             
             html_line = f'{anchor}<span id="{line_id}" class="{css_class}"><span class="lineno">{i:4d}</span> <code>{escaped}</code></span>'
-            html_lines.append(html_line)
+            if i > 1:
+                outfile.write('\n')
+            outfile.write(html_line)
+    
+    def _write_virtual_source(
+        self,
+        outfile: TextIO,
+        lines: Iterator[str],
+        line_count: int,
+        line_to_step: Dict[int, List[str]]
+    ) -> None:
+        """
+        Write the source as a virtualized view for very large modules.
         
-        return html_lines
+        Instead of one element per line, the page holds a spacer as tall
+        as the whole source, the step anchors positioned at their lines,
+        and the highlighted lines as JSON chunks in inert script elements.
+        source_page.js renders only the rows around the viewport. Step
+        anchors are real elements, so ``#step-...`` links jump without
+        waiting for the lines; ``#line-N`` is resolved by the script.
+        
+        Args:
+            outfile: Text file to write the view to
+            lines: Highlighted HTML of each line, without newlines
+            line_count: Number of lines
+            line_to_step: Line number to step IDs mapping
+        """
+        chunk_lines = self.VIRTUAL_CHUNK_LINES
+        outfile.write(
+            f'<div class="virtual-source" data-lines="{line_count}" data-chunk-lines="{chunk_lines}" '
+            f'style="height: calc({line_count} * var(--source-line-height))">\n'
+        )
+        for line, step_ids in sorted(line_to_step.items()):
+            if 1 <= line <= line_count:
+                outfile.writelines(
+                    f'<span id="{step_id}" class="step-anchor" data-line="{line}" '
+                    f'style="top: calc({line - 1} * var(--source-line-height))"></span>\n'
+                    for step_id in step_ids
+                )
+        outfile.write('<div class="virtual-lines"></div>\n')
+        
+        def write_chunk(chunk: List[str]) -> None:
+            # Escaping '<' keeps '</script>' in the source from ending the element
+            data = json.dumps(chunk, ensure_ascii=False).replace('<', '\\u003c')
+            outfile.write(f'<script type="application/json" class="source-chunk">{data}</script>\n')
+        
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                write_chunk(chunk)
+                chunk = []
+        if chunk:
+            write_chunk(chunk)
+        outfile.write('<noscript>This module is too large to display without JavaScript.</noscript>\n</div>')
     
     def _build_html_document(
         self, 
         module_name: str, 
-        html_lines: List[str],
         step_line_map: Dict[str, int],
-        step_data: Optional[Dict[str, Dict]] = None
-    ) -> str:
+        step_data: Optional[Dict[str, Dict]] = None,
+        navigation: Optional['StepNavigation'] = None
+    ) -> Tuple[str, str]:
         """
-        Build complete HTML document with 2-column layout.
+        Build the HTML document with 2-column layout around the source.
         
         Layout:
         - Left column (250px): Step navigation with links
@@ -280,23 +601,19 @@ class SourceHTMLGenerator:
         
         Args:
             module_name: Module name for title
-            html_lines: Highlighted HTML lines
             step_line_map: Step ID to line number mapping
             step_data: Full step data for navigation
+            navigation: Prebuilt navigation for step_data
         
         Returns:
-            Complete HTML document string
+            (head, tail): the document before and after the highlighted source
         """
         step_data = step_data or {}
         
-        # Get Pygments CSS if available
-        pygments_css = ""
-        if PYGMENTS_AVAILABLE:
-            formatter = HtmlFormatter()
-            pygments_css = formatter.get_style_defs('.source')
-        
         # Build step navigation items - use step_data if available, else convert from step_line_map
-        if step_data:
+        if navigation is not None:
+            step_nav_items = navigation.render(module_name, self.static_assets().get('nav_index'))
+        elif step_data:
             step_nav_items = self._build_step_navigation_items(step_data)
         else:
             # Convert step_line_map to step_data format for backward compat
@@ -306,502 +623,24 @@ class SourceHTMLGenerator:
             }
             step_nav_items = self._build_step_navigation_items(legacy_data)
         
-        content = '\n'.join(html_lines)
-        
         # Calculate relative path to _static based on module depth
         module_depth = module_name.count('.') + 1
         static_prefix = '../' * module_depth
         
-        return f'''<!DOCTYPE html>
+        # Shared stylesheets (Pygments CSS if available) and script
+        assets = self.static_assets()
+        head_links = ''.join(
+            f'\n    <link rel="stylesheet" href="{static_prefix}_static/{assets[key]}">'
+            for key in ('pygments_css', 'page_css') if key in assets
+        )
+        
+        head = f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Source: {module_name}</title>
-    <style>
-        {pygments_css}
-        
-        * {{
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-            margin: 0;
-            padding: 0;
-            background: #fafafa;
-            height: 100vh;
-            overflow: hidden;
-        }}
-        
-        /* Header bar */
-        .source-header {{
-            background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
-            color: white;
-            padding: 12px 20px;
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            z-index: 100;
-            height: 50px;
-        }}
-        
-        .source-header h1 {{
-            margin: 0;
-            font-size: 1.1em;
-            font-weight: 500;
-        }}
-        
-        .source-header .module-path {{
-            color: #bdc3c7;
-            font-family: monospace;
-            font-size: 0.9em;
-        }}
-        
-        .back-link {{
-            color: #3498db;
-            text-decoration: none;
-            font-size: 0.9em;
-            padding: 6px 12px;
-            background: rgba(255,255,255,0.1);
-            border-radius: 4px;
-            transition: background 0.2s;
-        }}
-        
-        .back-link:hover {{
-            background: rgba(255,255,255,0.2);
-            color: white;
-        }}
-        
-        /* Main 2-column layout */
-        .main-container {{
-            display: flex;
-            margin-top: 50px;
-            height: calc(100vh - 50px);
-        }}
-        
-        /* Left column - Step Navigation */
-        .step-nav-column {{
-            width: 350px;
-            min-width: 350px;
-            background: #fff;
-            border-right: 1px solid #e0e0e0;
-            overflow-y: auto;
-            padding: 15px;
-        }}
-        
-        .step-nav-header {{
-            font-size: 0.85em;
-            font-weight: 600;
-            color: #666;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-bottom: 12px;
-            padding-bottom: 8px;
-            border-bottom: 2px solid #3498db;
-        }}
-        
-        .step-nav-list {{
-            list-style: none;
-            padding: 0;
-            margin: 0;
-        }}
-        
-        .step-nav-list li {{
-            margin: 0;
-        }}
-        
-        .step-nav-list a {{
-            display: block;
-            padding: 8px 12px;
-            color: #333;
-            text-decoration: none;
-            border-radius: 4px;
-            font-size: 0.9em;
-            transition: all 0.15s;
-            border-left: 3px solid transparent;
-        }}
-        
-        .step-nav-list a:hover {{
-            background: #e3f2fd;
-            color: #1976d2;
-            border-left-color: #1976d2;
-        }}
-        
-        .step-nav-list a.active {{
-            background: #bbdefb;
-            color: #0d47a1;
-            border-left-color: #0d47a1;
-            font-weight: 500;
-        }}
-        
-        .step-nav-list .step-number {{
-            display: block;
-            font-size: 0.75em;
-            color: #666;
-            font-weight: 600;
-            letter-spacing: 0.3px;
-        }}
-        
-        .step-nav-list .step-name {{
-            display: block;
-            font-weight: 500;
-            margin-top: 2px;
-            line-height: 1.3;
-        }}
-        
-        .step-nav-list .step-meta {{
-            display: flex;
-            justify-content: space-between;
-            margin-top: 4px;
-            font-size: 0.75em;
-            color: #888;
-        }}
-        
-        .step-nav-list .step-module {{
-            font-style: italic;
-            color: #2196f3;
-        }}
-        
-        .step-nav-list .step-line {{
-            font-family: monospace;
-            color: #888;
-        }}
-        
-        /* Hierarchical step navigation */
-        .step-nav-list .step-parent {{
-            margin-bottom: 2px;
-            width: 100%;
-        }}
-        
-        .step-nav-list .step-parent-header {{
-            display: flex;
-            align-items: flex-start;
-            width: 100%;
-        }}
-        
-        .step-nav-list .step-parent-header > a {{
-            flex: 1;
-            width: 100%;
-        }}
-        
-        .step-nav-list .toggle-btn {{
-            background: none;
-            border: none;
-            cursor: pointer;
-            padding: 6px 6px 6px 0;
-            font-size: 0.7em;
-            color: #666;
-            transition: transform 0.2s;
-            flex-shrink: 0;
-            width: 18px;
-        }}
-        
-        .step-nav-list .toggle-btn:hover {{
-            color: #1976d2;
-        }}
-        
-        .step-nav-list .toggle-btn.collapsed {{
-            transform: rotate(-90deg);
-        }}
-        
-        .step-nav-list .substeps {{
-            list-style: none;
-            padding-left: 20px;
-            margin: 0;
-            overflow: hidden;
-            transition: max-height 0.3s ease-out;
-            width: 100%;
-        }}
-        
-        .step-nav-list .substeps.collapsed {{
-            max-height: 0 !important;
-        }}
-        
-        .step-nav-list .substeps li {{
-            width: 100%;
-        }}
-        
-        .step-nav-list .substeps li a {{
-            padding: 5px 10px;
-            font-size: 0.85em;
-            border-left: 2px solid #e0e0e0;
-            margin-left: 4px;
-            width: 100%;
-            box-sizing: border-box;
-        }}
-        
-        .step-nav-list .substeps li a:hover {{
-            border-left-color: #1976d2;
-        }}
-        
-        /* Step dividers between major steps */
-        .step-divider {{
-            border: none;
-            border-top: 1px solid #e0e0e0;
-            margin: 10px 0;
-        }}
-        
-        /* Right column - Source Code */
-        .source-column {{
-            flex: 1;
-            overflow: auto;
-            background: #fff;
-        }}
-        
-        .source-container {{
-            min-width: 100%;
-        }}
-        
-        .source {{
-            font-family: "SF Mono", "Monaco", "Inconsolata", "Fira Mono", "Consolas", monospace;
-            font-size: 13px;
-            line-height: 1.6;
-            padding: 0;
-            margin: 0;
-        }}
-        
-        /* Line styling */
-        .line {{
-            display: block;
-            padding: 0 15px 0 0;
-            white-space: pre;
-            min-height: 1.6em;
-        }}
-        
-        .lineno {{
-            display: inline-block;
-            width: 50px;
-            color: #999;
-            text-align: right;
-            padding-right: 15px;
-            margin-right: 15px;
-            border-right: 1px solid #eee;
-            user-select: none;
-            background: #fafafa;
-        }}
-        
-        /* Step anchor and highlighting */
-        .step-anchor {{
-            display: block;
-            height: 0;
-            position: relative;
-            scroll-margin-top: 70px;
-        }}
-        
-        /* Scroll offset for line anchors */
-        .line, [id^="line-"] {{
-            scroll-margin-top: 70px;
-        }}
-        
-        /* Highlighted step line */
-        .step-line {{
-            background: #fffde7;
-        }}
-        
-        .step-line .lineno {{
-            background: #fff9c4;
-            color: #f57f17;
-            font-weight: 600;
-        }}
-        
-        /* Target highlighting (when navigating to anchor) */
-        :target,
-        .step-anchor:target + .line,
-        .line:target {{
-            background: #fff59d !important;
-            animation: highlight-flash 2s ease-out;
-        }}
-        
-        :target .lineno,
-        .step-anchor:target + .line .lineno {{
-            background: #ffee58 !important;
-            color: #e65100 !important;
-        }}
-        
-        @keyframes highlight-flash {{
-            0% {{ background: #ffeb3b; }}
-            100% {{ background: #fff59d; }}
-        }}
-        
-        /* Clicked/active line highlighting */
-        .line.highlighted {{
-            background: #fff59d !important;
-            animation: highlight-flash 2s ease-out;
-        }}
-        
-        .line.highlighted .lineno {{
-            background: #ffee58 !important;
-            color: #e65100 !important;
-        }}
-        
-        /* Highlight for Pygments table layout */
-        .highlighted,
-        tr.highlighted,
-        td.highlighted,
-        span.highlighted {{
-            background: #fff59d !important;
-            animation: highlight-flash 2s ease-out;
-        }}
-        
-        /* Highlight the entire source table row */
-        .source tr.highlighted td {{
-            background: #fff59d !important;
-        }}
-        
-        .source tr.highlighted td.linenos {{
-            background: #ffee58 !important;
-        }}
-        
-        /* No steps message */
-        .no-steps-message {{
-            padding: 20px;
-            color: #666;
-            font-style: italic;
-            text-align: center;
-        }}
-        
-        /* Responsive - collapse nav on small screens */
-        @media (max-width: 768px) {{
-            .step-nav-column {{
-                display: none;
-            }}
-        }}
-    </style>
-    <script>
-        // Highlight active step in navigation and source line when clicking
-        document.addEventListener('DOMContentLoaded', function() {{
-            const navLinks = document.querySelectorAll('.step-nav-list a[href^="#"]');
-            const toggleBtns = document.querySelectorAll('.toggle-btn');
-            let highlightedLine = null;
-            
-            // Toggle collapse/expand for substeps
-            toggleBtns.forEach(btn => {{
-                btn.addEventListener('click', function(e) {{
-                    e.stopPropagation();
-                    const substeps = this.closest('.step-parent').querySelector('.substeps');
-                    if (substeps) {{
-                        this.classList.toggle('collapsed');
-                        substeps.classList.toggle('collapsed');
-                    }}
-                }});
-            }});
-            
-            // Function to highlight a source line
-            function highlightSourceLine(stepId) {{
-                // Remove previous highlight
-                if (highlightedLine) {{
-                    highlightedLine.classList.remove('highlighted');
-                }}
-                
-                // Find the step anchor
-                const anchor = document.getElementById(stepId);
-                if (!anchor) return;
-                
-                // Strategy 1: Look for Pygments line structure
-                // Pygments creates: <span id="line-N"> containing a link <a href="#line-N">
-                // The actual line content is in the same container or sibling
-                
-                // Try to find the parent table row or line container
-                let lineElement = anchor.closest('tr, .line, pre > span');
-                
-                // Strategy 2: If anchor is step-anchor class, find associated line
-                if (!lineElement && anchor.classList.contains('step-anchor')) {{
-                    // Look at parent or next sibling
-                    lineElement = anchor.parentElement;
-                    if (lineElement && lineElement.tagName === 'PRE') {{
-                        // Find by scrolling to anchor position
-                        lineElement = null;
-                    }}
-                }}
-                
-                // Strategy 3: For Pygments table layout, find the linenos anchor
-                if (!lineElement) {{
-                    // Look for the line number link that Pygments generates
-                    const allLineAnchors = document.querySelectorAll('a[href^="#line-"]');
-                    for (const la of allLineAnchors) {{
-                        if (la.closest('td, span') && la.textContent.trim()) {{
-                            const lineNum = parseInt(la.textContent.trim());
-                            // Check if this line number matches what we're looking for
-                            // We need to get the line number from step data
-                            const tr = la.closest('tr');
-                            if (tr) {{
-                                const cells = tr.querySelectorAll('td');
-                                if (cells.length >= 2) {{
-                                    lineElement = cells[1]; // Code cell
-                                    break;
-                                }}
-                            }}
-                        }}
-                    }}
-                }}
-                
-                // Strategy 4: Highlight by adding a visible marker
-                if (lineElement) {{
-                    lineElement.classList.add('highlighted');
-                    highlightedLine = lineElement;
-                }} else {{
-                    // Fallback: add a highlight effect to the anchor's parent container
-                    const container = anchor.parentElement;
-                    if (container) {{
-                        container.classList.add('highlighted');
-                        highlightedLine = container;
-                    }}
-                }}
-            }}
-            
-            // Handle click to highlight nav item and source line
-            navLinks.forEach(link => {{
-                link.addEventListener('click', function(e) {{
-                    // Remove active from all
-                    navLinks.forEach(l => l.classList.remove('active'));
-                    // Add active to clicked
-                    this.classList.add('active');
-                    
-                    // Highlight the target source line
-                    const stepId = this.getAttribute('href').substring(1);
-                    setTimeout(() => highlightSourceLine(stepId), 100);
-                }});
-            }});
-            
-            // Check hash on load and highlight
-            if (window.location.hash) {{
-                const hash = window.location.hash;
-                const activeLink = document.querySelector(`.step-nav-list a[href="${{hash}}"]`);
-                if (activeLink) {{
-                    activeLink.classList.add('active');
-                    // Expand ALL parent containers up the tree
-                    let parent = activeLink.closest('.substeps');
-                    while (parent) {{
-                        parent.classList.remove('collapsed');
-                        const header = parent.previousElementSibling;
-                        if (header) {{
-                            const toggleBtn = header.querySelector('.toggle-btn');
-                            if (toggleBtn) toggleBtn.classList.remove('collapsed');
-                        }}
-                        parent = parent.parentElement?.closest('.substeps');
-                    }}
-                }}
-                setTimeout(() => highlightSourceLine(hash.substring(1)), 200);
-            }}
-            
-            // Handle hash change
-            window.addEventListener('hashchange', function() {{
-                navLinks.forEach(l => l.classList.remove('active'));
-                const hash = window.location.hash;
-                const activeLink = document.querySelector(`.step-nav-list a[href="${{hash}}"]`);
-                if (activeLink) {{
-                    activeLink.classList.add('active');
-                }}
-                highlightSourceLine(hash.substring(1));
-            }});
-        }});
-    </script>
+    <title>Source: {module_name}</title>{head_links}
+    <script src="{static_prefix}_static/{assets['page_js']}"></script>
 </head>
 <body>
     <div class="source-header">
@@ -821,20 +660,23 @@ class SourceHTMLGenerator:
         <div class="source-column">
             <div class="source-container">
                 <div class="source">
-{content}
+'''
+        tail = '''
                 </div>
             </div>
         </div>
     </div>
 </body>
 </html>'''
+        return head, tail
     
     def _build_step_navigation_items(self, step_data: Dict[str, Dict]) -> str:
         """
         Build hierarchical HTML list items for step navigation.
         
-        Generates deeply nested lists with toggles at every level that has children.
-        Supports arbitrary nesting depth (1, 1.1, 1.1.1, 1.1.1.1, etc.)
+        Builds a one-off StepNavigation with every module's steps inlined;
+        when generating many pages, build it once, write its shared index
+        and pass it to generate_source_html instead.
         
         Args:
             step_data: Step ID to step info mapping
@@ -843,9 +685,237 @@ class SourceHTMLGenerator:
         Returns:
             HTML string for step navigation list
         """
-        if not step_data:
+        return StepNavigation(StepIndex.from_step_data(step_data)).render(getattr(self, '_current_module', ''))
+
+
+class StepIndex:
+    """
+    Global step index keyed by (module, function, step number).
+    
+    Steps of all modules are stored column-wise: module and function
+    names are interned in string tables and each row holds their table
+    indexes, the step number, line and name. Steps with the same key are
+    stored once (the last one added wins), so ``step-1`` of one module or
+    function never overwrites ``step-1`` of another and the index grows
+    linearly with the number of distinct steps.
+    """
+    
+    def __init__(self):
+        # String tables
+        self.modules: List[str] = []
+        self.functions: List[str] = []
+        self._module_ids: Dict[str, int] = {}
+        self._function_ids: Dict[str, int] = {}
+        
+        # Columns, one entry per step
+        self.module_ids = array('l')
+        self.function_ids = array('l')
+        self.lines = array('l')
+        self.numbers: List[str] = []
+        self.names: List[str] = []
+        
+        self._rows: Dict[Tuple[int, int, str], int] = {}
+        self._module_rows: Dict[int, List[int]] = {}
+    
+    @classmethod
+    def from_mappings(cls, mappings: Dict[str, Dict]) -> 'StepIndex':
+        """
+        Build the index from ``env.workflow_source_mappings``.
+        
+        Args:
+            mappings: Module name -> {'source_path': str, 'steps': {key: info}}
+        """
+        index = cls()
+        for module_name, mapping_data in mappings.items():
+            index.add_step_data(mapping_data.get('steps', {}), module_name)
+        return index
+    
+    @classmethod
+    def from_step_data(cls, step_data: Dict[str, Dict]) -> 'StepIndex':
+        """Build the index from one step data mapping (module taken from each step)."""
+        index = cls()
+        index.add_step_data(step_data)
+        return index
+    
+    def add_step_data(self, step_data: Dict[str, Dict], module_name: Optional[str] = None) -> None:
+        """
+        Add steps from a step data mapping.
+        
+        Args:
+            step_data: Step key to step info mapping
+                      e.g., {step_id: {'line': int, 'name': str, 'number': str,
+                                       'module': str, 'function': str}}
+            module_name: Module of all steps (else each step's own module)
+        """
+        for key, info in step_data.items():
+            number = info.get('number') or str(key).rsplit(':', 1)[-1].replace('step-', '').replace('-', '.')
+            self.add(
+                module_name if module_name is not None else info.get('source_module', info.get('module', '')),
+                info.get('function', ''),
+                str(number),
+                info.get('line', 0) or 0,
+                info.get('name', '')
+            )
+    
+    def add(self, module: str, function: str, number: str, line: int, name: str = '') -> int:
+        """Add or update a step; returns its row."""
+        module_id = self._module_ids.get(module)
+        if module_id is None:
+            module_id = self._module_ids[module] = len(self.modules)
+            self.modules.append(module)
+        function_id = self._function_ids.get(function)
+        if function_id is None:
+            function_id = self._function_ids[function] = len(self.functions)
+            self.functions.append(function)
+        
+        key = (module_id, function_id, number)
+        row = self._rows.get(key)
+        if row is not None:
+            self.lines[row] = line
+            self.names[row] = name
+            return row
+        
+        row = self._rows[key] = len(self.numbers)
+        self.module_ids.append(module_id)
+        self.function_ids.append(function_id)
+        self.lines.append(line)
+        self.numbers.append(number)
+        self.names.append(name)
+        self._module_rows.setdefault(module_id, []).append(row)
+        return row
+    
+    def __len__(self) -> int:
+        return len(self.numbers)
+    
+    def anchor(self, row: int) -> str:
+        """Page anchor of a step, qualified by its function (see step_anchor)."""
+        return step_anchor(self.numbers[row], self.functions[self.function_ids[row]])
+    
+    def module_rows(self, module: str) -> List[int]:
+        """Rows of a module's steps, in insertion order."""
+        module_id = self._module_ids.get(module)
+        return self._module_rows.get(module_id, []) if module_id is not None else []
+    
+    def step_lines(self, module: str) -> Dict[str, int]:
+        """
+        Anchor -> line mapping for a module's page.
+        
+        Every step gets its function-qualified anchor. The unqualified
+        ``step-N`` anchor, used by links that do not know the function,
+        goes to the first function with that step number.
+        """
+        step_lines: Dict[str, int] = {}
+        for row in self.module_rows(module):
+            step_lines[self.anchor(row)] = self.lines[row]
+            step_lines.setdefault(step_anchor(self.numbers[row]), self.lines[row])
+        return step_lines
+    
+    def module_fingerprint(self, module: str) -> bytes:
+        """Digest of a module's steps, for change detection of its page."""
+        rows = self.module_rows(module)
+        content = [
+            (self.functions[self.function_ids[row]], self.numbers[row], self.names[row], self.lines[row])
+            for row in rows
+        ]
+        return hashlib.sha1(json.dumps([module, content]).encode('utf-8')).digest()
+
+
+class StepNavigation:
+    """
+    Step navigation, built once and specialised per page.
+    
+    Sorting the steps, building the trees and rendering them to HTML
+    happens once, per module. A page inlines only its own module's steps,
+    linking within the page; the steps of all other modules come from one
+    index script shared by every page (see index_script), so page size
+    depends on the module's own steps, not on the whole project.
+    """
+    
+    # Placeholders for the page's path prefix and for link positions
+    _UP = '\x00'
+    _LINK = '\x01'
+    
+    _DIVIDER = '\n            <hr class="step-divider"/>\n'
+    
+    def __init__(self, index: StepIndex):
+        """
+        Build and render the navigation trees.
+        
+        Each (module, function) gets its own step tree, ordered by
+        hierarchical step number. Generates deeply nested lists with
+        toggles at every level that has children, at any depth
+        (1, 1.1, 1.1.1, 1.1.1.1, etc.)
+        
+        Args:
+            index: Steps of all modules
+        """
+        # Module -> list items linking within its page, and linking to it
+        # from other pages (hrefs relative to ``_modules/``), in module order
+        self._local: Dict[str, str] = {}
+        self._cross: Dict[str, str] = {}
+        
+        links: List[Tuple[str, str]] = []
+        for module, items in self._render_modules(index, links).items():
+            parts = items.split(self._LINK)
+            local, cross = parts.copy(), parts
+            for pos in range(1, len(parts), 2):
+                cross[pos], local[pos] = links[int(parts[pos])]
+            self._local[module] = ''.join(local)
+            self._cross[module] = ''.join(cross)
+    
+    def render(self, current_module: str, index_asset: Optional[str] = None) -> str:
+        """
+        Render the navigation for the source page of a module.
+        
+        Args:
+            current_module: Module whose page is being generated; its steps
+                            are inlined and link within the page.
+            index_asset: ``_static`` name of the shared index script; without
+                         it the other modules' steps are inlined too.
+        
+        Returns:
+            HTML string for step navigation list
+        """
+        if not self._local:
             return '<p class="no-steps-message">No workflow steps in this module</p>'
         
+        up = '../' * current_module.count('.')
+        items = []
+        for module, local in self._local.items():
+            if module == current_module or not module:
+                items.append(local)
+            elif not index_asset:
+                items.append(self._cross[module].replace(self._UP, up))
+        
+        if items:
+            html = f'''<ul class="step-nav-list">
+{self._DIVIDER.join(items)}
+            </ul>'''
+        else:
+            html = '<p class="no-steps-message">No workflow steps in this module</p>'
+        if not index_asset or len(items) == len(self._local):
+            return html
+        
+        static_prefix = '../' * (current_module.count('.') + 1)
+        return f'''{html}
+            <div class="step-nav-index" data-module="{current_module}" data-root="{up}"></div>
+            <script defer src="{static_prefix}_static/{index_asset}"></script>'''
+    
+    def index_script(self) -> str:
+        """
+        Build the shared index script: the other-module list items of every
+        module, as ``[module, html]`` pairs in module order.
+        """
+        modules = [[module, html.replace(self._UP, '')] for module, html in self._cross.items() if module]
+        return f"window.workflowStepNav = {json.dumps({'modules': modules})};\n"
+    
+    def _render_modules(self, index: StepIndex, links: List[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        Render each module's step trees with a placeholder for each link.
+        
+        Each placeholder indexes ``links``, which receives (link HTML
+        relative to ``_modules/``, same-page link HTML).
+        """
         def parse_step_number(num_str: str) -> tuple:
             """Parse step number string into tuple for hierarchical sorting.
             E.g., '1.2.3' -> (1, 2, 3), '2' -> (2,)
@@ -855,65 +925,32 @@ class SourceHTMLGenerator:
             except (ValueError, AttributeError):
                 return (999,)  # Put unparseable at end
         
-        def get_depth(num_str: str) -> int:
-            """Get nesting depth. '1' -> 0, '1.2' -> 1, '1.2.3' -> 2."""
-            return str(num_str).count('.')
-        
         def get_parent_number(num_str: str) -> str:
             """Get parent step number. E.g., '1.2.3' -> '1.2', '1.2' -> '1', '1' -> ''."""
             parts = str(num_str).rsplit('.', 1)
             return parts[0] if len(parts) > 1 else ''
         
-        def get_top_level_number(num_str: str) -> str:
-            """Get top-level step number. E.g., '1.2.3' -> '1', '2' -> '2'."""
-            return str(num_str).split('.')[0]
-        
-        # Get current module and module paths for cross-linking
-        current_module = getattr(self, '_current_module', '')
-        module_paths = getattr(self, '_module_paths', {})
-        
-        def get_relative_path_to_module(from_module: str, to_module: str) -> str:
-            """Calculate relative path from one module's HTML to another."""
-            if from_module == to_module:
-                return ''  # Same file, just use anchor
-            
-            from_parts = from_module.split('.')
+        def get_module_path(to_module: str) -> str:
+            """Path of a module's HTML relative to _modules/."""
             to_parts = to_module.split('.')
-            
-            # Calculate how many levels up we need to go
-            from_depth = len(from_parts) - 1  # -1 because the last part is the filename
-            
-            # Build the relative path
-            up_path = '../' * from_depth if from_depth > 0 else ''
-            
-            # Build path to target module
             if len(to_parts) > 1:
-                to_path = '/'.join(to_parts[:-1]) + '/' + to_parts[-1] + '.html'
-            else:
-                to_path = to_parts[0] + '.html'
-            
-            return up_path + to_path
-        
-        def build_step_link(step_id: str, info: dict) -> str:
-            """Build HTML for a single step link with cross-file linking."""
-            step_number = info.get('number', '')
-            step_name = info.get('name', '')
-            step_module = info.get('source_module', info.get('module', ''))
-            line_num = info.get('line', 0)
+                return '/'.join(to_parts[:-1]) + '/' + to_parts[-1] + '.html'
+            return to_parts[0] + '.html'
+        
+        def build_step_link(row: int) -> str:
+            """Render both variants of a step link and return its placeholder."""
+            step_id = index.anchor(row)
+            step_number = index.numbers[row]
+            step_name = index.names[row]
+            step_module = index.modules[index.module_ids[row]]
+            function = index.functions[index.function_ids[row]]
+            line_num = index.lines[row]
             module_display = step_module.split('.')[-1] if step_module else ''
+            if function:
+                module_display = f'{module_display}.{function}' if module_display else function
             
-            # Determine if this is a cross-file link
-            if step_module and step_module != current_module:
-                # Cross-file link
-                relative_path = get_relative_path_to_module(current_module, step_module)
-                href = f'{relative_path}#{step_id}'
-                external_indicator = ' ↗'
-            else:
-                # Same-file anchor link
-                href = f'#{step_id}'
-                external_indicator = ''
-            
-            return f'''<a href="{href}">
+            def link_html(href: str, external_indicator: str) -> str:
+                return f'''<a href="{href}">
                     <span class="step-number">Step {step_number}</span>
                     <span class="step-name">{step_name}{external_indicator}</span>
                     <span class="step-meta">
@@ -921,57 +958,68 @@ class SourceHTMLGenerator:
                         <span class="step-line">L{line_num}</span>
                     </span>
                 </a>'''
+            
+            # Same-file anchor link
+            local_link = link_html(f'#{step_id}', '')
+            if step_module:
+                # Cross-file link, relative to the page once the prefix is filled in
+                cross_link = link_html(f'{self._UP}{get_module_path(step_module)}#{step_id}', ' ↗')
+            else:
+                cross_link = local_link
+            
+            links.append((cross_link, local_link))
+            return f'{self._LINK}{len(links) - 1}{self._LINK}'
         
         # Build a tree structure
-        # Each node: {'step_id': str, 'info': dict, 'children': [nodes]}
+        # Each node: {'row': int, 'children': [nodes]}
         class TreeNode:
-            def __init__(self, step_id: str = None, info: dict = None):
-                self.step_id = step_id
-                self.info = info or {}
+            def __init__(self, row: Optional[int] = None):
+                self.row = row
                 self.children = []
-                self.number = info.get('number', '') if info else ''
         
-        # Sort steps by hierarchical step number
-        sorted_steps = sorted(
-            step_data.items(), 
-            key=lambda x: parse_step_number(x[1].get('number', '999'))
-        )
-        
-        # Build tree by inserting each step into the right place
-        root = TreeNode()  # Virtual root
-        nodes_by_number = {'': root}  # Map step number -> node
+        # One tree per (module, function), in order of first appearance
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for row in range(len(index)):
+            groups.setdefault((index.module_ids[row], index.function_ids[row]), []).append(row)
         
-        def find_nearest_ancestor(step_number: str) -> TreeNode:
-            """Find the nearest existing ancestor node for a step number.
-            E.g., for '1.3.1.1', try '1.3.1', then '1.3', then '1', then root.
-            """
-            current = step_number
-            while current:
-                parent_num = get_parent_number(current)
-                if parent_num in nodes_by_number:
-                    return nodes_by_number[parent_num]
-                current = parent_num
-            return root
-        
-        for step_id, info in sorted_steps:
-            step_number = info.get('number', '')
-            node = TreeNode(step_id, info)
-            nodes_by_number[step_number] = node
+        roots: Dict[str, TreeNode] = {}  # Virtual root per module
+        for (module_id, _), rows in groups.items():
+            # Sort steps by hierarchical step number
+            rows.sort(key=lambda row: parse_step_number(index.numbers[row]))
+            
+            # Build tree by inserting each step into the right place
+            group_root = TreeNode()
+            nodes_by_number = {'': group_root}  # Map step number -> node
             
-            # Find nearest existing ancestor
-            parent_node = find_nearest_ancestor(step_number)
-            parent_node.children.append(node)
+            def find_nearest_ancestor(step_number: str) -> TreeNode:
+                """Find the nearest existing ancestor node for a step number.
+                E.g., for '1.3.1.1', try '1.3.1', then '1.3', then '1', then root.
+                """
+                current = step_number
+                while current:
+                    parent_num = get_parent_number(current)
+                    if parent_num in nodes_by_number:
+                        return nodes_by_number[parent_num]
+                    current = parent_num
+                return group_root
+            
+            for row in rows:
+                step_number = index.numbers[row]
+                node = TreeNode(row)
+                nodes_by_number[step_number] = node
+                
+                # Find nearest existing ancestor
+                parent_node = find_nearest_ancestor(step_number)
+                parent_node.children.append(node)
+            
+            roots.setdefault(index.modules[module_id], TreeNode()).children.extend(group_root.children)
         
-        def render_node(node: TreeNode, depth: int = 0, is_top_level: bool = False) -> str:
+        def render_node(node: TreeNode, depth: int = 0) -> str:
             """Recursively render a node and its children."""
             indent = '    ' * (depth + 3)
             
-            if node.step_id is None:
-                # Root node - just render children
-                return ''
-            
             has_children = len(node.children) > 0
-            step_link = build_step_link(node.step_id, node.info)
+            step_link = build_step_link(node.row)
             
             if has_children:
                 # Render children recursively
@@ -997,17 +1045,362 @@ class SourceHTMLGenerator:
 {indent}    </div>
 {indent}</li>'''
         
-        # Render top-level items with dividers between them
-        items = []
-        for i, child in enumerate(root.children):
-            if i > 0:
-                # Add divider between top-level steps
-                items.append('            <hr class="step-divider"/>')
-            items.append(render_node(child, depth=0, is_top_level=True))
-        
-        return f'''<ul class="step-nav-list">
-{chr(10).join(items)}
-            </ul>'''
+        # Render each module's top-level items with dividers between them
+        return {
+            module: self._DIVIDER.join(render_node(child, depth=0) for child in root.children)
+            for module, root in roots.items()
+        }
+
+
+class HighlightCache:
+    """
+    Persistent cache of highlighted source lines, shared across builds.
+    
+    Entries are keyed by a digest of the source text, the lexer, the
+    formatter options and the Pygments version, so a source is only lexed
+    again when one of them changes - not when just its step anchors or the
+    navigation do. Each entry is a zlib-compressed file of the formatted
+    code lines (StepAnchorHtmlFormatter.formatted_lines), written
+    atomically, so process-pool workers can share the directory.
+    
+    Hits refresh an entry's mtime; prune() evicts the least recently used
+    entries once the directory exceeds ``max_bytes``.
+    """
+    
+    VERSION = 2
+    """Bump when the stored format changes."""
+    
+    SUFFIX = '.hl'
+    
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: Directory holding the cache entries.
+            max_bytes: Size budget enforced by prune().
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+    
+    def key(self, source: str, lexer_name: str, options: Dict[str, Any]) -> str:
+        """Digest the inputs that determine the highlighted output."""
+        digest = hashlib.sha1(
+            f"{self.VERSION}\0{PYGMENTS_VERSION}\0{lexer_name}\0{sorted(options.items())!r}\0".encode('utf-8')
+        )
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[List[str]]:
+        """Get the highlighted lines for a key, or None on a miss."""
+        entry_path = self.path / f"{key}{self.SUFFIX}"
+        try:
+            data = zlib.decompress(entry_path.read_bytes())
+            os.utime(entry_path)  # Mark as recently used
+        except (OSError, zlib.error):
+            return None
+        return data.decode('utf-8').split('\n')
+    
+    def put(self, key: str, lines: List[str]) -> None:
+        """Store the highlighted lines for a key."""
+        entry_path = self.path / f"{key}{self.SUFFIX}"
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see a partial entry
+            tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(zlib.compress('\n'.join(lines).encode('utf-8')))
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Could not write highlight cache entry {entry_path}: {e}")
+    
+    def prune(self) -> int:
+        """
+        Evict least recently used entries until the cache fits max_bytes.
+        
+        Returns:
+            Number of entries removed
+        """
+        try:
+            with os.scandir(self.path) as it:
+                entries = [
+                    (entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                    for entry in it if entry.name.endswith(self.SUFFIX)
+                ]
+        except OSError:
+            return 0
+        
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def get_highlight_cache(config, doctreedir) -> Optional[HighlightCache]:
+    """
+    Get the highlight cache for a Sphinx build, stored in the doctree directory.
+    
+    Returns None when ``workflow_highlight_cache`` is disabled.
+    """
+    if not getattr(config, 'workflow_highlight_cache', True) or not PYGMENTS_AVAILABLE:
+        return None
+    max_mb = getattr(config, 'workflow_highlight_cache_size', 256)
+    return HighlightCache(Path(doctreedir) / 'workflow_highlight_cache', max_bytes=int(max_mb * 1024 * 1024))
+
+
+class SourcePageManifest:
+    """
+    Record of the inputs each generated source page was built from.
+    
+    Stored as JSON in the output directory, mapping module name to a
+    digest of the source bytes, the step data the page embeds and the
+    generator's render key. A page whose digest is unchanged and whose
+    file still exists does not need to be highlighted or written again.
+    """
+    
+    VERSION = 1
+    FILENAME = '.workflow_source_manifest.json'
+    
+    def __init__(self, output_dir: Path):
+        """
+        Load the manifest of an output directory, if any.
+        
+        Args:
+            output_dir: Build output directory (e.g., _build/html)
+        """
+        self.path = Path(output_dir) / self.FILENAME
+        self.entries: Dict[str, str] = {}
+        
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self.entries = data.get('pages', {})
+    
+    def is_current(self, module_name: str, digest: Optional[str], output_path: Path) -> bool:
+        """Check whether a page exists and was generated from the same inputs."""
+        return digest is not None and self.entries.get(module_name) == digest and output_path.exists()
+    
+    def remove_orphans(self, module_names: Set[str], page_path: Callable[[str], Path]) -> List[str]:
+        """
+        Delete the pages of recorded modules that are no longer documented.
+        
+        Args:
+            module_names: Modules of the current build
+            page_path: Maps a module name to its page (and so its directory)
+        
+        Returns:
+            Names of the modules whose pages were removed
+        """
+        removed = []
+        for module_name in sorted(set(self.entries) - module_names):
+            path = page_path(module_name)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove source page {path}: {e}")
+                continue
+            removed.append(module_name)
+            
+            # Drop package directories left empty, up to _modules/
+            modules_dir = self.path.parent / '_modules'
+            parent = path.parent
+            while modules_dir in parent.parents:
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+                parent = parent.parent
+        return removed
+    
+    def save(self, entries: Dict[str, str]) -> None:
+        """Replace the manifest with the given module name -> digest entries."""
+        if entries == self.entries and self.path.exists():
+            return
+        content = json.dumps({'version': self.VERSION, 'pages': entries}, separators=(',', ':'))
+        
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so an interrupted build never leaves a partial manifest
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(content, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write source page manifest {self.path}: {e}")
+            return
+        self.entries = entries
+
+
+def _source_page_digest(
+    module_path: Path,
+    module_name: str,
+    step_line_map: Dict[str, int],
+    nav_digest: bytes
+) -> Optional[str]:
+    """Digest the inputs of one source page, or None if the source is unreadable."""
+    try:
+        source = module_path.read_bytes()
+    except OSError:
+        return None
+    
+    digest = hashlib.sha1(source)
+    digest.update(nav_digest)
+    digest.update(json.dumps([module_name, step_line_map], default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# Per-process state for source page workers: the generator (with its
+# assets already written) and the prebuilt navigation shared by every
+# page, sent once per worker
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_source_worker(
+    generator: SourceHTMLGenerator,
+    navigation: StepNavigation,
+    module_paths: Dict[str, str]
+) -> None:
+    """Set up the generator and shared navigation in a worker."""
+    _worker_state['generator'] = generator
+    _worker_state['navigation'] = navigation
+    _worker_state['module_paths'] = module_paths
+
+
+def _generate_source_page(task: Tuple[str, str, Dict[str, int]]) -> Tuple[str, Optional[Path]]:
+    """Generate one source page from (module_name, source_path, step_line_map)."""
+    module_name, source_path, step_line_map = task
+    result = _worker_state['generator'].generate_source_html(
+        Path(source_path),
+        module_name,
+        step_line_map,
+        None,
+        _worker_state['module_paths'],  # Module path mappings for cross-linking
+        _worker_state['navigation']  # Navigation over ALL step data
+    )
+    return module_name, result
+
+
+def _generate_source_pages(
+    generator: SourceHTMLGenerator,
+    tasks: List[Tuple[str, str, Dict[str, int]]],
+    navigation: StepNavigation,
+    module_paths: Dict[str, str],
+    workers: int = 1
+):
+    """
+    Generate source pages serially or in a process pool.
+    
+    Workers receive the generator and the prebuilt navigation once,
+    through the pool initializer, and per task only the module name,
+    source path and step lines. Both paths run the same code, so pages
+    are byte-identical. Shared assets are written before any page.
+    
+    Yields:
+        (module_name, output path or None) in task order
+    """
+    if tasks and not generator._assets_written:
+        generator.write_static_assets()
+    
+    if workers <= 1 or len(tasks) < 2:
+        _init_source_worker(generator, navigation, module_paths)
+        try:
+            yield from map(_generate_source_page, tasks)
+        finally:
+            _worker_state.clear()
+        return
+    
+    workers = min(workers, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_source_worker,
+        initargs=(generator, navigation, module_paths)
+    ) as pool:
+        yield from pool.map(_generate_source_page, tasks, chunksize=chunksize)
+
+
+def record_source_mapping(
+    env,
+    module_name: str,
+    source_path: str,
+    steps: Dict[str, Dict],
+    replace: bool = False
+) -> None:
+    """
+    Record a module's steps for its source page, for the document being read.
+    
+    Steps of a module documented by several documents are merged, and the
+    documents are recorded, so purge_source_mappings can drop the module
+    once no document references it any more.
+    
+    Args:
+        env: Sphinx build environment (``env.docname`` is the reading document)
+        module_name: Module of the source page
+        source_path: Path of the module's source file
+        steps: Step key -> step info, as in StepIndex.add_step_data
+        replace: Replace the module's steps instead of merging them
+    """
+    if not hasattr(env, 'workflow_source_mappings'):
+        env.workflow_source_mappings = {}
+    
+    mapping = env.workflow_source_mappings.get(module_name)
+    if mapping is None or replace:
+        docnames = mapping.get('docnames', set()) if mapping else set()
+        mapping = env.workflow_source_mappings[module_name] = {
+            'source_path': source_path,
+            'steps': {},
+            'docnames': docnames
+        }
+    mapping['steps'].update(steps)
+    mapping.setdefault('docnames', set()).add(env.docname)
+
+
+def purge_source_mappings(app, env, docname) -> None:
+    """
+    Forget a removed or re-read document's source mappings ('env-purge-doc').
+    
+    Modules no other document references are dropped, so their pages are
+    removed at build-finished (see SourcePageManifest.remove_orphans).
+    """
+    mappings = getattr(env, 'workflow_source_mappings', {})
+    for module_name in list(mappings):
+        docnames = mappings[module_name].get('docnames')
+        if docnames is None:
+            continue
+        docnames.discard(docname)
+        if not docnames:
+            del mappings[module_name]
+
+
+def merge_source_mappings(app, env, docnames, other) -> None:
+    """Merge source mappings collected by parallel readers ('env-merge-info')."""
+    merged = set(docnames)
+    for module_name, mapping in getattr(other, 'workflow_source_mappings', {}).items():
+        contributed = mapping.get('docnames', set()) & merged
+        if not contributed:
+            continue
+        if not hasattr(env, 'workflow_source_mappings'):
+            env.workflow_source_mappings = {}
+        existing = env.workflow_source_mappings.get(module_name)
+        if existing is None:
+            env.workflow_source_mappings[module_name] = {
+                'source_path': mapping['source_path'],
+                'steps': dict(mapping['steps']),
+                'docnames': contributed
+            }
+        else:
+            existing['steps'].update(mapping['steps'])
+            existing.setdefault('docnames', set()).update(contributed)
 
 
 def generate_all_source_pages(app, exception):
@@ -1016,6 +1409,10 @@ def generate_all_source_pages(app, exception):
     
     This function is connected to the 'build-finished' event and generates
     browsable source HTML for ALL documented modules referenced in the workflow.
+    With ``workflow_source_workers`` > 1 pages are generated in a process
+    pool; progress is reported through Sphinx's status iterator. Pages
+    recorded as up to date in the SourcePageManifest are skipped, and pages
+    it records for modules no longer documented are deleted.
     
     Args:
         app: Sphinx application
@@ -1034,17 +1431,12 @@ def generate_all_source_pages(app, exception):
     mappings = env.workflow_source_mappings
     logger.info(f"Generating source pages for {len(mappings)} module(s)")
     
-    # Merge ALL step data from all modules for the unified navigation
-    all_step_data = {}
+    # Index ALL steps of all modules for the navigation, keyed by
+    # (module, function, step number) so equal step ids never collide
+    step_index = StepIndex.from_mappings(mappings)
     module_paths = {}  # Map module_name -> output path for cross-linking
     
-    for module_name, mapping_data in mappings.items():
-        step_data = mapping_data.get('steps', {})
-        # Add source_file info to each step for cross-module linking
-        for step_id, info in step_data.items():
-            info['source_module'] = module_name
-        all_step_data.update(step_data)
-        
+    for module_name in mappings:
         # Calculate the relative path for this module
         parts = module_name.split('.')
         if len(parts) > 1:
@@ -1052,16 +1444,34 @@ def generate_all_source_pages(app, exception):
         else:
             module_paths[module_name] = parts[0] + '.html'
     
-    generator = SourceHTMLGenerator(Path(app.outdir))
-    generated_count = 0
+    highlight_cache = get_highlight_cache(app.config, app.doctreedir)
+    generator = SourceHTMLGenerator(
+        Path(app.outdir),
+        config={'virtual_lines': getattr(app.config, 'workflow_source_virtual_lines', 5000)},
+        highlight_cache=highlight_cache
+    )
+    manifest = SourcePageManifest(Path(app.outdir))
+    
+    # Sort, build and render the navigation once for all pages. Pages inline
+    # only their own steps; other modules' steps live in one shared,
+    # content-hashed index (so its name is part of the render key)
+    navigation = StepNavigation(step_index)
+    generator.add_static_asset(
+        'nav_index', 'workflow_step_nav', '.js', navigation.index_script().encode('utf-8')
+    )
+    generator.write_static_assets()
+    render_key = generator.render_key().encode('utf-8')
+    
+    tasks: List[Tuple[str, str, Dict[str, int]]] = []
+    digests: Dict[str, str] = {}
+    entries: Dict[str, str] = {}
+    unchanged_count = 0
     
     for module_name, mapping_data in mappings.items():
         source_path = mapping_data.get('source_path', '')
-        step_data = mapping_data.get('steps', {})
         
-        # Convert step_data to step_line_map for backward compatibility
-        # step_data format: {step_id: {'line': int, 'name': str, 'number': str, 'module': str}}
-        step_line_map = {sid: info.get('line', 0) for sid, info in step_data.items()}
+        # Step anchors of this module's page
+        step_line_map = step_index.step_lines(module_name)
         
         if not source_path:
             logger.warning(f"  Module '{module_name}': No source path - skipping")
@@ -1071,21 +1481,49 @@ def generate_all_source_pages(app, exception):
         
         logger.info(f"  Module: {module_name}")
         logger.info(f"    Source: {module_path}")
-        logger.info(f"    Steps (this module): {len(step_data)}")
-        logger.info(f"    Steps (all modules): {len(all_step_data)}")
+        logger.info(f"    Steps (this module): {len(step_index.module_rows(module_name))}")
+        logger.info(f"    Steps (all modules): {len(step_index)}")
         
         if module_path.exists():
-            result = generator.generate_source_html(
-                module_path,
-                module_name,
-                step_line_map,
-                all_step_data,  # Pass ALL step data for unified navigation
-                module_paths   # Pass module path mappings for cross-linking
-            )
-            if result:
-                logger.info(f"    Generated: {result}")
-                generated_count += 1
+            # A page embeds only its own module's navigation
+            nav_digest = hashlib.sha1(render_key + step_index.module_fingerprint(module_name)).digest()
+            digest = _source_page_digest(module_path, module_name, step_line_map, nav_digest)
+            if manifest.is_current(module_name, digest, generator._get_output_path(module_name)):
+                logger.info("    Unchanged - skipping")
+                entries[module_name] = digest
+                unchanged_count += 1
+                continue
+            tasks.append((module_name, str(module_path), step_line_map))
+            if digest is not None:
+                digests[module_name] = digest
         else:
             logger.warning(f"    Source file not found: {module_path}")
     
-    logger.info(f"Source page generation complete: {generated_count}/{len(mappings)} modules")
+    workers = getattr(app.config, 'workflow_source_workers', 1)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    
+    generated_count = 0
+    results = _generate_source_pages(generator, tasks, navigation, module_paths, workers)
+    for module_name, result in status_iterator(
+        results, 'generating workflow source pages... ', 'darkgreen',
+        len(tasks), app.verbosity, stringify_func=lambda item: item[0]
+    ):
+        if result:
+            logger.info(f"    Generated: {result}")
+            generated_count += 1
+            if module_name in digests:
+                entries[module_name] = digests[module_name]
+    
+    removed = manifest.remove_orphans(set(mappings), generator._get_output_path)
+    if removed:
+        logger.info(f"Removed {len(removed)} source page(s) of modules no longer documented")
+    manifest.save(entries)
+    if highlight_cache is not None:
+        evicted = highlight_cache.prune()
+        if evicted:
+            logger.info(f"Evicted {evicted} highlight cache entries")
+    logger.info(
+        f"Source page generation complete: {generated_count}/{len(mappings)} modules "
+        f"({unchanged_count} unchanged)"
+    )
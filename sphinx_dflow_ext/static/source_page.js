@@ -0,0 +1,253 @@
+/**
+ * Source Page Interactivity
+ * 
+ * Step navigation for the browsable _modules source pages
+ * (see source_generator.py)
+ */
+
+// Virtualized source for very large modules: the highlighted lines ship
+// as JSON chunks and only the rows around the viewport are in the DOM
+function setupVirtualSource(root) {
+    const BUFFER = 200;  // Rows rendered beyond each edge of the viewport
+    const lineCount = parseInt(root.dataset.lines, 10);
+    const chunkLines = parseInt(root.dataset.chunkLines, 10);
+    const chunkElements = root.querySelectorAll('script.source-chunk');
+    const chunks = new Array(chunkElements.length);
+    const rows = root.querySelector('.virtual-lines');
+    const scroller = root.closest('.source-column') || document.scrollingElement;
+    const stepLines = new Set();
+    root.querySelectorAll('.step-anchor[data-line]').forEach(anchor => {
+        stepLines.add(parseInt(anchor.dataset.line, 10));
+    });
+    let first = 0, last = 0, highlighted = 0, pending = false;
+
+    function lineHeight() {
+        return root.offsetHeight / lineCount;
+    }
+
+    // Chunks are parsed the first time one of their lines is shown
+    function lineHtml(n) {
+        const index = Math.floor((n - 1) / chunkLines);
+        if (!chunks[index]) {
+            chunks[index] = JSON.parse(chunkElements[index].textContent);
+        }
+        return chunks[index][(n - 1) % chunkLines];
+    }
+
+    function render(force) {
+        pending = false;
+        const height = lineHeight();
+        const top = scroller.getBoundingClientRect().top - root.getBoundingClientRect().top;
+        const visibleFirst = Math.max(1, Math.floor(top / height) + 1);
+        const visibleLast = Math.min(lineCount, Math.ceil((top + scroller.clientHeight) / height));
+        // Keep the current rows while the viewport stays well inside them
+        if (!force && first && first <= Math.max(1, visibleFirst - BUFFER / 2)
+                && last >= Math.min(lineCount, visibleLast + BUFFER / 2)) {
+            return;
+        }
+
+        first = Math.max(1, visibleFirst - BUFFER);
+        last = Math.max(first, Math.min(lineCount, visibleLast + BUFFER));
+        const html = [];
+        for (let n = first; n <= last; n++) {
+            let cls = 'line';
+            if (stepLines.has(n)) cls += ' step-line';
+            if (n === highlighted) cls += ' highlighted';
+            html.push(`<span id="line-${n}" class="${cls}"><a class="lineno" href="#line-${n}">${n}</a> <code>${lineHtml(n)}</code></span>`);
+        }
+        rows.style.transform = `translateY(${(first - 1) * height}px)`;
+        rows.innerHTML = html.join('');
+    }
+
+    function schedule() {
+        if (!pending) {
+            pending = true;
+            requestAnimationFrame(() => render(false));
+        }
+    }
+
+    // Line number for a '#step-...' or '#line-N' hash, or 0
+    function lineFor(hash) {
+        const id = decodeURIComponent(hash.replace(/^#/, ''));
+        const match = /^line-(\d+)$/.exec(id);
+        if (match) return parseInt(match[1], 10);
+        const anchor = document.getElementById(id);
+        if (anchor && anchor.dataset.line && root.contains(anchor)) {
+            return parseInt(anchor.dataset.line, 10);
+        }
+        return 0;
+    }
+
+    // Scroll a line to the top of the viewport (below the header) and mark it
+    function reveal(n) {
+        highlighted = Math.min(Math.max(n, 1), lineCount);
+        const offset = root.getBoundingClientRect().top - scroller.getBoundingClientRect().top;
+        scroller.scrollTop += offset + (highlighted - 1) * lineHeight() - 70;
+        render(true);
+    }
+
+    scroller.addEventListener('scroll', schedule, { passive: true });
+    window.addEventListener('resize', schedule);
+    render(true);
+    if (window.location.hash && lineFor(window.location.hash)) {
+        reveal(lineFor(window.location.hash));
+    }
+    return { lineFor, reveal };
+}
+
+// Steps of other modules come from one index script shared by all pages
+// (see StepNavigation in source_generator.py); hrefs in it are relative
+// to _modules/ and get the page's prefix here
+function fillStepIndex(container) {
+    const index = window.workflowStepNav;
+    if (!index) return;
+    const items = index.modules
+        .filter(([module]) => module !== container.dataset.module)
+        .map(([, html]) => html);
+    if (!items.length) return;
+    container.innerHTML = '<hr class="step-divider"/><ul class="step-nav-list">'
+        + items.join('<hr class="step-divider"/>') + '</ul>';
+    container.querySelectorAll('a[href]').forEach(link => {
+        link.setAttribute('href', container.dataset.root + link.getAttribute('href'));
+    });
+}
+
+// Highlight active step in navigation and source line when clicking
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.step-nav-index').forEach(fillStepIndex);
+    const navLinks = document.querySelectorAll('.step-nav-list a[href^="#"]');
+    const toggleBtns = document.querySelectorAll('.toggle-btn');
+    let highlightedLine = null;
+    const virtualRoot = document.querySelector('.virtual-source');
+    const virtualSource = virtualRoot ? setupVirtualSource(virtualRoot) : null;
+
+    // Toggle collapse/expand for substeps
+    toggleBtns.forEach(btn => {
+        btn.addEventListener('click', function(e) {
+            e.stopPropagation();
+            const substeps = this.closest('.step-parent').querySelector('.substeps');
+            if (substeps) {
+                this.classList.toggle('collapsed');
+                substeps.classList.toggle('collapsed');
+            }
+        });
+    });
+
+    // Function to highlight a source line
+    function highlightSourceLine(stepId) {
+        // Virtualized source renders and marks the line itself
+        if (virtualSource) {
+            const lineNumber = virtualSource.lineFor(stepId);
+            if (lineNumber) {
+                virtualSource.reveal(lineNumber);
+                return;
+            }
+        }
+
+        // Remove previous highlight
+        if (highlightedLine) {
+            highlightedLine.classList.remove('highlighted');
+        }
+
+        // Find the step anchor
+        const anchor = document.getElementById(stepId);
+        if (!anchor) return;
+
+        // Strategy 1: Look for Pygments line structure
+        // Pygments creates: <span id="line-N"> containing a link <a href="#line-N">
+        // The actual line content is in the same container or sibling
+
+        // Try to find the parent table row or line container
+        let lineElement = anchor.closest('tr, .line, pre > span');
+
+        // Strategy 2: If anchor is step-anchor class, find associated line
+        if (!lineElement && anchor.classList.contains('step-anchor')) {
+            // Look at parent or next sibling
+            lineElement = anchor.parentElement;
+            if (lineElement && lineElement.tagName === 'PRE') {
+                // Find by scrolling to anchor position
+                lineElement = null;
+            }
+        }
+
+        // Strategy 3: For Pygments table layout, find the linenos anchor
+        if (!lineElement) {
+            // Look for the line number link that Pygments generates
+            const allLineAnchors = document.querySelectorAll('a[href^="#line-"]');
+            for (const la of allLineAnchors) {
+                if (la.closest('td, span') && la.textContent.trim()) {
+                    const lineNum = parseInt(la.textContent.trim());
+                    // Check if this line number matches what we're looking for
+                    // We need to get the line number from step data
+                    const tr = la.closest('tr');
+                    if (tr) {
+                        const cells = tr.querySelectorAll('td');
+                        if (cells.length >= 2) {
+                            lineElement = cells[1]; // Code cell
+                            break;
+                        }
+                    }
+                }
+            }
+        }
+
+        // Strategy 4: Highlight by adding a visible marker
+        if (lineElement) {
+            lineElement.classList.add('highlighted');
+            highlightedLine = lineElement;
+        } else {
+            // Fallback: add a highlight effect to the anchor's parent container
+            const container = anchor.parentElement;
+            if (container) {
+                container.classList.add('highlighted');
+                highlightedLine = container;
+            }
+        }
+    }
+
+    // Handle click to highlight nav item and source line
+    navLinks.forEach(link => {
+        link.addEventListener('click', function(e) {
+            // Remove active from all
+            navLinks.forEach(l => l.classList.remove('active'));
+            // Add active to clicked
+            this.classList.add('active');
+
+            // Highlight the target source line
+            const stepId = this.getAttribute('href').substring(1);
+            setTimeout(() => highlightSourceLine(stepId), 100);
+        });
+    });
+
+    // Check hash on load and highlight
+    if (window.location.hash) {
+        const hash = window.location.hash;
+        const activeLink = document.querySelector(`.step-nav-list a[href="${hash}"]`);
+        if (activeLink) {
+            activeLink.classList.add('active');
+            // Expand ALL parent containers up the tree
+            let parent = activeLink.closest('.substeps');
+            while (parent) {
+                parent.classList.remove('collapsed');
+                const header = parent.previousElementSibling;
+                if (header) {
+                    const toggleBtn = header.querySelector('.toggle-btn');
+                    if (toggleBtn) toggleBtn.classList.remove('collapsed');
+                }
+                parent = parent.parentElement?.closest('.substeps');
+            }
+        }
+        setTimeout(() => highlightSourceLine(hash.substring(1)), 200);
+    }
+
+    // Handle hash change
+    window.addEventListener('hashchange', function() {
+        navLinks.forEach(l => l.classList.remove('active'));
+        const hash = window.location.hash;
+        const activeLink = document.querySelector(`.step-nav-list a[href="${hash}"]`);
+        if (activeLink) {
+            activeLink.classList.add('active');
+        }
+        highlightSourceLine(hash.substring(1));
+    });
+});
@@ -6,6 +6,8 @@
  * - Step navigation
  * - Highlight on hover
  * - Smooth scrolling
+ * - Deferred rendering of drill-down diagrams
+ * - On-demand loading of lazy step details
  */
 
 document.addEventListener('DOMContentLoaded', function() {
@@ -21,6 +23,12 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Initialize copy buttons for code blocks
     initializeCodeCopyButtons();
+    
+    // Render drill-down diagrams only when their dropdown is opened
+    initializeDeferredDiagrams();
+    
+    // Load lazy step details when their dropdown is opened
+    initializeLazyStepDetails();
 });
 
 
@@ -197,6 +205,112 @@ function initializeCodeCopyButtons() {
 }
 
 
+/**
+ * Render drill-down sub-diagrams on demand
+ * 
+ * Clustered diagrams emit their sub-diagrams as <pre class="workflow-mermaid-deferred">
+ * inside dropdowns so mermaid.js does not lay them out on page load.
+ */
+function initializeDeferredDiagrams() {
+    const dropdowns = document.querySelectorAll('details.workflow-subdiagram');
+    if (dropdowns.length === 0) return;
+    
+    function renderDeferred(details) {
+        const blocks = details.querySelectorAll('pre.workflow-mermaid-deferred');
+        if (blocks.length === 0 || !window.mermaid) return;
+        
+        const nodes = [];
+        blocks.forEach(block => {
+            block.classList.remove('workflow-mermaid-deferred');
+            block.classList.add('mermaid');
+            nodes.push(block);
+        });
+        
+        if (typeof window.mermaid.run === 'function') {
+            window.mermaid.run({ nodes: nodes });
+        } else if (typeof window.mermaid.init === 'function') {
+            window.mermaid.init(undefined, nodes);
+        }
+    }
+    
+    function openDiagramForHash() {
+        if (!window.location.hash) return;
+        const anchor = document.getElementById(window.location.hash.substring(1));
+        if (!anchor || !anchor.classList.contains('workflow-subdiagram-anchor')) return;
+        
+        const details = anchor.closest('details');
+        if (details) {
+            details.open = true;
+            renderDeferred(details);
+            details.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        }
+    }
+    
+    dropdowns.forEach(details => {
+        details.addEventListener('toggle', function() {
+            if (this.open) renderDeferred(this);
+        });
+    });
+    
+    // Diagram node clicks link to "#wf-diagram-..." anchors
+    window.addEventListener('hashchange', openDiagramForHash);
+    openDiagramForHash();
+}
+
+
+/**
+ * Load lazy step details when their dropdown is first opened
+ * 
+ * Lazy pages leave step bodies out of the HTML and put them in JSON sidecars
+ * under _static/workflow-details/; each dropdown names its file and step key.
+ */
+function initializeLazyStepDetails() {
+    const dropdowns = document.querySelectorAll('details.workflow-lazy-dropdown');
+    if (dropdowns.length === 0) return;
+    
+    // Root of the built site, relative to this page
+    const root = document.documentElement.dataset.content_root
+        || (window.DOCUMENTATION_OPTIONS && DOCUMENTATION_OPTIONS.URL_ROOT)
+        || '';
+    
+    // One request per sidecar file, shared by every dropdown that uses it
+    const payloads = {};
+    
+    function fetchPayload(src) {
+        if (!payloads[src]) {
+            payloads[src] = fetch(root + '_static/' + src).then(response => {
+                if (!response.ok) throw new Error(response.status + ' ' + src);
+                return response.json();
+            });
+        }
+        return payloads[src];
+    }
+    
+    function loadDetails(details) {
+        const placeholder = details.querySelector('.workflow-lazy-details[data-src]');
+        if (!placeholder || placeholder.dataset.loaded) return;
+        placeholder.dataset.loaded = 'true';
+        
+        fetchPayload(placeholder.dataset.src).then(payload => {
+            placeholder.innerHTML = payload.steps[placeholder.dataset.key] || '';
+            placeholder.querySelectorAll('a[data-root-href]').forEach(link => {
+                link.href = root + link.dataset.rootHref;
+            });
+        }).catch(error => {
+            delete placeholder.dataset.loaded;
+            placeholder.innerHTML = '<em>Could not load step details.</em>';
+            console.error('Workflow step details:', error);
+        });
+    }
+    
+    dropdowns.forEach(details => {
+        details.addEventListener('toggle', function() {
+            if (this.open) loadDetails(this);
+        });
+    });
+}
+
+
 /**
  * Expand/collapse all steps
  */
@@ -193,7 +193,7 @@ class WorkflowTOCGenerator:
                     # Module with multiple tiers - collapsible
                     html_parts.append('<div class="module-header" onclick="toggleModule(this)">')
                     html_parts.append('<span class="toggle-icon">▶</span>')
-                    html_parts.append(f'<span class="module-name">📄 {workflow.module_name}</span>')
+                    html_parts.append(f'<span class="module-name">{self._module_icon(workflow)} {workflow.module_name}</span>')
                     html_parts.append('</div>')
                     
                     # Tier list
@@ -211,7 +211,7 @@ class WorkflowTOCGenerator:
                     tier = workflow.declared_tiers[0] if workflow.declared_tiers else 'default'
                     page_url = self._get_tier_url(workflow, tier)
                     html_parts.append(f'<a href="{page_url}" class="module-link">')
-                    html_parts.append(f'<span class="module-name">📄 {workflow.module_name}</span>')
+                    html_parts.append(f'<span class="module-name">{self._module_icon(workflow)} {workflow.module_name}</span>')
                     html_parts.append('</a>')
                 
                 html_parts.append('</li>')
@@ -328,6 +328,11 @@ class WorkflowTOCGenerator:
         """Get URL for a specific tier page."""
         page_name = self._get_page_name(workflow, tier)
         return f"{page_name}.html"
+    
+    @staticmethod
+    def _module_icon(workflow: DiscoveredWorkflow) -> str:
+        """Icon shown before a module (or notebook) name."""
+        return "📓" if workflow.is_notebook else "📄"
 
 
 class WorkflowIndexBuilder:
@@ -441,9 +446,12 @@ class WorkflowIndexBuilder:
         # Use workflow directive to render actual content
         module_path = workflow.module_path.as_posix()
         
-        lines.append(f".. workflow:: {module_path}")
-        lines.append(f"   :tier: {tier}")
-        lines.append("   :show-diagram:")
+        if workflow.is_notebook:
+            lines.append(f".. workflow-notebook:: {module_path}")
+        else:
+            lines.append(f".. workflow:: {module_path}")
+            lines.append(f"   :tier: {tier}")
+            lines.append("   :show-diagram:")
         lines.append("")
         
         # Navigation links to other tiers
@@ -0,0 +1,512 @@
+"""
+Watch mode for workflow discovery.
+
+Keeps a DiscoveryResult up to date while files change, re-analyzing only
+the files that changed instead of rediscovering the whole tree. Two
+change detection backends are available:
+
+- inotify (Linux): one watch per directory through libc via ctypes, so no
+  extra dependency; bursts of events are coalesced over a short window
+- polling: periodic re-enumeration, comparing (mtime, size) per file
+
+Events describe workflows rather than files: a file that gains workflow
+markers is reported as 'added', one that loses them as 'removed'.
+
+Example:
+    watcher = WorkflowDiscovery().watch(['protocols/'])
+    print(len(watcher.result.workflows))
+
+    for events in watcher:            # blocks; yields batches of events
+        for event in events:
+            print(event.kind, event.path)
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .discovery import DiscoveredWorkflow, DiscoveryResult, WorkflowDiscovery
+
+logger = logging.getLogger(__name__)
+
+WATCH_BACKENDS = ('auto', 'inotify', 'poll')
+"""Change detection backends; ``auto`` uses inotify where available."""
+
+
+@dataclass
+class DiscoveryEvent:
+    """A change to the workflows in a watched DiscoveryResult."""
+
+    kind: str
+    """'added', 'modified' or 'removed'."""
+
+    path: str
+    """Module path (the key in DiscoveryResult.workflows)."""
+
+    workflow: Optional[DiscoveredWorkflow] = None
+    """The new workflow record (None for 'removed')."""
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _PollingBackend:
+    """Request a full rescan every ``interval`` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_scan = time.monotonic() + interval
+
+    def watch_directory(self, directory: str) -> None:
+        """Polling rescans everything; directories need no registration."""
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """
+        Wait until the next rescan is due, or ``timeout`` expires.
+
+        Returns:
+            None when a rescan is due, else an empty set.
+        """
+        delay = self._next_scan - time.monotonic()
+        if delay > 0:
+            if timeout is not None and timeout < delay:
+                time.sleep(timeout)
+                return set()
+            time.sleep(delay)
+
+        self._next_scan = time.monotonic() + self.interval
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    """Collect changed paths from Linux inotify events."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+
+    MASK = (
+        IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    )
+
+    # struct inotify_event header: wd, mask, cookie, name length
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, debounce: float = 0.05):
+        """
+        Create an inotify instance.
+
+        Raises:
+            OSError: If inotify is not available on this platform.
+        """
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "libc has no inotify support")
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self.debounce = debounce
+        self._directories: Dict[int, str] = {}
+
+    def watch_directory(self, directory: str) -> None:
+        """
+        Add a watch for one directory (not recursive).
+
+        Raises:
+            OSError: If the watch cannot be added (e.g. ENOSPC when the
+                     max_user_watches limit is reached).
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOENT:
+                return  # Removed before the watch was added
+            raise OSError(err, os.strerror(err), directory)
+        self._directories[wd] = directory
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """
+        Wait for events, then keep reading until none arrive for ``debounce``.
+
+        Editors typically write, rename and chmod in quick succession; the
+        debounce window turns such a burst into one batch.
+
+        Returns:
+            Changed paths (files or directories), or None if the kernel
+            queue overflowed and a full rescan is needed.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed: Set[str] = set()
+        overflow = False
+        while ready:
+            overflow = self._read_events(changed) or overflow
+            ready, _, _ = select.select([self._fd], [], [], self.debounce)
+
+        return None if overflow else changed
+
+    def _read_events(self, changed: Set[str]) -> bool:
+        """Read all queued events into ``changed``; True on queue overflow."""
+        overflow = False
+        header_size = self.EVENT_HEADER.size
+
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return overflow
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + header_size:offset + header_size + length].rstrip(b'\0')
+                offset += header_size + length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    # Watch removed by the kernel (directory deleted)
+                    del self._directories[wd]
+                    continue
+
+                changed.add(os.path.join(directory, os.fsdecode(name)) if name else directory)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class DiscoveryWatcher:
+    """
+    Live DiscoveryResult for a set of search paths.
+
+    Created by WorkflowDiscovery.watch(). Call poll() to apply pending
+    changes, or iterate to block for batches of events. New workflows are
+    appended to ``result.workflows``; updated ones replace their entry.
+    """
+
+    def __init__(
+        self,
+        discovery: WorkflowDiscovery,
+        search_paths: List[str],
+        recursive: bool = True,
+        backend: str = 'auto',
+        interval: float = 1.0
+    ):
+        """
+        Run the initial discovery and start watching.
+
+        Args:
+            discovery: Configured WorkflowDiscovery (patterns, cache, ...).
+            search_paths: List of directories to scan (relative to base_path).
+            recursive: Whether to search subdirectories.
+            backend: 'inotify', 'poll', or 'auto' (inotify where available,
+                     falling back to polling).
+            interval: Seconds between rescans for the polling backend.
+        """
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"backend must be one of {WATCH_BACKENDS}, got {backend!r}")
+
+        self.discovery = discovery
+        self.search_paths = list(search_paths)
+        self.recursive = recursive
+        self.roots = [discovery.resolve_path(p) for p in self.search_paths]
+
+        self.result = DiscoveryResult()
+        # With collect_metrics, counters accumulate over the initial scan and all updates
+        discovery._metrics = self.result.metrics = discovery._new_metrics()
+        files = discovery._collect_search_paths(self.search_paths, self.result, recursive)
+        discovery._process_files(files, self.result)
+        self._snapshot = {str(f): _stat_key(str(f)) for f in files}
+
+        self._backend = self._start_backend(backend, interval)
+        self.backend = 'poll' if isinstance(self._backend, _PollingBackend) else 'inotify'
+
+    def __enter__(self) -> 'DiscoveryWatcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[List[DiscoveryEvent]]:
+        """Block for changes, yielding each non-empty batch of events."""
+        while self._backend is not None:
+            events = self.poll(timeout=None)
+            if events:
+                yield events
+
+    def close(self) -> None:
+        """Stop watching."""
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def poll(self, timeout: Optional[float] = 0.0) -> List[DiscoveryEvent]:
+        """
+        Apply pending changes to ``result``.
+
+        Args:
+            timeout: Seconds to wait for changes (None blocks until the
+                     backend reports something).
+
+        Returns:
+            Events for workflows added, modified or removed.
+        """
+        if self._backend is None:
+            raise RuntimeError("watcher is closed")
+
+        changed = self._backend.wait(timeout)
+        if changed is None:
+            return self.rescan()
+        return self._apply(changed)
+
+    def rescan(self) -> List[DiscoveryEvent]:
+        """
+        Re-enumerate all search paths and apply differences.
+
+        Files are compared by (mtime, size); only new and changed files
+        are re-analyzed.
+        """
+        files = self.discovery._collect_search_paths(self.search_paths, DiscoveryResult(), self.recursive)
+        current = {str(f): _stat_key(str(f)) for f in files}
+
+        changed = {p for p, key in current.items() if self._snapshot.get(p, False) != key}
+        changed.update(set(self._snapshot) - set(current))
+
+        # Directories may have appeared since the watches were added
+        if self._backend is not None and not isinstance(self._backend, _PollingBackend):
+            for root in self.roots:
+                if root.is_dir():
+                    self._watch_tree(root)
+
+        return self._apply(changed, candidates=set(current))
+
+    def _start_backend(self, backend: str, interval: float):
+        """Create the backend and register the directories to watch."""
+        if backend != 'poll':
+            inotify = None
+            try:
+                inotify = self._backend = _InotifyBackend()
+                for root in self.roots:
+                    if root.is_dir():
+                        self._watch_tree(root)
+                return inotify
+            except OSError as e:
+                if inotify is not None:
+                    inotify.close()
+                if backend == 'inotify':
+                    raise
+                logger.info(f"inotify unavailable ({e}), polling every {interval}s")
+
+        return _PollingBackend(interval)
+
+    def _watch_tree(self, top: Path) -> None:
+        """
+        Watch a directory and its subdirectories, pruned like the walk.
+
+        Skip dirs, excluded directories and (inside git checkouts)
+        git-ignored directories are not watched.
+        """
+        discovery = self.discovery
+        rel_top = discovery._relative_path(top)
+        prefix = f"{rel_top}/" if rel_top else ''
+
+        directories = [str(top)]
+        rel_directories = []
+        stack = [(str(top), prefix)]
+        while stack and self.recursive:
+            current, prefix = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = [e for e in it if e.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.name in discovery.skip_dirs or discovery._exclude.match(rel_path, is_dir=True):
+                    continue
+                directories.append(entry.path)
+                rel_directories.append(os.path.relpath(entry.path, top))
+                stack.append((entry.path, rel_path + '/'))
+
+        ignored = discovery._git_ignored(top, rel_directories)
+        if ignored:
+            ignored_dirs = [os.path.join(str(top), p.rstrip('/')) for p in ignored]
+            directories = [
+                d for d in directories
+                if not any(d == i or d.startswith(i + os.sep) for i in ignored_dirs)
+            ]
+
+        for directory in directories:
+            self._backend.watch_directory(directory)
+
+    def _root_for(self, path: str) -> Optional[Path]:
+        """The search path a file belongs to, if any."""
+        for root in self.roots:
+            root_str = str(root)
+            if path == root_str or path.startswith(root_str + os.sep):
+                return root
+        return None
+
+    def _apply(self, changed: Set[str], candidates: Optional[Set[str]] = None) -> List[DiscoveryEvent]:
+        """
+        Re-analyze changed files and update the result.
+
+        Args:
+            changed: Changed paths; may include directories (created,
+                     moved or removed) and files that are not candidates.
+            candidates: Known candidate files (from a rescan). When None,
+                        each changed file is checked against the rules.
+        """
+        files: Set[str] = set()
+        removed: Set[str] = set()
+
+        for path in changed:
+            if os.path.isdir(path):
+                if candidates is None:
+                    files.update(self._added_directory(path))
+            elif os.path.isfile(path):
+                files.add(path)
+            else:
+                # Deleted file or directory: drop everything under it
+                removed.update(p for p in self._snapshot if p == path or p.startswith(path + os.sep))
+
+        if candidates is not None:
+            not_candidates = files - candidates
+        else:
+            not_candidates = {p for p in files if not self._is_candidate(p)}
+            not_candidates.update(self._ignored(files - not_candidates))
+        removed.update(p for p in not_candidates if p in self._snapshot)
+        files -= not_candidates
+
+        # Package names may have changed with the tree
+        self.discovery._package_names = {}
+        batch = DiscoveryResult()
+        ordered = sorted(files)
+        self.discovery._process_files([Path(p) for p in ordered], batch)
+
+        events: List[DiscoveryEvent] = []
+        for path in ordered:
+            self._snapshot[path] = _stat_key(path)
+            workflow = batch.workflows.get(path)
+            previous = self.result.workflows.get(path)
+            if workflow is not None:
+                self.result.workflows[path] = workflow
+                if previous is None:
+                    events.append(DiscoveryEvent('added', path, workflow))
+                elif previous != workflow:
+                    events.append(DiscoveryEvent('modified', path, workflow))
+            elif previous is not None:
+                del self.result.workflows[path]
+                events.append(DiscoveryEvent('removed', path))
+
+        for path in sorted(removed):
+            self._snapshot.pop(path, None)
+            if self.result.workflows.pop(path, None) is not None:
+                events.append(DiscoveryEvent('removed', path))
+
+        touched = files | removed
+        self.result.skipped = [s for s in self.result.skipped if s[0] not in touched] + batch.skipped
+        for message, error_path in batch.error_items():
+            self.result.add_error(message, error_path)
+
+        if self.discovery.verbose:
+            for event in events:
+                logger.info(f"Workflow {event.kind}: {event.path}")
+
+        return events
+
+    def _added_directory(self, directory: str) -> List[str]:
+        """Start watching a new directory and list its candidate files."""
+        root = self._root_for(directory)
+        if root is None:
+            return []
+
+        path = Path(directory)
+        if path != root and not self._is_candidate_directory(path, root):
+            return []
+        if self._backend is not None:
+            self._watch_tree(path)
+
+        files: List[Path] = []
+        self.discovery._collect_files(path, DiscoveryResult(), self.recursive, files)
+        return [str(f) for f in files]
+
+    def _is_candidate(self, path: str) -> bool:
+        """Check a changed file against the search paths and patterns."""
+        root = self._root_for(path)
+        if root is None:
+            return False
+        if path == str(root):
+            return True
+        return self.discovery._is_candidate(Path(path), root, self.recursive)
+
+    def _is_candidate_directory(self, directory: Path, root: Path) -> bool:
+        """Check that no directory between root and ``directory`` is pruned."""
+        discovery = self.discovery
+        rel_parts = directory.relative_to(root).parts
+        if not self.recursive and rel_parts:
+            return False
+
+        rel_root = discovery._relative_path(root)
+        prefix = f"{rel_root}/" if rel_root else ''
+        for depth, part in enumerate(rel_parts, 1):
+            rel_path = prefix + '/'.join(rel_parts[:depth])
+            if part in discovery.skip_dirs or discovery._exclude.match(rel_path, is_dir=True):
+                return False
+        return True
+
+    def _ignored(self, files: Set[str]) -> Set[str]:
+        """Changed files that git ignores (they were not listed initially)."""
+        ignored: Set[str] = set()
+        by_root: Dict[Path, List[str]] = {}
+        for path in files:
+            root = self._root_for(path)
+            if root is not None and root.is_dir():
+                by_root.setdefault(root, []).append(os.path.relpath(path, root))
+
+        for root, rel_paths in by_root.items():
+            ignored.update(os.path.join(str(root), p) for p in self.discovery._git_ignored(root, rel_paths))
+        return ignored
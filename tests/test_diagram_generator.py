@@ -0,0 +1,95 @@
+"""
+Test suite for clustered Mermaid diagram generation.
+
+Run with:
+    pytest tests/test_diagram_generator.py -v
+"""
+
+import re
+
+import pytest
+
+
+def _make_steps(top_level: int, subs_per_step: int = 0):
+    """Build a StepData tree with the given shape."""
+    from sphinx_dflow_ext.db_adapter import StepData
+
+    steps = []
+    for i in range(1, top_level + 1):
+        subs = [
+            StepData(number=f"{i}.{j}", name=f"Sub {i}.{j}")
+            for j in range(1, subs_per_step + 1)
+        ]
+        steps.append(StepData(number=str(i), name=f"Step {i}", sub_steps=subs))
+    return steps
+
+
+def _diagram_blocks(lines):
+    """Split RST output into the main diagram and deferred sub-diagrams."""
+    text = '\n'.join(lines)
+    main = text.split('.. dropdown::')[0]
+    deferred = re.findall(r'<pre class="workflow-mermaid-deferred">(.*?)</pre>', text, re.S)
+    return main, deferred
+
+
+def _node_count(source):
+    """Count node definitions (``id["label"]``) in Mermaid source."""
+    return len(re.findall(r'^\s*[SR][\w]*\[', source, re.M))
+
+
+class TestMermaidDiagramBuilder:
+    """Test the MermaidDiagramBuilder class."""
+
+    def test_every_diagram_respects_node_budget(self):
+        """Main and drill-down diagrams stay under max_nodes for 300+ steps."""
+        from sphinx_dflow_ext.diagram_generator import MermaidDiagramBuilder
+
+        lines = MermaidDiagramBuilder(max_nodes=20).build_rst(_make_steps(320, 3), 'big')
+        main, deferred = _diagram_blocks(lines)
+
+        assert _node_count(main) <= 20
+        assert deferred
+        assert all(_node_count(block) <= 20 for block in deferred)
+
+    def test_sub_steps_clustered_in_subgraphs(self):
+        """Sub-steps that fit the budget are grouped under their parent."""
+        from sphinx_dflow_ext.diagram_generator import MermaidDiagramBuilder
+
+        lines = MermaidDiagramBuilder(max_nodes=20).build_rst(_make_steps(3, 2), 'small')
+        main, deferred = _diagram_blocks(lines)
+
+        assert 'subgraph S1_group' in main
+        assert 'S1 --> S1_1' in main
+        assert deferred == []
+
+    def test_collapsed_steps_get_drilldown_links(self):
+        """Steps that do not fit link to a per-step sub-diagram."""
+        from sphinx_dflow_ext.diagram_generator import MermaidDiagramBuilder
+
+        lines = MermaidDiagramBuilder(max_nodes=5).build_rst(_make_steps(2, 10), 'func')
+        text = '\n'.join(lines)
+
+        assert '(+10 sub-steps)' in text
+        assert 'click S1 href "#wf-diagram-func-1"' in text
+        assert 'id="wf-diagram-func-1"' in text
+
+    @pytest.mark.parametrize('mode, expected', [
+        ('flat', False),
+        ('clustered', True),
+        ('auto', True),
+    ])
+    def test_use_clustered_diagram(self, mode, expected):
+        """Auto mode only clusters when over budget."""
+        from sphinx_dflow_ext.diagram_generator import use_clustered_diagram
+
+        assert use_clustered_diagram(_make_steps(30, 2), mode, 50) is expected
+        assert use_clustered_diagram(_make_steps(3), 'auto', 50) is False
+
+    def test_db_directive_keeps_flat_diagram_for_small_workflows(self):
+        """The default auto mode leaves small diagrams unchanged."""
+        from sphinx_dflow_ext.directives_db import WorkflowDBDirective
+
+        directive = WorkflowDBDirective.__new__(WorkflowDBDirective)
+        lines = directive._generate_diagram(_make_steps(3, 1), 'auto', 50)
+
+        assert lines[:3] == ['.. mermaid::', '', '   flowchart TD']
@@ -0,0 +1,482 @@
+"""
+Test suite for the database-backed directives.
+
+Run with:
+    pytest tests/test_directives_db.py -v
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+
+def _make_workflow():
+    """Build a small WorkflowData tree without touching the database."""
+    from sphinx_dflow_ext.db_adapter import FunctionData, StepData, WorkflowData
+
+    sub = StepData(number="1.1", name="Read files", purpose="Read raw data", line=12)
+    step1 = StepData(
+        number="1", name="Load data", purpose="Load inputs",
+        inputs="paths", outputs="frame", line=10, sub_steps=[sub]
+    )
+    step2 = StepData(number="2", name="Process", critical="Check units", line=20)
+    func = FunctionData(
+        name="run_analysis",
+        docstring="Run the analysis.\n\nMore text.",
+        steps=[step1, step2],
+        module_path="pkg/analysis.py",
+    )
+    return WorkflowData(
+        name="analysis",
+        module_name="analysis",
+        module_path="pkg/analysis.py",
+        functions=[func],
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_build_caches():
+    """Start every test without per-build caches (they are keyed by id(env))."""
+    from sphinx_dflow_ext import directives_db
+
+    directives_db._build_caches.clear()
+    yield
+    directives_db._build_caches.clear()
+
+
+@pytest.fixture
+def directive():
+    """A WorkflowDBDirective instance usable for its rendering helpers."""
+    from sphinx_dflow_ext.directives_db import WorkflowDBDirective
+
+    return WorkflowDBDirective.__new__(WorkflowDBDirective)
+
+
+class TestTierRendering:
+    """Test single-pass multi-tier rendering."""
+
+    def test_render_tiers_matches_single_tier_output(self, directive):
+        """Rendering all tiers at once gives the same lines as one tier at a time."""
+        from sphinx_dflow_ext.directives_db import TIERS
+
+        workflow = _make_workflow()
+        rendered = directive._render_tiers(workflow, TIERS, True, True, True)
+
+        for tier in TIERS:
+            assert rendered[tier] == directive._generate_rst(workflow, tier, True, True, True)
+
+    def test_tiers_filter_fields(self, directive):
+        """Overview hides purpose, only full shows inputs/outputs."""
+        rendered = directive._render_tiers(
+            _make_workflow(), ('overview', 'detailed', 'full'), False, True, True
+        )
+
+        overview = '\n'.join(rendered['overview'])
+        detailed = '\n'.join(rendered['detailed'])
+        full = '\n'.join(rendered['full'])
+
+        assert '**Purpose:**' not in overview
+        assert '**Purpose:** Load inputs' in detailed
+        assert ':Inputs: paths' not in detailed
+        assert ':Inputs: paths' in full
+        assert 'Check units' in overview
+
+    def test_tabbed_rst_has_one_tab_per_tier(self, directive):
+        """``:tier: all`` emits a tab-set with anchors only in the first tab."""
+        lines = directive._generate_tabbed_rst(_make_workflow(), False, True, True)
+
+        assert lines[0] == '.. tab-set::'
+        assert sum(1 for line in lines if '.. tab-item::' in line) == 3
+        assert sum(1 for line in lines if '.. _step-1:' in line) == 1
+
+    def test_tabbed_rst_emits_diagrams_once(self, directive):
+        """Clustered diagrams and their drill-down ids appear once, above the tabs."""
+        import re
+
+        lines = directive._generate_tabbed_rst(
+            _make_workflow(), True, True, True,
+            diagram_mode='clustered', diagram_max_nodes=2
+        )
+        text = '\n'.join(lines)
+        ids = re.findall(r'id="([^"]+)"', text) + re.findall(r'^\s*\.\. _([^:]+):', text, re.M)
+
+        assert ids and len(ids) == len(set(ids))
+        assert text.count('flowchart') == len(re.findall(r'workflow-subdiagram-anchor', text)) + 1
+        assert text.index('flowchart') < text.index('.. tab-set::')
+
+
+class TestWorkflowCache:
+    """Test the build-wide workflow cache."""
+
+    def test_target_fetched_once_per_build(self, monkeypatch):
+        """Repeated lookups of a target hit the adapter only once."""
+        from sphinx_dflow_ext import directives_db
+
+        calls = []
+
+        class FakeAdapter:
+            def __init__(self, project_root, db_path=None):
+                pass
+
+            def get_function_workflow(self, target):
+                calls.append(target)
+                return _make_workflow()
+
+        monkeypatch.setattr(directives_db, 'DatabaseAdapter', FakeAdapter)
+        env = SimpleNamespace()
+
+        first = directives_db.get_cached_workflow(env, 'pkg/analysis.py:run', Path('/proj'))
+        second = directives_db.get_cached_workflow(env, 'pkg/analysis.py:run', Path('/proj'))
+
+        assert first is second
+        assert calls == ['pkg/analysis.py:run']
+
+    def test_prefetch_resolves_all_targets_in_one_call(self, tmp_path, monkeypatch):
+        """Targets in the documents to read are batch-fetched before reading."""
+        from sphinx_dflow_ext import directives_db
+
+        calls = []
+
+        class FakeAdapter:
+            def __init__(self, project_root, db_path=None):
+                pass
+
+            def get_workflows(self, targets):
+                calls.append(list(targets))
+                return {t: _make_workflow() for t in targets}
+
+            def close(self):
+                calls.append('close')
+
+            def get_function_workflow(self, target):
+                raise AssertionError('served from prefetched cache')
+
+        monkeypatch.setattr(directives_db, 'DatabaseAdapter', FakeAdapter)
+        docs = tmp_path / 'docs'
+        docs.mkdir()
+        (docs / 'a.rst').write_text('.. workflow-db:: pkg/analysis.py:run\n   :tier: all\n')
+        (docs / 'b.rst').write_text(
+            '.. workflow-db:: pkg/analysis.py:run\n\n.. workflow-db:: other:main\n'
+        )
+        env = SimpleNamespace(
+            srcdir=str(docs),
+            config=SimpleNamespace(workflow_db_path=None),
+            doc2path=lambda docname: docs / f'{docname}.rst',
+        )
+
+        directives_db.reset_workflow_db_cache(None, env, ['a', 'b'])
+        directives_db.prefetch_workflow_db_targets(None, env, ['a', 'b'])
+
+        # The engine is disposed before parallel readers fork
+        assert calls == [['pkg/analysis.py:run', 'other:main'], 'close']
+        assert directives_db.get_cached_workflow(env, 'other:main', tmp_path) is not None
+        assert vars(env).keys() == {'srcdir', 'config', 'doc2path'}
+
+    def test_adapters_are_per_process(self, monkeypatch):
+        """A forked reader opens its own adapter instead of reusing the parent's."""
+        from sphinx_dflow_ext import directives_db
+
+        monkeypatch.setattr(
+            directives_db, 'DatabaseAdapter', lambda project_root, db_path=None: object()
+        )
+        env = SimpleNamespace()
+        parent = directives_db._get_adapter(env, Path('/proj'), None)
+        assert directives_db._get_adapter(env, Path('/proj'), None) is parent
+
+        monkeypatch.setattr(directives_db.os, 'getpid', lambda: -1)
+        assert directives_db._get_adapter(env, Path('/proj'), None) is not parent
+
+    def test_reset_and_drop_cache(self):
+        """Caches are emptied before reading and dropped after it."""
+        from sphinx_dflow_ext import directives_db
+
+        closed = []
+        env = SimpleNamespace()
+        directives_db._build_cache(env, 'workflows')[('a', 'b')] = None
+        directives_db._build_cache(env, 'adapters')['db'] = SimpleNamespace(close=lambda: closed.append('db'))
+        directives_db.reset_workflow_db_cache(None, env, [])
+        assert directives_db._build_cache(env, 'workflows') == {}
+        assert closed == ['db']
+
+        directives_db.drop_workflow_db_cache(None, env)
+        assert id(env) not in directives_db._build_caches
+
+    def test_env_stays_picklable(self, monkeypatch):
+        """Adapters and cached renders never end up on the pickled environment."""
+        import pickle
+        import threading
+
+        from sphinx_dflow_ext import directives_db
+
+        class FakeAdapter:
+            def __init__(self, project_root, db_path=None):
+                self.engine = threading.Lock()  # Unpicklable, like an engine
+
+            def get_function_workflow(self, target):
+                return _make_workflow()
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(directives_db, 'DatabaseAdapter', FakeAdapter)
+        env = SimpleNamespace(config=SimpleNamespace(), docname='index')
+        directive = directives_db.WorkflowDBDirective.__new__(directives_db.WorkflowDBDirective)
+
+        workflow = directives_db.get_cached_workflow(env, 'pkg/analysis.py:run', Path('/proj'))
+        directive._get_rendered_tiers(
+            env, ('/proj', 'pkg/analysis.py:run'), workflow, 'detailed', True, True, True
+        )
+
+        assert directives_db._build_cache(env, 'adapters')
+        assert pickle.loads(pickle.dumps(env)).__dict__ == env.__dict__
+
+
+class TestLazyDetails:
+    """Test the lazy step detail skeleton and sidecar payloads."""
+
+    def test_skeleton_moves_step_bodies_to_payload(self, directive):
+        """The page keeps step titles; bodies and sub-steps go to the payload."""
+        sources = {'full': 'workflow-details/analysis-full.json'}
+        payloads = {}
+        rendered = directive._render_tiers(
+            _make_workflow(), ('full',), False, True, True,
+            lazy_sources=sources, lazy_payloads=payloads
+        )
+        page = '\n'.join(rendered['full'])
+
+        assert 'Step 1: Load data' in page
+        assert '.. dropdown:: Details and sub-steps (1)' in page
+        assert 'data-key="run_analysis/1"' in page
+        assert 'Load inputs' not in page
+        assert 'Step 1.1' not in page
+
+        body = payloads['full']['run_analysis/1']
+        assert 'Load inputs' in body
+        assert 'Step 1.1: Read files' in body
+        assert 'data-root-href="_modules/analysis.html#step-run_analysis-1-1"' in body
+        assert 'Check units' in payloads['full']['run_analysis/2']
+
+    def test_payloads_follow_tier_rules(self, directive):
+        """Payload HTML hides purpose in overview and inputs outside full."""
+        from sphinx_dflow_ext.directives_db import TIERS
+
+        payloads = {}
+        directive._render_tiers(
+            _make_workflow(), TIERS, False, True, True,
+            lazy_sources={t: f'{t}.json' for t in TIERS}, lazy_payloads=payloads
+        )
+
+        assert 'Load inputs' not in payloads['overview']['run_analysis/1']
+        assert 'Load inputs' in payloads['detailed']['run_analysis/1']
+        assert 'paths' not in payloads['detailed']['run_analysis/1']
+        assert 'paths' in payloads['full']['run_analysis/1']
+
+    def test_payload_markup_matches_page_output(self, directive):
+        """Inline markup in step fields renders the same lazily and on the page."""
+        from docutils.core import publish_parts
+
+        workflow = _make_workflow()
+        step = workflow.functions[0].steps[1]
+        step.purpose = "Scale the ``frame`` *in place*"
+        step.inputs = "**raw** values"
+        step.critical = "Check ``units`` first"
+        workflow.functions[0].steps = [step]
+
+        eager = directive._render_tiers(workflow, ('full',), False, True, False)
+        page = publish_parts(
+            '\n'.join(eager['full']), writer_name='html5',
+            settings_overrides={'report_level': 5}
+        )['fragment']
+        payloads = {}
+        directive._render_tiers(
+            workflow, ('full',), False, True, False,
+            lazy_sources={'full': 'full.json'}, lazy_payloads=payloads
+        )
+        body = payloads['full']['run_analysis/2']
+
+        assert '<span class="docutils literal">frame</span>' in body
+        assert '<strong>raw</strong>' in body
+        assert body in page
+
+    def test_write_lazy_payloads(self, tmp_path):
+        """Stored payloads are written as JSON sidecars at build-finished."""
+        import json
+
+        from sphinx_dflow_ext import directives_db
+
+        name = 'workflow-details/analysis-full-abc.json'
+        payload = {'target': 'analysis', 'tier': 'full', 'steps': {'f/1': '<p>x</p>'}}
+        app = SimpleNamespace(
+            outdir=str(tmp_path),
+            env=SimpleNamespace(workflow_lazy_payloads={'index': {name: payload}}),
+        )
+        directives_db.write_lazy_payloads(app, None)
+
+        written = tmp_path / '_static' / name
+        assert json.loads(written.read_text(encoding='utf-8')) == payload
+
+    def test_payloads_purged_with_their_document(self, tmp_path, directive):
+        """Payloads are kept per document; sidecars of purged documents are removed."""
+        from sphinx_dflow_ext import directives_db
+
+        env = SimpleNamespace(docname='a')
+        render_key = ('/proj', 'analysis', False, True, True, 'flat', 50, True)
+        for docname in ('a', 'b'):
+            env.docname = docname
+            directive._get_rendered_tiers(
+                env, render_key, _make_workflow(), 'full', False, True, True, lazy_details=True
+            )
+        assert env.workflow_lazy_payloads['a'] == env.workflow_lazy_payloads['b']
+
+        app = SimpleNamespace(outdir=str(tmp_path), env=env)
+        details = tmp_path / '_static' / directives_db.LAZY_DETAILS_DIR
+        directives_db.write_lazy_payloads(app, None)
+        assert len(list(details.iterdir())) == 3  # One sidecar per tier
+
+        directives_db.purge_lazy_payloads(None, env, 'a')
+        directives_db.write_lazy_payloads(app, None)
+        assert len(list(details.iterdir())) == 3  # Still used by b
+
+        directives_db.purge_lazy_payloads(None, env, 'b')
+        directives_db.write_lazy_payloads(app, None)
+        assert env.workflow_lazy_payloads == {} and list(details.iterdir()) == []
+
+
+def _make_summaries():
+    """Build workflow summaries for three modules in two packages."""
+    from sphinx_dflow_ext.db_adapter import FunctionSummary, WorkflowSummary
+
+    return [
+        WorkflowSummary('io', 'src/io/io.py', [FunctionSummary('read', 2), FunctionSummary('w', 1)]),
+        WorkflowSummary('cli', 'src/cli.py', [FunctionSummary('scan', 4)]),
+        WorkflowSummary('main', 'main.py', [FunctionSummary('main', 3)]),
+    ]
+
+
+class TestIndexSharding:
+    """Test sharded workflow-index-db pages."""
+
+    def test_shard_by_package(self):
+        """Modules are grouped by their directory."""
+        from sphinx_dflow_ext.directives_db import shard_workflow_summaries
+
+        shards = shard_workflow_summaries(_make_summaries(), 'package')
+
+        assert list(shards) == ['(root)', 'src', 'src.io']
+        assert [s.module_name for s in shards['src']] == ['cli']
+
+    def test_shard_by_pages(self):
+        """Pages hold page_size modules in module name order."""
+        from sphinx_dflow_ext.directives_db import shard_workflow_summaries
+
+        shards = shard_workflow_summaries(_make_summaries(), 'pages', page_size=2)
+
+        assert list(shards) == ['page-1', 'page-2']
+        assert [s.module_name for s in shards['page-1']] == ['cli', 'io']
+
+    def test_shard_summary_has_counts_and_toctree(self):
+        """The top-level page lists counts per shard and links every shard page."""
+        from sphinx_dflow_ext.directives_db import (
+            WorkflowIndexDBDirective,
+            shard_workflow_summaries,
+        )
+
+        directive = WorkflowIndexDBDirective.__new__(WorkflowIndexDBDirective)
+        shards = shard_workflow_summaries(_make_summaries(), 'package')
+        lines = directive._generate_shard_summary(shards, 'package', 'workflow-index')
+
+        assert '   * - :doc:`src.io </workflow-index/src.io>`' in lines
+        assert '     - **10**' in lines
+        assert '   /workflow-index/root' in lines
+
+    def test_shard_pages_written_and_pruned(self, tmp_path, monkeypatch):
+        """Shard pages are generated once and stale generated pages removed."""
+        from sphinx_dflow_ext import directives_db
+
+        monkeypatch.setattr(directives_db, 'get_cached_summaries', lambda *a: _make_summaries())
+        shard_dir = tmp_path / 'workflow-index'
+        shard_dir.mkdir()
+        (shard_dir / 'old.rst').write_text(directives_db.SHARD_PAGE_MARKER + '\n')
+        (shard_dir / 'manual.rst').write_text('Hand written\n')
+
+        app = SimpleNamespace(
+            srcdir=str(tmp_path),
+            env=SimpleNamespace(srcdir=str(tmp_path), config=SimpleNamespace()),
+            config=SimpleNamespace(
+                workflow_index_shard_by='package',
+                workflow_index_page_size=200,
+                workflow_index_shard_dir='workflow-index',
+            ),
+        )
+        directives_db.generate_index_shard_pages(app)
+
+        assert sorted(p.name for p in shard_dir.iterdir()) == [
+            'manual.rst', 'root.rst', 'src.io.rst', 'src.rst'
+        ]
+        assert ':shard: src.io' in (shard_dir / 'src.io.rst').read_text()
+
+    def test_shard_page_changes_when_members_are_renamed(self, tmp_path, monkeypatch):
+        """Renaming a function without changing counts still rewrites its shard page."""
+        from sphinx_dflow_ext import directives_db
+
+        summaries = _make_summaries()
+        monkeypatch.setattr(directives_db, 'get_cached_summaries', lambda *a: summaries)
+        app = SimpleNamespace(
+            srcdir=str(tmp_path),
+            env=SimpleNamespace(srcdir=str(tmp_path), config=SimpleNamespace()),
+            config=SimpleNamespace(
+                workflow_index_shard_by='package',
+                workflow_index_page_size=200,
+                workflow_index_shard_dir='workflow-index',
+            ),
+        )
+        directives_db.generate_index_shard_pages(app)
+        before = {p.name: p.read_text() for p in (tmp_path / 'workflow-index').iterdir()}
+
+        summaries[1].functions[0].name = 'scan_all'
+        directives_db.generate_index_shard_pages(app)
+        after = {p.name: p.read_text() for p in (tmp_path / 'workflow-index').iterdir()}
+
+        assert [name for name in before if before[name] != after[name]] == ['src.rst']
+
+    def test_shard_summaries_reused_by_the_read_phase(self, tmp_path, monkeypatch):
+        """The directive reuses the summaries queried for the shard pages."""
+        from sphinx_dflow_ext import directives_db
+
+        calls = []
+
+        class FakeAdapter:
+            def __init__(self, project_root, db_path=None):
+                pass
+
+            def get_workflow_summaries(self):
+                calls.append('query')
+                return _make_summaries()
+
+            def close(self):
+                calls.append('close')
+
+        monkeypatch.setattr(directives_db, 'DatabaseAdapter', FakeAdapter)
+        env = SimpleNamespace(srcdir=str(tmp_path / 'docs'), config=SimpleNamespace())
+        app = SimpleNamespace(
+            srcdir=str(tmp_path),
+            env=env,
+            config=SimpleNamespace(
+                workflow_index_shard_by='package',
+                workflow_index_page_size=200,
+                workflow_index_shard_dir='workflow-index',
+            ),
+        )
+        directives_db.generate_index_shard_pages(app)
+        assert calls == ['query', 'close']
+
+        directives_db.reset_workflow_db_cache(None, env, [])
+        source_dir, db_path = directives_db._resolve_db_location(env)
+        assert len(directives_db.get_cached_summaries(env, source_dir, db_path)) == 3
+        assert calls.count('query') == 1
+
+        # The next build in the same process queries again
+        directives_db.reset_workflow_db_cache(None, env, [])
+        directives_db.get_cached_summaries(env, source_dir, db_path)
+        assert calls.count('query') == 2
@@ -0,0 +1,643 @@
+"""
+Test suite for discovery scanning performance features.
+
+Run with:
+    pytest tests/test_discovery_scan.py -v
+"""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+
+def _make_tree(root: Path, content: str, count: int = 12) -> Path:
+    """Create a package with ``count`` workflow modules and some plain files."""
+    package = root / 'pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    for i in range(count):
+        (package / f'mod_{i:02d}.py').write_text(content)
+        (package / f'plain_{i:02d}.py').write_text('x = 1\n')
+    return root
+
+
+class TestParallelDiscovery:
+    """Test opt-in parallel file analysis."""
+
+    @pytest.mark.parametrize('workers, executor', [
+        (4, 'thread'),
+        (2, 'process'),
+    ])
+    def test_parallel_matches_serial(
+        self, tmp_path, sample_workflow_module_content, workers, executor
+    ):
+        """Parallel discovery yields the same result, in the same order."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content)
+
+        serial = WorkflowDiscovery(base_path=tmp_path).discover(['pkg'])
+        parallel = WorkflowDiscovery(
+            base_path=tmp_path, workers=workers, executor=executor
+        ).discover(['pkg'])
+
+        assert len(serial.workflows) == 12
+        assert list(parallel.workflows) == list(serial.workflows)
+        assert list(parallel.workflows.values()) == list(serial.workflows.values())
+        assert parallel.skipped == serial.skipped
+
+    def test_invalid_executor(self):
+        """Unknown pool types are rejected early."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        with pytest.raises(ValueError):
+            WorkflowDiscovery(executor='fibers')
+
+
+class TestDirectoryWalk:
+    """Test the scandir-based walker."""
+
+    def test_heavy_directories_pruned(self, tmp_path, sample_workflow_module_content):
+        """Well-known heavy directories are never descended into."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=2)
+        for heavy in ('node_modules', '__pycache__', '.git'):
+            (tmp_path / 'pkg' / heavy).mkdir()
+            (tmp_path / 'pkg' / heavy / 'mod.py').write_text(sample_workflow_module_content)
+
+        result = WorkflowDiscovery(
+            base_path=tmp_path, exclude_patterns=['test_*']
+        ).discover(['pkg'])
+
+        assert sorted(Path(p).name for p in result.workflows) == ['mod_00.py', 'mod_01.py']
+
+    def test_deep_tree_and_name_order(self, tmp_path, sample_workflow_module_content):
+        """Nested directories are walked, visiting entries in name order."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        deep = tmp_path / 'root'
+        current = deep
+        for i in range(50):
+            current = current / f'd{i}'
+        current.mkdir(parents=True)
+        (current / 'deep.py').write_text(sample_workflow_module_content)
+        for name in ('b.py', 'a.py'):
+            (deep / name).write_text(sample_workflow_module_content)
+
+        result = WorkflowDiscovery(base_path=tmp_path).discover(['root'])
+
+        assert [Path(p).name for p in result.workflows] == ['a.py', 'b.py', 'deep.py']
+
+
+class TestDiscoveryCache:
+    """Test the persistent per-file discovery cache."""
+
+    def test_warm_run_reads_only_changed_files(
+        self, tmp_path, sample_workflow_module_content, monkeypatch
+    ):
+        """Unchanged files are served from the cache; edited files are re-read."""
+        from sphinx_dflow_ext.discovery import DiscoveryCache, WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=3)
+        cache_path = tmp_path / 'cache.json'
+
+        cold = WorkflowDiscovery(
+            base_path=tmp_path, cache=DiscoveryCache(cache_path)
+        ).discover(['pkg'])
+        assert cache_path.exists()
+
+        changed = tmp_path / 'pkg' / 'plain_00.py'
+        changed.write_text(sample_workflow_module_content + '\n# edited\n')
+
+        analyzed = []
+        original = WorkflowDiscovery._analyze_file
+
+        def spy(self, file_path):
+            analyzed.append(file_path.name)
+            return original(self, file_path)
+
+        monkeypatch.setattr(WorkflowDiscovery, '_analyze_file', spy)
+        warm = WorkflowDiscovery(
+            base_path=tmp_path, cache=DiscoveryCache(cache_path)
+        ).discover(['pkg'])
+
+        assert analyzed == ['plain_00.py']
+        assert len(warm.workflows) == len(cold.workflows) + 1
+        cached = warm.workflows[str(tmp_path / 'pkg' / 'mod_00.py')]
+        assert cached == cold.workflows[str(tmp_path / 'pkg' / 'mod_00.py')]
+
+    def test_hash_check_rejects_same_size_edit(self, tmp_path, sample_workflow_module_content):
+        """With verify_hash an edit that keeps size and mtime is still detected."""
+        import os
+
+        from sphinx_dflow_ext.discovery import DiscoveryCache, WorkflowDiscovery
+
+        module = tmp_path / 'mod.py'
+        module.write_text(sample_workflow_module_content)
+        cache_path = tmp_path / 'cache.json'
+        WorkflowDiscovery(
+            base_path=tmp_path, cache=DiscoveryCache(cache_path, verify_hash=True)
+        ).discover(['mod.py'])
+
+        stat = os.stat(module)
+        module.write_text(sample_workflow_module_content.replace('overview', 'overvieX'))
+        os.utime(module, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        result = WorkflowDiscovery(
+            base_path=tmp_path, cache=DiscoveryCache(cache_path, verify_hash=True)
+        ).discover(['mod.py'])
+
+        assert 'overvieX' in result.workflows[str(module)].declared_tiers
+
+    def test_older_cache_version_is_discarded(
+        self, tmp_path, sample_workflow_module_content, monkeypatch
+    ):
+        """Entries written by an older analysis are re-analyzed, not reused."""
+        import json
+
+        from sphinx_dflow_ext.discovery import DiscoveryCache, WorkflowDiscovery
+
+        module = tmp_path / 'mod.py'
+        module.write_text(sample_workflow_module_content)
+        cache_path = tmp_path / 'cache.json'
+        WorkflowDiscovery(base_path=tmp_path, cache=DiscoveryCache(cache_path)).discover(['mod.py'])
+
+        data = json.loads(cache_path.read_text(encoding='utf-8'))
+        data['version'] = DiscoveryCache.VERSION - 1
+        cache_path.write_text(json.dumps(data), encoding='utf-8')
+
+        analyzed = []
+        original = WorkflowDiscovery._analyze_file
+
+        def spy(self, file_path):
+            analyzed.append(file_path.name)
+            return original(self, file_path)
+
+        monkeypatch.setattr(WorkflowDiscovery, '_analyze_file', spy)
+        WorkflowDiscovery(base_path=tmp_path, cache=DiscoveryCache(cache_path)).discover(['mod.py'])
+
+        assert analyzed == ['mod.py']
+        assert json.loads(cache_path.read_text(encoding='utf-8'))['version'] == DiscoveryCache.VERSION
+
+
+class TestMarkerPrefilter:
+    """Test byte-level marker detection."""
+
+    def test_prefilter_keeps_marker_semantics(self, tmp_path):
+        """Case-insensitive module markers, late function markers, and misses."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        src = tmp_path / 'src'
+        src.mkdir()
+        (src / 'lower.py').write_text('"""Doc."""\n# workflows: a, b\n' + 'x = 1\n' * 3000)
+        (src / 'late.py').write_text(
+            'x = 1\n' * 3000 + '# DOCUMENT_WORKFLOW: main\ndef run():\n    pass\n'
+        )
+        (src / 'plain.py').write_bytes(b'x = "\xff"\n' * 100)
+
+        result = WorkflowDiscovery(base_path=tmp_path).discover(['src'])
+        by_name = {Path(p).name: w for p, w in result.workflows.items()}
+
+        assert by_name['lower.py'].declared_tiers == ['a', 'b']
+        assert by_name['lower.py'].docstring == 'Doc.'
+        assert by_name['lower.py'].line_count == 3003
+        assert by_name['late.py'].entry_points == {'main': 'run'}
+        assert (str(src / 'plain.py'), 'No workflow markers') in result.skipped
+
+
+class TestMarkerScanner:
+    """Test the single-pass DOCUMENT_WORKFLOW scanner."""
+
+    def test_markers_map_to_next_function(self):
+        """Consecutive markers share the next def; the first marker for a tier wins."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        source = (
+            "# DOCUMENT_WORKFLOW: overview\n"
+            "# DOCUMENT_WORKFLOW: full, overview\n"
+            "def run():\n    pass\n"
+            "def helper():\n    pass\n"
+            "# DOCUMENT_WORKFLOW: full, extra\n"
+            "def other():\n    pass\n"
+        )
+        tiers, entry_points = WorkflowDiscovery()._scan_function_markers(source)
+
+        assert tiers == ['extra', 'full', 'overview']
+        assert entry_points == {'overview': 'run', 'full': 'run', 'extra': 'other'}
+
+    def test_no_markers(self):
+        """Files without markers report None for tiers."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        assert WorkflowDiscovery()._scan_function_markers("def f():\n    pass\n") == (None, {})
+
+
+class TestPackageDetection:
+    """Test per-directory package name detection."""
+
+    def test_deeply_nested_package_names(self, tmp_path, sample_workflow_module_content):
+        """Package names include every enclosing package, not just two levels."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        package = tmp_path / 'proj' / 'a' / 'b' / 'c' / 'd'
+        package.mkdir(parents=True)
+        for directory in (package, package.parent, package.parent.parent, package.parents[2]):
+            (directory / '__init__.py').write_text('')
+        (package / 'deep.py').write_text(sample_workflow_module_content)
+        (tmp_path / 'proj' / 'tools').mkdir()
+        (tmp_path / 'proj' / 'tools' / 'script.py').write_text(sample_workflow_module_content)
+
+        result = WorkflowDiscovery(base_path=tmp_path).discover(['proj'])
+        names = {Path(p).name: w.package_name for p, w in result.workflows.items()}
+
+        assert names == {'deep.py': 'a.b.c.d', 'script.py': 'tools'}
+
+    def test_walk_needs_no_init_stats(self, tmp_path, sample_workflow_module_content, monkeypatch):
+        """Package detection for walked directories reuses the directory listing."""
+        import os
+
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=5)
+        discovery = WorkflowDiscovery(base_path=tmp_path)
+        checked = []
+        original = os.path.isfile
+        monkeypatch.setattr(os.path, 'isfile', lambda p: checked.append(p) or original(p))
+
+        result = discovery.discover(['pkg'])
+
+        assert {w.package_name for w in result.workflows.values()} == {'pkg'}
+        assert checked == [os.path.join(str(tmp_path), '__init__.py')]
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+class TestGitFileSource:
+    """Test git-index-backed file enumeration."""
+
+    def test_matches_walk_and_honours_gitignore(self, tmp_path, sample_workflow_module_content):
+        """Listed files match the walk, minus ignored files, in the same order."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=4)
+        nested = tmp_path / 'pkg' / 'sub'
+        nested.mkdir()
+        (nested / '__init__.py').write_text('')
+        (nested / 'inner.py').write_text(sample_workflow_module_content)
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        subprocess.run(['git', '-C', str(tmp_path), 'add', 'pkg/mod_00.py'], check=True)
+
+        walked = WorkflowDiscovery(base_path=tmp_path, file_source='walk').discover(['pkg'])
+        listed = WorkflowDiscovery(base_path=tmp_path, file_source='auto').discover(['pkg'])
+
+        assert list(listed.workflows) == list(walked.workflows)
+        assert [w.package_name for w in listed.workflows.values()] == [
+            w.package_name for w in walked.workflows.values()
+        ]
+        assert 'pkg.sub' in {w.package_name for w in listed.workflows.values()}
+
+        (tmp_path / '.gitignore').write_text('mod_01.py\n')
+        listed = WorkflowDiscovery(base_path=tmp_path).discover(['pkg'])
+
+        assert len(listed.workflows) == len(walked.workflows) - 1
+        assert not any(p.endswith('mod_01.py') for p in listed.workflows)
+
+    def test_submodule_files_are_listed(self, tmp_path, sample_workflow_module_content):
+        """Files inside submodules are found, as the walk finds them."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        git = ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+               '-c', 'protocol.file.allow=always']
+        upstream = tmp_path / 'upstream'
+        upstream.mkdir()
+        _make_tree(upstream, sample_workflow_module_content, count=2)
+        subprocess.run(git + ['init', '-q', str(upstream)], check=True)
+        subprocess.run(git + ['-C', str(upstream), 'add', '.'], check=True)
+        subprocess.run(git + ['-C', str(upstream), 'commit', '-q', '-m', 'init'], check=True)
+
+        project = tmp_path / 'project'
+        project.mkdir()
+        _make_tree(project, sample_workflow_module_content, count=2)
+        subprocess.run(git + ['init', '-q', str(project)], check=True)
+        subprocess.run(
+            git + ['-C', str(project), 'submodule', 'add', '-q', str(upstream), 'pkg/vendored'],
+            check=True, stderr=subprocess.DEVNULL
+        )
+        (project / 'pkg' / 'vendored' / 'pkg' / 'extra.py').write_text(sample_workflow_module_content)
+
+        walked = WorkflowDiscovery(base_path=project, file_source='walk').discover(['pkg'])
+        listed = WorkflowDiscovery(base_path=project, file_source='auto').discover(['pkg'])
+
+        assert list(listed.workflows) == list(walked.workflows)
+        assert any('vendored' in p and p.endswith('extra.py') for p in listed.workflows)
+
+    def test_falls_back_to_walk_outside_git(self, tmp_path, sample_workflow_module_content, monkeypatch):
+        """Without a git checkout the directory is walked."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(tmp_path))
+        _make_tree(tmp_path, sample_workflow_module_content, count=3)
+        discovery = WorkflowDiscovery(base_path=tmp_path)
+
+        assert discovery._git_list_files(str(tmp_path / 'pkg')) is None
+        assert len(discovery.discover(['pkg']).workflows) == 3
+
+
+class TestPathPatterns:
+    """Test path-aware exclude patterns during discovery."""
+
+    def test_path_double_star_and_negation(self, tmp_path, sample_workflow_module_content):
+        """Exclude patterns match paths relative to base_path, with '**' and '!'."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        for rel in ('src/core/a.py', 'src/legacy/old.py', 'src/legacy/keep.py',
+                    'src/x/gen/g.py', 'src/_private/p.py', 'src/_private/q.py'):
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(sample_workflow_module_content)
+
+        discovery = WorkflowDiscovery(
+            base_path=tmp_path,
+            exclude_patterns=['src/legacy/**', '!src/legacy/keep.py', '**/gen/', '_*'],
+            file_source='walk',
+        )
+        result = discovery.discover(['src'])
+        found = sorted(Path(p).relative_to(tmp_path).as_posix() for p in result.workflows)
+
+        assert found == ['src/core/a.py', 'src/legacy/keep.py']
+
+
+class TestSharedDiscovery:
+    """Test per-build sharing of discovery results."""
+
+    @pytest.fixture(autouse=True)
+    def clear_shared_discovery(self):
+        """Envs of earlier tests may share an id with this test's env."""
+        from sphinx_dflow_ext import discovery as discovery_module
+
+        discovery_module._shared_discovery.clear()
+        yield
+        discovery_module._shared_discovery.clear()
+
+    def test_each_path_scanned_once_per_build(self, tmp_path, sample_workflow_module_content, monkeypatch):
+        """Overlapping index directives and the registry reuse memoized scans."""
+        from types import SimpleNamespace
+
+        from sphinx_dflow_ext import discovery as discovery_module
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=3)
+        (tmp_path / 'other').mkdir()
+        (tmp_path / 'other' / 'tool.py').write_text(sample_workflow_module_content)
+        (tmp_path / 'docs').mkdir()
+
+        scanned = []
+        original = discovery_module.WorkflowDiscovery.discover
+        monkeypatch.setattr(
+            discovery_module.WorkflowDiscovery, 'discover',
+            lambda self, paths, recursive=True: scanned.extend(paths) or original(self, paths, recursive)
+        )
+        config = SimpleNamespace(workflow_search_paths=['pkg', 'other'], workflow_exclude_patterns=None)
+        env = SimpleNamespace(config=config, srcdir=str(tmp_path / 'docs'), doctreedir=str(tmp_path / '.doctrees'))
+
+        first = discovery_module.get_shared_discovery_result(env, ['pkg'])
+        both = discovery_module.get_shared_discovery_result(env, ['pkg', 'other'])
+        registry = discovery_module.build_workflow_registry(
+            SimpleNamespace(config=config, env=env), None
+        )
+
+        assert scanned == ['pkg', 'other']
+        assert len(first.workflows) == 3
+        assert list(both.workflows) == list(registry.workflows)
+        assert len(both.workflows) == 4
+        # The memo and the file cache are kept off the (pickled) env
+        assert set(vars(env)) == {'config', 'srcdir', 'doctreedir'}
+
+        discovery_module.drop_discovery_results(None, env)
+        assert id(env) not in discovery_module._shared_discovery
+        discovery_module.get_shared_discovery_result(env, ['pkg'])
+        assert scanned == ['pkg', 'other', 'pkg']
+
+    def test_nested_paths_filtered_from_ancestor_scan(self, tmp_path, sample_workflow_module_content, monkeypatch):
+        """Sub-paths of a scanned root are not walked again; other configs are."""
+        from types import SimpleNamespace
+
+        from sphinx_dflow_ext import discovery as discovery_module
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=2)
+        (tmp_path / 'pkg' / 'sub').mkdir()
+        (tmp_path / 'pkg' / 'sub' / 'deep.py').write_text(sample_workflow_module_content)
+        (tmp_path / 'docs').mkdir()
+
+        scanned = []
+        original = discovery_module.WorkflowDiscovery.discover
+        monkeypatch.setattr(
+            discovery_module.WorkflowDiscovery, 'discover',
+            lambda self, paths, recursive=True: scanned.extend(paths) or original(self, paths, recursive)
+        )
+        config = SimpleNamespace(workflow_discovery_source='walk')
+        env = SimpleNamespace(config=config, srcdir=str(tmp_path / 'docs'), doctreedir=str(tmp_path / '.doctrees'))
+
+        nested_first = discovery_module.get_shared_discovery_result(env, ['pkg/sub', 'pkg'])
+        sub = discovery_module.get_shared_discovery_result(env, ['pkg/sub'])
+        assert scanned == ['pkg']
+        assert len(nested_first.workflows) == 3
+        assert [Path(p).name for p in sub.workflows] == ['deep.py']
+
+        excluded = discovery_module.get_shared_discovery_result(env, ['pkg'], ['sub'])
+        assert scanned == ['pkg', 'pkg']
+        assert len(excluded.workflows) == 2
+
+        # A path behind a pruned directory is scanned on its own
+        discovery_module.get_shared_discovery_result(env, ['pkg/sub'], ['sub'])
+        assert scanned == ['pkg', 'pkg', 'pkg/sub']
+
+    def test_subtree_matches_error_paths_not_text(self, tmp_path):
+        """Errors belong to a subtree by their recorded path only."""
+        from sphinx_dflow_ext.discovery import DiscoveryResult
+
+        sub = tmp_path / 'src' / 'pkg'
+        result = DiscoveryResult(errors=['Legacy error mentioning ' + str(sub / 'x.py')])
+        result.add_error(f"Could not read {sub / 'a.py'}: boom", sub / 'a.py')
+        elsewhere = tmp_path / 'vendor' / str(sub).lstrip('/') / 'b.py'
+        result.add_error(f"Could not read {elsewhere}: boom", elsewhere)
+        result.add_error(f"Permission denied: {sub}2", f"{sub}2")
+
+        assert result.subtree(sub).error_items() == [(f"Could not read {sub / 'a.py'}: boom", str(sub / 'a.py'))]
+        assert len(result.error_items()) == 4 and result.error_items()[0][1] is None
+
+
+def _notebook(sources, outputs=()):
+    """Serialize an nbformat 4 notebook with one code cell per source."""
+    import json
+
+    cells = [
+        {'cell_type': 'code', 'metadata': {}, 'outputs': list(outputs), 'source': source}
+        for source in sources
+    ]
+    return json.dumps({'cells': cells, 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}, indent=1)
+
+
+class TestNotebookDiscovery:
+    """Test .ipynb discovery from cell sources."""
+
+    def test_markers_in_cell_sources(self, tmp_path):
+        """Notebooks with markers in their cells are discovered alongside modules."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        (tmp_path / 'nb').mkdir()
+        (tmp_path / 'nb' / 'analysis.ipynb').write_text(_notebook([
+            ['"""Analysis notebook.\n', '\n', '# WORKFLOWS: overview, full\n', '"""\n'],
+            'def run():\n    # Step 1: "Load" \\ data\n',
+        ]))
+
+        result = WorkflowDiscovery(base_path=tmp_path).discover(['nb'])
+        workflow = next(iter(result.workflows.values()))
+
+        assert workflow.is_notebook
+        assert workflow.module_name == 'analysis'
+        assert workflow.declared_tiers == ['overview', 'full']
+        assert workflow.docstring == 'Analysis notebook.'
+
+    def test_outputs_are_not_scanned(self, tmp_path):
+        """Markers that only appear in outputs do not make a workflow."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        output = {
+            'output_type': 'display_data',
+            'data': {'image/png': 'A' * 200000, 'text/plain': ['# WORKFLOWS: overview\n']},
+            'metadata': {'source': '# WORKFLOWS: overview'},
+        }
+        (tmp_path / 'plot.ipynb').write_text(_notebook(['import matplotlib\n'], [output]))
+
+        discovery = WorkflowDiscovery(base_path=tmp_path)
+        result = discovery.discover(['.'])
+
+        assert not result.workflows
+        assert discovery._read_notebook_sources(tmp_path / 'plot.ipynb')[0] == b'import matplotlib\n'
+
+    def test_malformed_notebook_is_an_error(self, tmp_path):
+        """Truncated notebook JSON is reported, not raised."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        (tmp_path / 'broken.ipynb').write_text(_notebook(['# WORKFLOWS: a\n'])[:-20])
+
+        result = WorkflowDiscovery(base_path=tmp_path).discover(['.'])
+
+        assert not result.workflows
+        assert result.errors and 'Could not parse notebook' in result.errors[0]
+
+
+class TestWatchMode:
+    """Test incremental updates of a watched DiscoveryResult."""
+
+    def _change_tree(self, root, content):
+        (root / 'pkg' / 'mod_00.py').write_text(content.replace('overview', 'overview, extra'))
+        (root / 'pkg' / 'plain_00.py').write_text(content)
+        (root / 'pkg' / 'mod_01.py').unlink()
+        (root / 'pkg' / 'test_new.py').write_text(content)
+
+    def _kinds(self, events):
+        return sorted((event.kind, Path(event.path).name) for event in events)
+
+    def test_polling_backend_applies_only_changes(self, tmp_path, sample_workflow_module_content):
+        """Polling re-analyzes changed files and reports workflow events."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=3)
+        discovery = WorkflowDiscovery(base_path=tmp_path)
+        with discovery.watch(['pkg'], backend='poll', interval=0) as watcher:
+            assert len(watcher.result.workflows) == 3
+            analyzed = []
+            original = discovery._analyze_file
+            discovery._analyze_file = lambda path: analyzed.append(path.name) or original(path)
+
+            self._change_tree(tmp_path, sample_workflow_module_content)
+            events = watcher.poll()
+
+        assert self._kinds(events) == [
+            ('added', 'plain_00.py'), ('modified', 'mod_00.py'), ('removed', 'mod_01.py')
+        ]
+        assert sorted(analyzed) == ['mod_00.py', 'plain_00.py']
+        assert sorted(Path(p).name for p in watcher.result.workflows) == [
+            'mod_00.py', 'mod_02.py', 'plain_00.py'
+        ]
+
+    def test_inotify_backend(self, tmp_path, sample_workflow_module_content):
+        """inotify reports the same events, including files in new directories."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=3)
+        try:
+            watcher = WorkflowDiscovery(base_path=tmp_path).watch(['pkg'], backend='inotify')
+        except OSError as e:
+            pytest.skip(f'inotify unavailable: {e}')
+
+        with watcher:
+            self._change_tree(tmp_path, sample_workflow_module_content)
+            (tmp_path / 'pkg' / 'sub').mkdir()
+            (tmp_path / 'pkg' / 'sub' / 'nested.py').write_text(sample_workflow_module_content)
+            events = watcher.poll(timeout=5)
+
+            assert self._kinds(events) == [
+                ('added', 'nested.py'), ('added', 'plain_00.py'),
+                ('modified', 'mod_00.py'), ('removed', 'mod_01.py'),
+            ]
+            assert watcher.poll(timeout=0.1) == []
+
+
+class TestDiscoveryMetrics:
+    """Test optional discovery profiling metrics."""
+
+    def test_counters_and_cache_hits(self, tmp_path, sample_workflow_module_content):
+        """Counters cover the tree (__init__.py is excluded); a warm run hits the cache."""
+        from sphinx_dflow_ext.discovery import DiscoveryCache, WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=3)
+        (tmp_path / 'pkg' / 'sub').mkdir()
+        (tmp_path / 'pkg' / 'sub' / 'legacy.py').write_bytes(
+            b'# WORKFLOWS: overview\n"""Caf\xe9."""\n'
+        )
+        cache_path = tmp_path / 'cache.json'
+
+        def run():
+            return WorkflowDiscovery(
+                base_path=tmp_path, cache=DiscoveryCache(cache_path),
+                file_source='walk', collect_metrics=2
+            ).discover(['pkg'])
+
+        cold = run().metrics
+        assert cold.directories_visited == 2
+        assert cold.files_considered == cold.files_read == 7
+        assert cold.bytes_read == sum(p.stat().st_size for p in (tmp_path / 'pkg').rglob('*.py'))
+        assert cold.decode_fallbacks == 1
+        assert (cold.cache_hits, cold.cache_misses) == (0, 7)
+        assert len(cold.slowest_files) == 2
+
+        warm = run().metrics
+        assert (warm.cache_hits, warm.cache_misses, warm.files_read) == (7, 0, 0)
+        assert warm.cache_hit_rate == 1.0
+
+        report = cold.format_report()
+        assert 'Files considered:    7' in report
+        assert 'Slowest files:' in report
+
+    def test_metrics_off_by_default(self, tmp_path, sample_workflow_module_content):
+        """Without collect_metrics the result carries no metrics."""
+        from sphinx_dflow_ext.discovery import WorkflowDiscovery
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=1)
+        assert WorkflowDiscovery(base_path=tmp_path).discover(['pkg']).metrics is None
+
+    def test_cli_prints_report(self, tmp_path, sample_workflow_module_content, capsys):
+        """The discovery CLI lists workflows and prints the metrics report."""
+        from sphinx_dflow_ext.discovery_cli import main
+
+        _make_tree(tmp_path, sample_workflow_module_content, count=2)
+        status = main(['pkg', '--base', str(tmp_path), '--metrics', '--top', '1'])
+        out = capsys.readouterr().out
+
+        assert status == 0
+        assert '2 workflow modules, 0 errors' in out
+        assert 'Workflow discovery metrics' in out
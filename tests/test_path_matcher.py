@@ -0,0 +1,73 @@
+"""
+Test suite for compiled include/exclude pattern matching.
+
+Run with:
+    pytest tests/test_path_matcher.py -v
+"""
+
+import fnmatch
+
+import pytest
+
+
+class TestPathMatcher:
+    """Test the PathMatcher class."""
+
+    @pytest.mark.parametrize('name', [
+        'test_io.py', '_private.py', '.hidden', 'io_test.py', 'conftest.py',
+        'module.py', 'pkg.sub.mod', 'test_', '[x].py',
+    ])
+    def test_name_patterns_match_fnmatch(self, name):
+        """Patterns without '/' behave like fnmatch on names."""
+        from sphinx_dflow_ext.path_matcher import PathMatcher
+
+        patterns = ['test_*', '_*', '.*', '*_test.py', 'conftest.py', 'pkg.*', '[[]x].py']
+        expected = any(fnmatch.fnmatchcase(name, p) for p in patterns)
+
+        assert PathMatcher(patterns).match(name) is expected
+        assert PathMatcher(patterns).match(f'src/deep/{name}') is expected
+
+    def test_path_and_double_star_patterns(self):
+        """Patterns with '/' match the full path; '**' spans directories."""
+        from sphinx_dflow_ext.path_matcher import PathMatcher
+
+        matcher = PathMatcher(['src/legacy/**', '**/gen/*.py', 'docs/*.py'])
+
+        assert matcher.match('src/legacy/a/b.py')
+        assert matcher.match('gen/x.py')
+        assert matcher.match('a/b/gen/x.py')
+        assert matcher.match('docs/conf.py')
+        assert not matcher.match('docs/api/conf.py')
+        assert not matcher.match('other/src/legacy/a.py')
+
+    def test_negation_last_match_wins(self):
+        """A later '!' pattern re-includes, a later plain pattern excludes again."""
+        from sphinx_dflow_ext.path_matcher import PathMatcher
+
+        matcher = PathMatcher(['_*', '!__main__.py', '!_keep*', '_keep_not.py'])
+
+        assert matcher.match('pkg/_private.py')
+        assert not matcher.match('pkg/__main__.py')
+        assert not matcher.match('_keep_me.py')
+        assert matcher.match('_keep_not.py')
+
+    def test_directory_only_patterns(self):
+        """A trailing '/' only matches directories."""
+        from sphinx_dflow_ext.path_matcher import PathMatcher
+
+        matcher = PathMatcher(['build/'])
+
+        assert matcher.match('a/build', is_dir=True)
+        assert not matcher.match('a/build')
+        assert not PathMatcher([]).match('anything')
+
+    def test_module_filtering_uses_compiled_patterns(self):
+        """should_process_module keeps fnmatch semantics for dotted names."""
+        from sphinx_dflow_ext.extension import should_process_module
+
+        config = {'exclude_patterns': ['*.tests.*', '!pkg.tests.keep'], 'include_only': ['pkg.*']}
+
+        assert should_process_module('pkg.io', config)
+        assert not should_process_module('pkg.tests.io', config)
+        assert should_process_module('pkg.tests.keep', config)
+        assert not should_process_module('other.io', config)
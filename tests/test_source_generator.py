@@ -0,0 +1,503 @@
+"""
+Test suite for browsable source page generation.
+
+Run with:
+    pytest tests/test_source_generator.py -v
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+
+def _make_app(tmp_path: Path, outdir: str, count: int = 4, **config):
+    """Build an app with ``count`` tracked modules in two packages."""
+    src = tmp_path / 'src'
+    src.mkdir(exist_ok=True)
+    mappings = {}
+    for i in range(count):
+        path = src / f'mod_{i}.py'
+        path.write_text(
+            'def run():\n'
+            '    # Step 1: Load\n'
+            '    data = [1, 2]\n'
+            '    # Step 1.1: Check\n'
+            '    return data\n'
+        )
+        module_name = f'pkg{i % 2}.mod_{i}'
+        mappings[module_name] = {
+            'source_path': str(path),
+            'steps': {
+                f'step-{i}-1': {'line': 2, 'name': 'Load', 'number': f'{i}.1', 'module': module_name},
+                f'step-{i}-1-1': {'line': 4, 'name': 'Check', 'number': f'{i}.1.1', 'module': module_name},
+            },
+        }
+    return SimpleNamespace(
+        outdir=str(tmp_path / outdir),
+        doctreedir=str(tmp_path / '.doctrees'),
+        verbosity=0,
+        env=SimpleNamespace(workflow_source_mappings=mappings),
+        config=SimpleNamespace(**config),
+    )
+
+
+def _read_pages(outdir: str):
+    root = Path(outdir)
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob('*.html')}
+
+
+class TestParallelSourcePages:
+    """Test process-pool source page generation."""
+
+    def test_process_pool_output_is_byte_identical(self, tmp_path):
+        """Pages generated by worker processes match the serial pages exactly."""
+        from sphinx_dflow_ext.source_generator import generate_all_source_pages
+
+        serial = _make_app(tmp_path, 'serial', workflow_source_workers=1)
+        parallel = _make_app(tmp_path, 'parallel', workflow_source_workers=2)
+        generate_all_source_pages(serial, None)
+        generate_all_source_pages(parallel, None)
+
+        pages = _read_pages(serial.outdir)
+        assert sorted(pages) == [
+            '_modules/pkg0/mod_0.html', '_modules/pkg0/mod_2.html',
+            '_modules/pkg1/mod_1.html', '_modules/pkg1/mod_3.html',
+        ]
+        assert _read_pages(parallel.outdir) == pages
+        index = next((Path(serial.outdir) / '_static').glob('workflow_step_nav.*.js')).read_bytes()
+        assert b'pkg1/mod_1.html#step-1-1' in index
+        assert b'data-root="../"' in pages['_modules/pkg0/mod_0.html']
+
+    def test_missing_sources_are_skipped(self, tmp_path):
+        """Modules whose source file is gone are not sent to workers."""
+        from sphinx_dflow_ext.source_generator import generate_all_source_pages
+
+        app = _make_app(tmp_path, 'out', count=3, workflow_source_workers=2)
+        Path(app.env.workflow_source_mappings['pkg1.mod_1']['source_path']).unlink()
+        generate_all_source_pages(app, None)
+
+        assert sorted(_read_pages(app.outdir)) == ['_modules/pkg0/mod_0.html', '_modules/pkg0/mod_2.html']
+
+
+class TestIncrementalSourcePages:
+    """Test skipping unchanged source pages via the manifest."""
+
+    def _generated(self, app, monkeypatch):
+        """Run generation and return the module names that were regenerated."""
+        from sphinx_dflow_ext import source_generator
+
+        generated = []
+        original = source_generator._generate_source_page
+
+        def spy(task):
+            generated.append(task[0])
+            return original(task)
+
+        monkeypatch.setattr(source_generator, '_generate_source_page', spy)
+        source_generator.generate_all_source_pages(app, None)
+        return sorted(generated)
+
+    def test_unchanged_pages_are_skipped(self, tmp_path, monkeypatch):
+        """A rebuild with identical inputs regenerates nothing."""
+        app = _make_app(tmp_path, 'out', count=3)
+
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_0', 'pkg0.mod_2', 'pkg1.mod_1']
+        assert (Path(app.outdir) / '.workflow_source_manifest.json').exists()
+        assert self._generated(app, monkeypatch) == []
+
+    def test_changed_inputs_regenerate(self, tmp_path, monkeypatch):
+        """Edited sources, deleted pages and step changes invalidate pages."""
+        app = _make_app(tmp_path, 'out', count=3)
+        self._generated(app, monkeypatch)
+        mappings = app.env.workflow_source_mappings
+
+        with open(mappings['pkg0.mod_0']['source_path'], 'a') as f:
+            f.write('# edited\n')
+        (Path(app.outdir) / '_modules' / 'pkg0' / 'mod_2.html').unlink()
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_0', 'pkg0.mod_2']
+
+        # Other modules' steps are in the shared index, whose hashed name every page links
+        mappings['pkg1.mod_1']['steps']['step-1-1']['name'] = 'Load inputs'
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_0', 'pkg0.mod_2', 'pkg1.mod_1']
+        index_paths = list((Path(app.outdir) / '_static').glob('workflow_step_nav.*.js'))
+        assert len(index_paths) == 1 and 'Load inputs' in index_paths[0].read_text()
+
+    def test_removed_modules_lose_their_pages(self, tmp_path, monkeypatch):
+        """Pages and manifest entries of modules no longer documented are deleted."""
+        import json
+
+        app = _make_app(tmp_path, 'out', count=4)
+        self._generated(app, monkeypatch)
+        del app.env.workflow_source_mappings['pkg1.mod_1']
+        del app.env.workflow_source_mappings['pkg1.mod_3']
+
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_0', 'pkg0.mod_2']
+        modules = Path(app.outdir) / '_modules'
+        assert sorted(p.relative_to(modules).as_posix() for p in modules.rglob('*')) == [
+            'pkg0', 'pkg0/mod_0.html', 'pkg0/mod_2.html'
+        ]
+        manifest = json.loads((Path(app.outdir) / '.workflow_source_manifest.json').read_text())
+        assert sorted(manifest['pages']) == ['pkg0.mod_0', 'pkg0.mod_2']
+
+    def test_purged_documents_lose_their_pages(self, tmp_path, monkeypatch):
+        """A module whose only document is removed loses its page on the next build."""
+        from sphinx_dflow_ext import source_generator
+
+        app = _make_app(tmp_path, 'out', count=3)
+        mappings, app.env.workflow_source_mappings = app.env.workflow_source_mappings, {}
+        for docname, module_names in (('a', ['pkg0.mod_0', 'pkg1.mod_1']), ('b', ['pkg0.mod_2', 'pkg1.mod_1'])):
+            app.env.docname = docname
+            for module_name in module_names:
+                mapping = mappings[module_name]
+                source_generator.record_source_mapping(
+                    app.env, module_name, mapping['source_path'], mapping['steps']
+                )
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_0', 'pkg0.mod_2', 'pkg1.mod_1']
+
+        source_generator.purge_source_mappings(None, app.env, 'a')
+        assert sorted(app.env.workflow_source_mappings) == ['pkg0.mod_2', 'pkg1.mod_1']
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_2', 'pkg1.mod_1']
+        assert sorted(_read_pages(app.outdir)) == ['_modules/pkg0/mod_2.html', '_modules/pkg1/mod_1.html']
+
+    def test_parallel_reader_mappings_are_merged(self, tmp_path):
+        """Mappings of the merged documents are added with their documents."""
+        from sphinx_dflow_ext import source_generator
+
+        env = SimpleNamespace(docname='a')
+        source_generator.record_source_mapping(env, 'm', 'm.py', {'step-1': {'line': 1}})
+        other = SimpleNamespace(docname='b', workflow_source_mappings={
+            'm': {'source_path': 'm.py', 'steps': {'step-2': {'line': 2}}, 'docnames': {'a', 'b'}},
+            'n': {'source_path': 'n.py', 'steps': {'step-1': {'line': 1}}, 'docnames': {'c'}},
+        })
+        source_generator.merge_source_mappings(None, env, ['b'], other)
+
+        assert env.workflow_source_mappings == {
+            'm': {'source_path': 'm.py', 'steps': {'step-1': {'line': 1}, 'step-2': {'line': 2}}, 'docnames': {'a', 'b'}},
+        }
+
+    def test_render_key_change_regenerates(self, tmp_path, monkeypatch):
+        """Bumping the template version invalidates every page."""
+        from sphinx_dflow_ext.source_generator import SourceHTMLGenerator
+
+        app = _make_app(tmp_path, 'out', count=2)
+        self._generated(app, monkeypatch)
+        monkeypatch.setattr(SourceHTMLGenerator, 'TEMPLATE_VERSION', SourceHTMLGenerator.TEMPLATE_VERSION + 1)
+
+        assert self._generated(app, monkeypatch) == ['pkg0.mod_0', 'pkg1.mod_1']
+
+
+class TestStepNavigation:
+    """Test the shared cross-module step navigation."""
+
+    def test_render_links_relative_to_current_module(self):
+        """Own steps link within the page, other modules' steps across pages."""
+        from sphinx_dflow_ext.source_generator import StepIndex, StepNavigation
+
+        navigation = StepNavigation(StepIndex.from_step_data({
+            'step-1': {'line': 3, 'name': 'Load', 'number': '1', 'module': 'pkg.io'},
+            'step-2': {'line': 9, 'name': 'Fit', 'number': '2', 'module': 'main'},
+        }))
+
+        io_page = navigation.render('pkg.io', 'workflow_step_nav.0123456789.js')
+        assert '<a href="#step-1">' in io_page
+        assert 'Fit' not in io_page
+        assert '<div class="step-nav-index" data-module="pkg.io" data-root="../"></div>' in io_page
+        assert '<script defer src="../../_static/workflow_step_nav.0123456789.js"></script>' in io_page
+
+        main_page = navigation.render('main')
+        assert '<a href="pkg/io.html#step-1">' in main_page
+        assert '<a href="#step-2">' in main_page
+        assert 'step-nav-index' not in main_page
+
+        index = navigation.index_script()
+        assert '<a href=\\"main.html#step-2\\">' in index
+        assert '<a href=\\"pkg/io.html#step-1\\">' in index and 'Fit \\u2197' in index
+
+    def test_empty_navigation(self):
+        """Without steps every page shows the no-steps message."""
+        from sphinx_dflow_ext.source_generator import StepIndex, StepNavigation
+
+        assert StepNavigation(StepIndex()).render('c') == (
+            '<p class="no-steps-message">No workflow steps in this module</p>'
+        )
+
+
+class TestStepIndex:
+    """Test the namespaced global step index."""
+
+    def test_equal_step_ids_do_not_collide(self):
+        """step-1 of different modules and functions are separate entries."""
+        from sphinx_dflow_ext.source_generator import StepIndex
+
+        index = StepIndex.from_mappings({
+            'a': {'steps': {
+                'load:step-1': {'line': 3, 'name': 'Load', 'number': '1', 'function': 'load'},
+                'fit:step-1': {'line': 20, 'name': 'Fit', 'number': '1', 'function': 'fit'},
+            }},
+            'b': {'steps': {'step-1': {'line': 5, 'name': 'Other', 'number': '1'}}},
+        })
+
+        assert len(index) == 3
+        assert index.modules == ['a', 'b'] and index.functions == ['load', 'fit', '']
+        assert index.step_lines('a') == {'step-load-1': 3, 'step-1': 3, 'step-fit-1': 20}
+        assert index.step_lines('b') == {'step-1': 5}
+
+        index.add('b', '', '1', 7, 'Other')
+        assert len(index) == 3 and index.step_lines('b') == {'step-1': 7}
+
+    def test_navigation_keeps_every_module_and_function(self):
+        """Each (module, function) gets its own step tree in the navigation."""
+        from sphinx_dflow_ext.source_generator import StepIndex, StepNavigation
+
+        index = StepIndex()
+        index.add('pkg.a', 'load', '1', 3, 'Load')
+        index.add('pkg.a', 'load', '1.1', 4, 'Read')
+        index.add('pkg.a', 'fit', '1', 20, 'Fit')
+        index.add('b', '', '1.1', 6, 'Orphan')
+        page = StepNavigation(index).render('b')
+
+        assert page.count('<span class="step-number">Step 1</span>') == 2
+        assert page.count('class="step-divider"') == 2
+        assert '<a href="../pkg/a.html#step-load-1-1">' not in page
+        assert '<a href="pkg/a.html#step-load-1-1">' in page
+        assert '<a href="#step-1-1">' in page
+        assert '<span class="step-module">a.fit</span>' in page
+
+    def test_pages_link_steps_of_all_modules(self, tmp_path):
+        """Modules sharing step ids all appear in every page's navigation."""
+        from sphinx_dflow_ext.source_generator import generate_all_source_pages
+
+        app = _make_app(tmp_path, 'out', count=2)
+        for mapping in app.env.workflow_source_mappings.values():
+            mapping['steps'] = {
+                'step-1': {'line': 2, 'name': 'Load', 'number': '1'},
+                'step-1-1': {'line': 4, 'name': 'Check', 'number': '1.1'},
+            }
+        generate_all_source_pages(app, None)
+        page = (Path(app.outdir) / '_modules' / 'pkg0' / 'mod_0.html').read_text()
+
+        assert '<a href="#step-1">' in page
+        assert 'pkg1/mod_1.html' not in page
+        assert '<span id="step-1-1" class="step-anchor"></span>' in page
+        index = next((Path(app.outdir) / '_static').glob('workflow_step_nav.*.js')).read_text()
+        assert '["pkg0.mod_0", ' in index and 'pkg1/mod_1.html#step-1\\"' in index
+
+    def test_functions_sharing_step_numbers_get_own_anchors(self, tmp_path):
+        """Nav links of each function jump to that function's steps."""
+        import re
+
+        from sphinx_dflow_ext.source_generator import generate_all_source_pages
+
+        app = _make_app(tmp_path, 'out', count=1)
+        source = Path(app.env.workflow_source_mappings['pkg0.mod_0']['source_path'])
+        source.write_text(
+            'def load():\n    # Step 1: Load\n    pass\n'
+            'def fit():\n    # Step 1: Fit\n    pass\n'
+        )
+        app.env.workflow_source_mappings['pkg0.mod_0']['steps'] = {
+            'load:step-1': {'line': 2, 'name': 'Load', 'number': '1', 'function': 'load'},
+            'fit:step-1': {'line': 5, 'name': 'Fit', 'number': '1', 'function': 'fit'},
+        }
+        generate_all_source_pages(app, None)
+        page = (Path(app.outdir) / '_modules' / 'pkg0' / 'mod_0.html').read_text()
+
+        anchors = dict(re.findall(r'<span id="(step-[\w-]+)" class="step-anchor"></span>(?:<span[^>]*></span>)*<a id="line-(\d+)"', page))
+        assert re.findall(r'<span id="(step-[\w-]+)" class="step-anchor">', page) == [
+            'step-load-1', 'step-1', 'step-fit-1'
+        ]
+        assert anchors['step-fit-1'] == '5'
+        assert '<a href="#step-load-1">' in page and '<a href="#step-fit-1">' in page
+
+
+class TestStaticAssets:
+    """Test shared, content-hashed page assets."""
+
+    def test_pages_link_hashed_assets(self, tmp_path):
+        """Pages link the stylesheet, script and Pygments CSS instead of inlining them."""
+        from sphinx_dflow_ext.source_generator import generate_all_source_pages
+
+        app = _make_app(tmp_path, 'out', count=2)
+        generate_all_source_pages(app, None)
+        static = Path(app.outdir) / '_static'
+        names = sorted(p.name for p in static.iterdir())
+        page = (Path(app.outdir) / '_modules' / 'pkg0' / 'mod_0.html').read_text()
+
+        assert [n.split('.')[0] for n in names] == [
+            'source_page', 'source_page', 'source_pygments', 'workflow_step_nav'
+        ]
+        assert '<style>' not in page and '<script>' not in page
+        for name in names:
+            assert f'"../../_static/{name}"' in page
+        assert b'.source .k' in next(static.glob('source_pygments.*.css')).read_bytes()
+
+    def test_asset_change_renames_and_invalidates(self, tmp_path, monkeypatch):
+        """Changed asset content gets a new name and a new render key."""
+        from sphinx_dflow_ext.source_generator import SourceHTMLGenerator
+
+        before = SourceHTMLGenerator(tmp_path)
+        before_key = before.render_key()
+        static_dir = tmp_path / 'static'
+        static_dir.mkdir()
+        for name in ('source_page.css', 'source_page.js'):
+            (static_dir / name).write_bytes((SourceHTMLGenerator.STATIC_DIR / name).read_bytes())
+        (static_dir / 'source_page.css').write_text('body { margin: 1px; }\n')
+        monkeypatch.setattr(SourceHTMLGenerator, 'STATIC_DIR', static_dir)
+        after = SourceHTMLGenerator(tmp_path)
+
+        assert after.static_assets()['page_css'] != before.static_assets()['page_css']
+        assert after.static_assets()['page_js'] == before.static_assets()['page_js']
+        assert after.render_key() != before_key
+
+    def test_stale_hashed_assets_are_removed(self, tmp_path, monkeypatch):
+        """Writing new assets deletes earlier hashes of the same files only."""
+        from sphinx_dflow_ext.source_generator import SourceHTMLGenerator
+
+        before = SourceHTMLGenerator(tmp_path).write_static_assets()
+        out_static = tmp_path / '_static'
+        (out_static / 'source_page.custom.css').write_text('')
+        static_dir = tmp_path / 'static'
+        static_dir.mkdir()
+        for name in ('source_page.css', 'source_page.js'):
+            (static_dir / name).write_bytes((SourceHTMLGenerator.STATIC_DIR / name).read_bytes())
+        (static_dir / 'source_page.css').write_text('body { margin: 1px; }\n')
+        monkeypatch.setattr(SourceHTMLGenerator, 'STATIC_DIR', static_dir)
+        after = SourceHTMLGenerator(tmp_path).write_static_assets()
+
+        names = {p.name for p in out_static.iterdir()}
+        assert before['page_css'] not in names and after['page_css'] in names
+        assert before['page_js'] == after['page_js'] and after['page_js'] in names
+        assert 'source_page.custom.css' in names
+
+
+class TestHighlightCache:
+    """Test the persistent Pygments highlight cache."""
+
+    def test_unchanged_sources_skip_lexing(self, tmp_path, monkeypatch):
+        """Pages re-assembled for new anchors reuse the cached highlighting."""
+        from sphinx_dflow_ext import source_generator
+
+        calls = []
+        original = source_generator.highlight
+        monkeypatch.setattr(
+            source_generator, 'highlight', lambda *args: calls.append(1) or original(*args)
+        )
+        app = _make_app(tmp_path, 'out', count=2)
+        source_generator.generate_all_source_pages(app, None)
+        page = (Path(app.outdir) / '_modules' / 'pkg0' / 'mod_0.html').read_bytes()
+        assert len(calls) == 1  # Both modules share one source text
+
+        # A step change regenerates every page, but no source is lexed again
+        app.env.workflow_source_mappings['pkg1.mod_1']['steps']['step-1-1']['line'] = 3
+        source_generator.generate_all_source_pages(app, None)
+        assert len(calls) == 1
+        assert b'<span id="step-1-1" class="step-anchor">' in (
+            Path(app.outdir) / '_modules' / 'pkg1' / 'mod_1.html'
+        ).read_bytes()
+
+        # Cached output is byte-identical to a fresh build
+        (tmp_path / 'fresh').mkdir()
+        fresh = _make_app(tmp_path / 'fresh', 'out', count=2, workflow_highlight_cache=False)
+        source_generator.generate_all_source_pages(fresh, None)
+        assert (Path(fresh.outdir) / '_modules' / 'pkg0' / 'mod_0.html').read_bytes() == page
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        """Entries beyond the size budget are evicted oldest-first."""
+        import os
+
+        from sphinx_dflow_ext.source_generator import HighlightCache
+
+        cache = HighlightCache(tmp_path / 'cache')
+        keys = [cache.key(f'x = {i}\n', 'Python', {}) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, [f'line {i}'] * 50)
+            entry = tmp_path / 'cache' / f'{key}.hl'
+            os.utime(entry, ns=(i * 10**9, i * 10**9))
+        assert cache.get(keys[0]) == ['line 0'] * 50  # Refreshes keys[0]
+
+        cache.max_bytes = 2 * (tmp_path / 'cache' / f'{keys[2]}.hl').stat().st_size
+        assert cache.prune() == 1
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+class TestStepAnchors:
+    """Test step anchor placement in highlighted source."""
+
+    def test_anchors_land_on_their_source_lines(self, tmp_path):
+        """Each step anchor directly precedes its line's anchor in the code column."""
+        import re
+
+        from sphinx_dflow_ext.source_generator import SourceHTMLGenerator
+
+        module_path = tmp_path / 'mod.py'
+        module_path.write_text('\n\ndef run():\n    # Step 1: Load\n    x = 1\n    # Step 2: Save\n    return x')
+        generator = SourceHTMLGenerator(tmp_path / 'out')
+        page = generator.generate_source_html(
+            module_path, 'pkg.mod', {'step-1': 4, 'step-2': 6}
+        ).read_text()
+
+        code = page[page.index('<td class="code">'):]
+        assert re.findall(r'<span id="(step-\d)" class="step-anchor"></span><a id="line-(\d+)"', code) == [
+            ('step-1', '4'), ('step-2', '6'),
+        ]
+        # Leading blank lines are kept, so line numbers match the file
+        assert '<a id="line-4" name="line-4"></a>    <span class="c1"># Step 1: Load</span>' in code
+        assert '<a href="#line-7">7</a>' in page and '#line-8' not in page
+
+    def test_cached_lines_render_the_same_page(self, tmp_path):
+        """A page assembled from cached lines matches one highlighted from source."""
+        from sphinx_dflow_ext.source_generator import HighlightCache, SourceHTMLGenerator
+
+        module_path = tmp_path / 'mod.py'
+        module_path.write_text('def run():\n    # Step 1: Load\n    return [1, 2]\n')
+        cache = HighlightCache(tmp_path / 'cache')
+        pages = [
+            SourceHTMLGenerator(tmp_path / out, highlight_cache=cache).generate_source_html(
+                module_path, 'pkg.mod', {'step-1': 2}
+            ).read_bytes()
+            for out in ('cold', 'warm')
+        ]
+        assert len(list((tmp_path / 'cache').iterdir())) == 1
+        assert pages[0] == pages[1]
+        assert pages[0] == SourceHTMLGenerator(tmp_path / 'plain').generate_source_html(
+            module_path, 'pkg.mod', {'step-1': 2}
+        ).read_bytes()
+
+
+class TestVirtualSource:
+    """Test virtualized rendering of very large source pages."""
+
+    def _generate(self, tmp_path, out, virtual_lines):
+        from sphinx_dflow_ext.source_generator import SourceHTMLGenerator
+
+        module_path = tmp_path / 'mod.py'
+        module_path.write_text(''.join(
+            f'def f{i}():\n    # Step {i}: Run\n    return "</script>"\n' for i in range(10)
+        ))
+        generator = SourceHTMLGenerator(tmp_path / out, config={'virtual_lines': virtual_lines})
+        generator.VIRTUAL_CHUNK_LINES = 8
+        return generator.generate_source_html(
+            module_path, 'pkg.mod', {'step-0': 2, 'step-9': 29}
+        ).read_text()
+
+    def test_large_modules_ship_lines_as_chunks(self, tmp_path):
+        """Lines above the threshold are JSON chunks; step anchors stay real elements."""
+        import json
+        import re
+
+        page = self._generate(tmp_path, 'virtual', virtual_lines=20)
+        flat = self._generate(tmp_path, 'flat', virtual_lines=0)
+
+        assert '<table' not in page and 'data-lines="30"' in page
+        chunks = re.findall(r'<script type="application/json" class="source-chunk">(.*?)</script>', page)
+        lines = [line for chunk in chunks for line in json.loads(chunk)]
+        assert [len(json.loads(chunk)) for chunk in chunks] == [8, 8, 8, 6]
+
+        # The chunks hold exactly the highlighted lines of the regular page
+        code = flat[flat.index('<td class="code">'):]
+        flat_lines = re.findall(r'<a id="line-\d+" name="line-\d+"></a>(.*)', code)
+        assert lines[:-1] == flat_lines[:-1] and len(lines) == len(flat_lines)
+        assert 'step-anchor" data-line="29" style="top: calc(28 * var(--source-line-height))"' in page
+
+    def test_small_modules_render_in_full(self, tmp_path):
+        """Modules at or below the threshold keep the full page."""
+        assert '<table' in self._generate(tmp_path, 'out', virtual_lines=30)